@@ -0,0 +1,66 @@
+"""Бенчмарк очереди установки обоев.
+
+Имитирует серию быстрых нажатий: обои ставятся бэкендом с заданной задержкой,
+а очередь применяет только последний запрошенный файл.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_apply.py [--presses 50] [--interval 0.01] [--delay 0.1]
+    python benchmarks/bench_apply.py --backend command  # настоящая установка
+"""
+
+import argparse
+import sys
+import time
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from config import console  # noqa: E402
+from utils.setter import (  # noqa: E402
+    BACKENDS,
+    ApplyQueue,
+    RecordingBackend,
+    create_backend,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--presses", type=int, default=50)
+    parser.add_argument("--interval", type=float, default=0.01)
+    parser.add_argument("--delay", type=float, default=0.1)
+    parser.add_argument("--backend", choices=BACKENDS, default="none")
+    parser.add_argument("--command", default="")
+    parser.add_argument("--image", default="wallpaper.jpg")
+    args = parser.parse_args()
+
+    if args.backend == "none":
+        backend = RecordingBackend(delay=args.delay)
+    else:
+        backend = create_backend(args.backend, args.command)
+    queue = ApplyQueue(backend)
+
+    started = time.perf_counter()
+    for i in range(args.presses):
+        queue.submit(args.image if args.backend != "none" else f"wallpaper_{i}.jpg")
+        time.sleep(args.interval)
+    queue.wait_idle()
+    elapsed = time.perf_counter() - started
+
+    stats = queue.stats()
+    console.print(f"Бэкенд: [bold]{backend.name}[/bold]")
+    console.print(
+        f"Нажатий: {args.presses}, применено: {stats.applied}, "
+        f"пропущено устаревших: {stats.coalesced}, ошибок: {stats.failed}"
+    )
+    console.print(
+        f"Задержка установки: в среднем {stats.mean_latency * 1000:.1f} мс, "
+        f"максимум {stats.max_latency * 1000:.1f} мс"
+    )
+    console.print(f"Общее время: {elapsed:.2f} с")
+    if isinstance(backend, RecordingBackend) and backend.applied:
+        console.print(f"Последние обои: {backend.applied[-1]}")
+
+
+if __name__ == "__main__":
+    main()
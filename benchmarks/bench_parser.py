@@ -0,0 +1,110 @@
+"""Бенчмарк разбора HTML на сохраненных страницах сайта.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_parser.py [--repeat 50]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+import tracemalloc
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from rich.table import Table  # noqa: E402
+
+from config import console  # noqa: E402
+from utils.parser import (  # noqa: E402
+    FILTERS,
+    PAGER,
+    WALLPAPER,
+    WALLPAPER_INFO,
+    WALLPAPER_LINKS,
+    parse_html,
+)
+
+FIXTURES_DIR = path.join(path.dirname(path.abspath(__file__)), "fixtures")
+
+# Тип страницы: (файл, поддеревья для выборочного разбора, селектор как в коде)
+CASES = {
+    "home": ("home.html", FILTERS, ".filters .filters__list .filter__link"),
+    "category": ("category.html", PAGER, ".pager__item"),
+    "listing": ("listing.html", WALLPAPER_LINKS, ".wallpapers__link"),
+    "wallpaper": (
+        "wallpaper.html",
+        WALLPAPER_INFO,
+        ".wallpaper-info .wallpaper-table__row, .gui-toolbar .gui-button",
+    ),
+    "download": ("download.html", WALLPAPER, ".wallpaper .gui-toolbar div a"),
+}
+
+
+def available_parsers() -> list[str]:
+    parsers = ["html.parser"]
+    try:
+        import lxml  # noqa: F401
+
+        parsers.append("lxml")
+    except ImportError:
+        pass
+    return parsers
+
+
+def run_case(markup: str, selector: str, parser: str, only, repeat: int):
+    timings = []
+    found = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        found = len(parse_html(markup, only, parser).select(selector))
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    parse_html(markup, only, parser).select(selector)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings), peak, found
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--repeat", type=int, default=30)
+    args = arg_parser.parse_args()
+
+    table = Table(title="Разбор HTML")
+    table.add_column("Страница", style="bold cyan")
+    table.add_column("Парсер")
+    table.add_column("Режим")
+    table.add_column("Медиана, мс", justify="right")
+    table.add_column("Пик памяти, КБ", justify="right")
+    table.add_column("Ускорение", justify="right", style="green")
+    table.add_column("Найдено", justify="right", style="dim")
+
+    for name, (file_name, only, selector) in CASES.items():
+        with open(path.join(FIXTURES_DIR, file_name), "r", encoding="utf-8") as f:
+            markup = f.read()
+
+        baseline = None
+        for parser in available_parsers():
+            for mode, strainer in (("полный", None), ("выборочный", only)):
+                median, peak, found = run_case(
+                    markup, selector, parser, strainer, args.repeat
+                )
+                baseline = baseline or median
+                table.add_row(
+                    name,
+                    parser,
+                    mode,
+                    f"{median * 1000:.2f}",
+                    f"{peak / 1024:.0f}",
+                    f"x{baseline / median:.1f}",
+                    str(found),
+                )
+        table.add_section()
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Бенчмарк перцептивного хэша и индекса похожих обоев.
+
+Показывает время хэширования изображения и как время поиска и память
+индекса меняются с ростом числа хэшей.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_phash.py [--sizes 1000 10000 100000] [--lookups 2000]
+"""
+
+import argparse
+import io
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from rich.table import Table  # noqa: E402
+
+from config import console  # noqa: E402
+from utils.phash import PerceptualIndex, dhash  # noqa: E402
+
+
+def sample_jpeg(size: tuple[int, int]) -> bytes:
+    from PIL import Image
+
+    # Градиент с шумом: похож на фотографию и хорошо сжимается как JPEG
+    image = Image.linear_gradient("L").resize(size).convert("RGB")
+    image = Image.blend(image, Image.effect_noise(size, 40).convert("RGB"), 0.3)
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def bench_hash(repeat: int) -> Table:
+    table = Table(title="dhash")
+    table.add_column("Изображение", style="bold cyan")
+    table.add_column("КБ", justify="right")
+    table.add_column("медиана, мс", justify="right", style="yellow")
+    for size in ((300, 168), (1920, 1080), (3840, 2160)):
+        data = sample_jpeg(size)
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            dhash(data)
+            times.append(time.perf_counter() - started)
+        table.add_row(
+            f"{size[0]}x{size[1]}",
+            f"{len(data) / 1024:.0f}",
+            f"{statistics.median(times) * 1000:.2f}",
+        )
+    return table
+
+
+def bench_index(sizes: list[int], lookups: int) -> Table:
+    table = Table(title="Индекс: поиск похожих")
+    table.add_column("Хэшей", style="bold cyan", justify="right")
+    table.add_column("память, КБ", justify="right", style="magenta")
+    table.add_column("байт на хэш", justify="right")
+    table.add_column("загрузка, мс", justify="right")
+    table.add_column("поиск, мкс", justify="right", style="yellow")
+    table.add_column("найдено", justify="right")
+    rng = random.Random(0)
+    for size in sizes:
+        values = [rng.getrandbits(64) for _ in range(size)]
+        with tempfile.TemporaryDirectory() as tmp:
+            index_path = path.join(tmp, "index.json")
+            with open(index_path, "w") as f:
+                json.dump([f"{value:016x}" for value in values], f)
+            started = time.perf_counter()
+            len(PerceptualIndex(index_path))  # первое обращение читает файл
+            load = time.perf_counter() - started
+
+            index = PerceptualIndex(index_path)
+            tracemalloc.start()
+            len(index)
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+
+        # Половина запросов — известные хэши с двумя перевернутыми битами
+        queries = [
+            rng.choice(values) ^ (1 << rng.randrange(64)) ^ (1 << rng.randrange(64))
+            if i % 2
+            else rng.getrandbits(64)
+            for i in range(lookups)
+        ]
+        started = time.perf_counter()
+        found = sum(index.find(query) is not None for query in queries)
+        elapsed = time.perf_counter() - started
+        table.add_row(
+            str(size),
+            f"{memory / 1024:.0f}",
+            f"{memory / size:.0f}",
+            f"{load * 1000:.0f}",
+            f"{elapsed / lookups * 1_000_000:.1f}",
+            f"{found}/{lookups}",
+        )
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1000, 10_000, 50_000, 100_000]
+    )
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    console.print(bench_hash(args.repeat))
+    console.print(bench_index(args.sizes, args.lookups))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""Бенчмарк конвейера загрузки обоев на локальном сервере вместо сайта.
+
+Поднимает standin_server.py с заданной задержкой и скоростью, направляет
+на него программу через WALLSWAP_BASE_URL и замеряет получение категорий,
+поиск случайных обоев, получение прямой ссылки и полный цикл «следующие
+обои». Кэши ссылок и индекс страниц отключены, чтобы каждый прогон ходил
+в сеть; пул ссылок работает как в программе.
+
+Результаты сравниваются с файлом базовой линии: если медиана или пик
+памяти выросли больше допустимого, бенчмарк завершается с кодом 1.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_pipeline.py [--repeat 10] [--latency 20] [--bandwidth 4096]
+    python benchmarks/bench_pipeline.py --save-baseline
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from os import path
+
+BENCH_DIR = path.dirname(path.abspath(__file__))
+ROOT = path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+
+DEFAULT_BASELINE = path.join(BENCH_DIR, "baseline.json")
+# Допустимый рост медианы и пика памяти относительно базовой линии
+DEFAULT_TOLERANCE = 0.25
+RESOLUTION = "1920x1080"
+WALLPAPER_SLUG = "lake_mountains_trees_151520"
+
+
+def start_server(args: argparse.Namespace) -> tuple[subprocess.Popen, str]:
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            path.join(BENCH_DIR, "standin_server.py"),
+            "--port=0",
+            f"--latency={args.latency}",
+            f"--bandwidth={args.bandwidth}",
+            f"--image-kb={args.image_kb}",
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    return server, server.stdout.readline().strip()
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def measure(run, repeat: int) -> dict:
+    """Прогнать сценарий repeat раз: время, пик памяти и замеры этапов."""
+    from utils.metrics import metrics
+
+    run()  # прогрев: соединения, импорты парсера
+    metrics.reset()
+    times = []
+    peak = 0
+    tracemalloc.start()
+    for _ in range(repeat):
+        tracemalloc.reset_peak()
+        started = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - started)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+    stages = {stage.name: stage for stage in metrics.summary()}
+    downloaded = stages["download"].total_bytes if "download" in stages else 0
+    return {
+        "median": statistics.median(times),
+        "p95": percentile(times, 0.95),
+        "ops": repeat / sum(times),
+        "mb_s": downloaded / sum(times) / 1024 / 1024,
+        "peak_kb": peak / 1024,
+        "stages": {
+            name: {"count": s.count, "p50": s.p50, "p95": s.p95, "errors": s.errors}
+            for name, s in stages.items()
+        },
+    }
+
+
+def build_scenarios(base_url: str, work_dir: str) -> dict:
+    from config import console
+    from utils.categories import get_categories
+    from utils.metrics import metrics
+    from utils.page_index import page_index
+    from utils.url_cache import url_cache
+    from utils.wallpapers import (
+        download_wallpaper,
+        get_image_url,
+        get_random_wallpaper,
+    )
+
+    # Каждый прогон ходит за страницами и ссылками, а не берет их из кэша
+    page_index.ttl = 0
+    url_cache.ttl = 0
+    console.quiet = True
+
+    categories = get_categories()
+    if not categories:
+        raise SystemExit("Сервер не отдал категории")
+    category = categories[0]
+    page_url = f"{base_url}/wallpaper/{WALLPAPER_SLUG}"
+    save_path = path.join(work_dir, "wallpaper.jpg")
+
+    def next_wallpaper():
+        with metrics.span("next_wallpaper"):
+            image_url = get_random_wallpaper(
+                category.url, category.name, resolution=RESOLUTION
+            )
+            download_wallpaper(image_url, save_path, verbose=False)
+        os.remove(save_path)
+
+    return {
+        "get_categories": get_categories,
+        "get_random_wallpaper": lambda: get_random_wallpaper(
+            category.url, category.name
+        ),
+        "get_image_url (по слагу)": lambda: get_image_url(page_url, False, RESOLUTION),
+        "get_image_url (разбор)": lambda: get_image_url(page_url, False),
+        "next_wallpaper": next_wallpaper,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Сценарии, где медиана или пик памяти вышли за допуск."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        for key in ("median", "peak_kb"):
+            if result[key] > base[key] * (1 + tolerance):
+                regressions.append(
+                    f"{name}: {key} {result[key]:.4g} > {base[key]:.4g} "
+                    f"(+{(result[key] / base[key] - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def print_results(results: dict, regressions: list[str]):
+    from rich.table import Table
+
+    from config import console
+
+    console.quiet = False
+    table = Table(title="Сценарии целиком")
+    table.add_column("Сценарий", style="bold cyan")
+    table.add_column("медиана, мс", justify="right", style="yellow")
+    table.add_column("p95, мс", justify="right")
+    table.add_column("оп/с", justify="right")
+    table.add_column("МБ/с", justify="right")
+    table.add_column("пик памяти, КБ", justify="right", style="magenta")
+    for name, r in results.items():
+        table.add_row(
+            name,
+            f"{r['median'] * 1000:.1f}",
+            f"{r['p95'] * 1000:.1f}",
+            f"{r['ops']:.1f}",
+            f"{r['mb_s']:.1f}" if r["mb_s"] else "—",
+            f"{r['peak_kb']:.0f}",
+        )
+    console.print(table)
+
+    stages = Table(title="Этапы")
+    stages.add_column("Сценарий", style="bold cyan")
+    stages.add_column("Этап")
+    stages.add_column("кол-во", justify="right")
+    stages.add_column("p50, мс", justify="right", style="yellow")
+    stages.add_column("p95, мс", justify="right")
+    stages.add_column("ошибки", justify="right", style="red")
+    for name, r in results.items():
+        for stage, s in sorted(r["stages"].items()):
+            stages.add_row(
+                name,
+                stage,
+                str(s["count"]),
+                f"{s['p50'] * 1000:.1f}",
+                f"{s['p95'] * 1000:.1f}",
+                str(s["errors"]),
+            )
+            name = ""
+    console.print(stages)
+
+    for line in regressions:
+        console.print(f"[bold red]Регрессия:[/bold red] {line}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=20, help="задержка, мс")
+    parser.add_argument(
+        "--bandwidth", type=int, default=4096, help="скорость, КБ/с (0 — без ограничения)"
+    )
+    parser.add_argument("--image-kb", type=int, default=2048)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="записать результаты как базовые"
+    )
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    server, base_url = start_server(args)
+    work_dir = tempfile.mkdtemp(prefix="wallswap-bench-")
+    # До импорта config: программа берет адреса и папку настроек из окружения
+    os.environ["WALLSWAP_BASE_URL"] = base_url
+    os.environ["WALLSWAP_IMAGES_URL"] = f"{base_url}/image/single"
+    os.environ["WALLSWAP_CONFIG_DIR"] = work_dir
+    try:
+        scenarios = build_scenarios(base_url, work_dir)
+        results = {
+            name: measure(run, args.repeat) for name, run in scenarios.items()
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+    settings = {
+        "latency": args.latency,
+        "bandwidth": args.bandwidth,
+        "image_kb": args.image_kb,
+        "repeat": args.repeat,
+    }
+    regressions = []
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(
+                {"settings": settings, "scenarios": results},
+                f,
+                ensure_ascii=False,
+                indent=4,
+            )
+    elif path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("settings") != settings:
+            print("Настройки отличаются от базовой линии, сравнение пропущено")
+        else:
+            regressions = compare(results, baseline, args.tolerance)
+
+    print_results(results, regressions)
+    if args.save_baseline:
+        print(f"Базовая линия сохранена: {args.baseline}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Бенчмарк холодного запуска: время импорта и самые тяжелые модули.
+
+Каждый замер — отдельный процесс Python, поэтому учитывается и запуск
+интерпретатора. Результаты можно сохранить в JSON и сравнивать между релизами.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_startup.py [--repeat 10] [--top 10] [--json out.json]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from os import path
+
+ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from rich.table import Table  # noqa: E402
+
+from config import console  # noqa: E402
+
+# Что замеряем: название -> код для python -c
+CASES = {
+    "python (пустой)": "pass",
+    "--help": "import sys; sys.argv = ['main.py', '--help']; import main; main.main()",
+    "import wall_swapper": "import wall_swapper",
+}
+
+
+def run_once(code: str) -> float:
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - started
+
+
+def heaviest_imports(module: str, top: int) -> list[tuple[str, float]]:
+    """Модули верхнего уровня с наибольшим суммарным временем импорта (сек)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    imports = {}
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].rstrip()
+        # Только прямые импорты: на уровень (два пробела) глубже корня
+        if name.startswith("   ") and not name.startswith("     "):
+            imports[name.strip()] = int(parts[1]) / 1_000_000
+    return sorted(imports.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--json", help="сохранить результаты в файл")
+    args = parser.parse_args()
+
+    results = {"python": sys.version.split()[0], "cases": {}, "imports": {}}
+
+    table = Table(title=f"Запуск процесса, {args.repeat} повторов")
+    table.add_column("Сценарий", style="bold cyan")
+    table.add_column("медиана, мс", justify="right", style="yellow")
+    table.add_column("мин, мс", justify="right")
+    for name, code in CASES.items():
+        run_once(code)  # прогрев файлового кэша и .pyc
+        times = [run_once(code) for _ in range(args.repeat)]
+        results["cases"][name] = {
+            "median": statistics.median(times),
+            "min": min(times),
+        }
+        table.add_row(
+            name, f"{statistics.median(times) * 1000:.1f}", f"{min(times) * 1000:.1f}"
+        )
+    console.print(table)
+
+    imports = Table(title="Самые тяжелые импорты wall_swapper")
+    imports.add_column("Модуль", style="bold cyan")
+    imports.add_column("мс", justify="right", style="yellow")
+    for name, elapsed in heaviest_imports("wall_swapper", args.top):
+        results["imports"][name] = elapsed
+        imports.add_row(name, f"{elapsed * 1000:.1f}")
+    console.print(imports)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=4)
+        console.print(f"Результаты сохранены: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
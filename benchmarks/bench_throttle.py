@@ -0,0 +1,166 @@
+"""Бенчмарк ограничителя нагрузки на сайт под перегрузкой и во время сбоя.
+
+Локальный сервер пропускает не больше --capacity запросов одновременно,
+остальным отвечает 429 с Retry-After. Несколько потоков без пауз зовут
+fetch, как сбор обоев с большим --workers. Замеряется, сколько страниц
+в секунду удается получить по сравнению с нагрузкой, которую сервер
+держит без отказов, и сколько отказов доходит до вызывающего кода.
+
+Во втором сценарии сервер на --outage секунд отвечает 503 на все: видно,
+сколько запросов за это время все же уходит на сайт и как быстро
+загрузка восстанавливается после сбоя.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_throttle.py [--threads 16] [--capacity 4] [--latency 50]
+"""
+
+import argparse
+import sys
+import time
+from os import path
+from threading import Event, Lock, Thread
+
+BENCH_DIR = path.dirname(path.abspath(__file__))
+sys.path.insert(0, path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from rich.table import Table  # noqa: E402
+
+from config import console, logger  # noqa: E402
+from standin_server import StandInServer  # noqa: E402
+from utils.fetcher import configure_session, fetch  # noqa: E402
+from utils.throttle import throttle  # noqa: E402
+
+
+class Load:
+    """Потоки, которые без пауз запрашивают страницу, пока их не остановят."""
+
+    def __init__(self, url: str, threads: int):
+        self.url = url
+        self.threads = threads
+        self.ok = 0
+        self.failed = 0
+        self.first_ok_after: float | None = None
+        self._mark: float | None = None
+        self._lock = Lock()
+        self._stop = Event()
+        self._workers: list[Thread] = []
+
+    def start(self):
+        self._workers = [Thread(target=self._run) for _ in range(self.threads)]
+        for worker in self._workers:
+            worker.start()
+
+    def stop(self):
+        self._stop.set()
+        for worker in self._workers:
+            worker.join()
+
+    def mark(self):
+        """Засечь момент, после которого ждем первый успешный ответ."""
+        with self._lock:
+            self._mark = time.monotonic()
+            self.first_ok_after = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            response = fetch(self.url)
+            with self._lock:
+                if response is None:
+                    self.failed += 1
+                    continue
+                self.ok += 1
+                if self._mark is not None and self.first_ok_after is None:
+                    self.first_ok_after = time.monotonic() - self._mark
+            if response is None:
+                # Отказ приходит сразу: не крутим цикл вхолостую
+                self._stop.wait(0.05)
+
+
+def run_load(
+    server: StandInServer, threads: int, duration: float
+) -> tuple[float, int]:
+    """Страниц в секунду от threads потоков за duration секунд и число отказов."""
+    load = Load(f"{server.base_url}/all/page1", threads)
+    started = time.perf_counter()
+    load.start()
+    time.sleep(duration)
+    load.stop()
+    return load.ok / (time.perf_counter() - started), load.failed
+
+
+def overload(args: argparse.Namespace) -> Table:
+    server = StandInServer(
+        latency=args.latency / 1000, capacity=args.capacity, retry_after=1
+    )
+    Thread(target=server.serve_forever, daemon=True).start()
+    # Сколько сервер отдает, когда потоков ровно столько, сколько он держит
+    ceiling, _ = run_load(server, args.capacity, args.duration)
+    rejected = server.statuses[429]
+    rate, failed = run_load(server, args.threads, args.duration)
+    server.shutdown()
+    server.server_close()
+
+    table = Table(
+        title=f"Перегрузка: {args.threads} потоков, сервер держит {args.capacity}"
+    )
+    table.add_column("Показатель", style="bold cyan")
+    table.add_column("Значение", justify="right", style="yellow")
+    table.add_row("Страниц в секунду", f"{rate:.1f}")
+    table.add_row(f"Без перегрузки ({args.capacity} потоков)", f"{ceiling:.1f}")
+    table.add_row("Ответов 429 от сервера", str(server.statuses[429] - rejected))
+    table.add_row("Отказов вызывающему коду", str(failed))
+    table.add_row("Окно ограничителя в конце", str(throttle.state().limit))
+    return table
+
+
+def outage(args: argparse.Namespace) -> Table:
+    server = StandInServer(latency=args.latency / 1000)
+    Thread(target=server.serve_forever, daemon=True).start()
+    load = Load(f"{server.base_url}/all/page1", args.threads)
+    load.start()
+    time.sleep(1)
+    server.outage = True
+    before = server.statuses[503]
+    time.sleep(args.outage)
+    during = server.statuses[503] - before
+    server.outage = False
+    load.mark()
+    deadline = time.monotonic() + 60
+    while load.first_ok_after is None and time.monotonic() < deadline:
+        time.sleep(0.05)
+    load.stop()
+    server.shutdown()
+    server.server_close()
+
+    table = Table(title=f"Сбой сайта на {args.outage:g} с")
+    table.add_column("Показатель", style="bold cyan")
+    table.add_column("Значение", justify="right", style="yellow")
+    table.add_row("Запросов к сайту во время сбоя", str(during))
+    table.add_row("В секунду", f"{during / args.outage:.1f}")
+    table.add_row(
+        "Восстановление после сбоя",
+        f"{load.first_ok_after:.1f} с" if load.first_ok_after is not None else "нет",
+    )
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--capacity", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=50.0, help="задержка, мс")
+    parser.add_argument("--duration", type=float, default=10.0, help="с")
+    parser.add_argument("--outage", type=float, default=10.0, help="с")
+    args = parser.parse_args()
+
+    # Отказы здесь ожидаемы, каждый в логе только мешает читать итог
+    logger.setLevel("CRITICAL")
+    # Окно ограничителя растет не выше пула соединений
+    configure_session(pool_size=args.threads)
+    console.print(overload(args))
+    console.print(outage(args))
+
+
+if __name__ == "__main__":
+    main()
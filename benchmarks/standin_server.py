@@ -0,0 +1,216 @@
+"""Локальная замена wallpaperscraft.ru для бенчмарков без сети.
+
+Отдает сохраненные страницы из fixtures/ и изображения-заглушки. Задержку
+ответа и пропускную способность можно задать, чтобы приблизить условия
+к реальной сети. С --capacity запросы сверх стольких одновременных
+получают 429 с Retry-After, как у перегруженного сайта.
+
+Запуск из корня репозитория:
+    python benchmarks/standin_server.py [--port 8000] [--latency 50] [--bandwidth 2048]
+        [--capacity 4]
+
+Программа направляется на сервер переменными окружения:
+    WALLSWAP_BASE_URL=http://127.0.0.1:8000
+    WALLSWAP_IMAGES_URL=http://127.0.0.1:8000/image/single
+"""
+
+import argparse
+import os
+import re
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from os import path
+from threading import Lock
+
+FIXTURES_DIR = path.join(path.dirname(path.abspath(__file__)), "fixtures")
+# Абсолютные ссылки в сохраненных страницах, которые переписываем на сервер
+IMAGES_HOST = "https://images.wallpaperscraft.ru"
+SITE_HOST = "https://wallpaperscraft.ru"
+# Размер превью 300x168 на сайте — порядка 15 КБ
+PREVIEW_SIZE = 16 * 1024
+# Каким куском отдаем тело при ограничении скорости
+SEND_CHUNK = 16 * 1024
+
+# Путь запроса -> файл страницы
+ROUTES = (
+    (re.compile(r"^/$"), "home.html"),
+    (re.compile(r"^/(all|catalog/[^/]+)/page\d+$"), "listing.html"),
+    (re.compile(r"^/(all|catalog/[^/]+)$"), "category.html"),
+    (re.compile(r"^/wallpaper/[^/]+$"), "wallpaper.html"),
+    (re.compile(r"^/download/[^/]+/\d+x\d+$"), "download.html"),
+)
+IMAGE_PATH = re.compile(r"^/image/single/[^/]+\.jpg$")
+
+
+def load_pages(base_url: str) -> dict[str, bytes]:
+    pages = {}
+    for _, name in ROUTES:
+        with open(path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+            markup = f.read()
+        markup = markup.replace(IMAGES_HOST, base_url).replace(SITE_HOST, base_url)
+        pages[name] = markup.encode("utf-8")
+    return pages
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "StandInServer"
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def _respond(self, send_body: bool):
+        if not self.server.admit():
+            self._send_empty(503 if self.server.outage else 429)
+            return
+        try:
+            time.sleep(self.server.latency)
+            route = self.path.split("?", 1)[0]
+            body, content_type = self._resolve(route)
+        finally:
+            # Место освобождается до отправки: клиент может сразу слать следующий
+            self.server.leave()
+        if body is None:
+            self._send_empty(404)
+            return
+        self.server.count(200)
+        self._send_body(body, content_type, send_body)
+
+    def _send_empty(self, status: int):
+        self.server.count(status)
+        self.send_response(status)
+        if status == 429:
+            self.send_header("Retry-After", str(self.server.retry_after))
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _send_body(self, body: bytes, content_type: str, send_body: bool):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self._send(body)
+
+    def _resolve(self, route: str) -> tuple[bytes | None, str]:
+        if IMAGE_PATH.match(route):
+            if route.endswith("_300x168.jpg"):
+                return self.server.image[:PREVIEW_SIZE], "image/jpeg"
+            return self.server.image, "image/jpeg"
+        for pattern, name in ROUTES:
+            if pattern.match(route):
+                return self.server.pages[name], "text/html; charset=utf-8"
+        return None, ""
+
+    def _send(self, body: bytes):
+        if not self.server.bandwidth:
+            self.wfile.write(body)
+            return
+        for offset in range(0, len(body), SEND_CHUNK):
+            chunk = body[offset : offset + SEND_CHUNK]
+            self.wfile.write(chunk)
+            time.sleep(len(chunk) / self.server.bandwidth)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        port: int = 0,
+        latency: float = 0.0,
+        bandwidth: int = 0,
+        image_size: int = 2 * 1024 * 1024,
+        image_path: str | None = None,
+        capacity: int = 0,
+        retry_after: int = 1,
+    ):
+        super().__init__(("127.0.0.1", port), StandInHandler)
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.capacity = capacity
+        self.retry_after = retry_after
+        # Сайт «лежит»: на все запросы отвечает 503
+        self.outage = False
+        # Сколько ответов с каждым кодом отдано
+        self.statuses: Counter[int] = Counter()
+        self._lock = Lock()
+        self._active = 0
+        if image_path:
+            # Настоящий JPEG нужен, если изображение дальше декодируется
+            with open(image_path, "rb") as f:
+                self.image = f.read()
+        else:
+            # Случайные байты не сжимаются — как и настоящий JPEG
+            self.image = os.urandom(image_size)
+        self.pages = load_pages(self.base_url)
+
+    def admit(self) -> bool:
+        with self._lock:
+            if self.outage or (self.capacity and self._active >= self.capacity):
+                return False
+            self._active += 1
+            return True
+
+    def leave(self):
+        with self._lock:
+            self._active -= 1
+
+    def count(self, status: int):
+        with self._lock:
+            self.statuses[status] += 1
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8000, help="0 — любой свободный")
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка, мс")
+    parser.add_argument(
+        "--bandwidth", type=int, default=0, help="скорость, КБ/с (0 — без ограничения)"
+    )
+    parser.add_argument("--image-kb", type=int, default=2048, help="размер изображения")
+    parser.add_argument("--image", help="отдавать этот файл вместо случайных байтов")
+    parser.add_argument(
+        "--capacity",
+        type=int,
+        default=0,
+        help="одновременных запросов, сверх — 429 (0 — без ограничения)",
+    )
+    parser.add_argument(
+        "--retry-after", type=int, default=1, help="Retry-After в ответе 429, с"
+    )
+    args = parser.parse_args()
+
+    server = StandInServer(
+        args.port,
+        args.latency / 1000,
+        args.bandwidth * 1024,
+        args.image_kb * 1024,
+        args.image,
+        args.capacity,
+        args.retry_after,
+    )
+    # Первая строка — адрес, по ней бенчмарк узнает выбранный порт
+    print(server.base_url, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 import logging
-from os import path
+from os import environ, path
 from rich.console import Console
 from rich.logging import RichHandler
 from appdirs import user_config_dir
@@ -17,10 +17,28 @@ logger = logging.getLogger(__name__)
 APP_NAME = "WallSwap UV"
 APP_AUTHOR = "Vartec"
 
-config_dir = user_config_dir(APP_NAME, APP_AUTHOR)
+# Адреса сайта и папку настроек можно подменить, например для бенчмарков
+# с локальным сервером: WALLSWAP_BASE_URL=http://127.0.0.1:8000
+BASE_URL = environ.get("WALLSWAP_BASE_URL", "https://wallpaperscraft.ru").rstrip("/")
+IMAGES_URL = environ.get(
+    "WALLSWAP_IMAGES_URL", "https://images.wallpaperscraft.ru/image/single"
+).rstrip("/")
+
+config_dir = environ.get("WALLSWAP_CONFIG_DIR") or user_config_dir(
+    APP_NAME, APP_AUTHOR
+)
 config_file = path.join(config_dir, "config.json")
 cache_dir = path.join(config_dir, "Cache")
 history_file = path.join(config_dir, "history.json")
+history_db_file = path.join(config_dir, "history.db")
+page_index_file = path.join(config_dir, "page_index.json")
+link_pool_file = path.join(config_dir, "link_pool.json")
+image_url_cache_file = path.join(config_dir, "image_urls.json")
+blob_index_file = path.join(config_dir, "blobs.json")
+categories_file = path.join(config_dir, "categories.json")
+profile_file = path.join(config_dir, "hot_path.prof")
+phash_index_file = path.join(config_dir, "phash_index.json")
+harvest_state_file = path.join(config_dir, "harvest.json")
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
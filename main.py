@@ -1,24 +1,57 @@
 import sys
-from os import makedirs
+from multiprocessing import freeze_support
 
-from utils.clear_cmd import clear_cmd
-from config import console, logger, config_dir, cache_dir
-from utils.config_manager import ConfigManager
-from utils.history_manager import WallpaperHistoryManager
-from wall_swapper import WallSwapper
+from utils.cli import build_schedule, parse_args
+from utils.startup import StartupProfile
 
 
 def main():
-    clear_cmd()
+    profile = StartupProfile()
+    args = parse_args(sys.argv[1:])
+
+    # Тяжелые модули грузим после разбора аргументов: --help и ошибки в
+    # аргументах отвечают сразу, а время импорта попадает в профиль запуска
+    from os import makedirs
+
+    from config import BASE_URL, cache_dir, config_dir, console, logger
+    from utils.clear_cmd import clear_cmd
+    from utils.fetcher import warm_up
+
+    # Соединение с сайтом открывается, пока читаются настройки и история
+    warm_up(f"{BASE_URL}/")
+    if not args.daemon and not args.harvest and not args.export_history:
+        clear_cmd()
+
+    from utils.config_manager import ConfigManager
+    from utils.history_manager import WallpaperHistoryManager
+    from wall_swapper import WallSwapper
+
+    profile.mark("Импорт модулей")
     makedirs(config_dir, exist_ok=True)
     makedirs(cache_dir, exist_ok=True)
     config_manager_instance = ConfigManager()
+    profile.mark("Загрузка настроек")
     history_manager_instance = WallpaperHistoryManager(config_manager_instance)
+    profile.mark("Загрузка истории")
+    if args.export_history:
+        if not history_manager_instance.export_json(args.export_history):
+            sys.exit(1)
+        console.print(
+            f"[bold green]✅ История выгружена: {args.export_history}[/bold green]"
+        )
+        return
     wall_swapper = WallSwapper(
-        sys.argv[1:], config_manager_instance, history_manager_instance
+        args, config_manager_instance, history_manager_instance, profile
     )
     try:
-        wall_swapper.run()
+        if args.daemon:
+            wall_swapper.run_daemon(build_schedule(args), args.prefetch_lead)
+        elif args.harvest:
+            wall_swapper.run_harvest(
+                args.harvest, args.categories, args.workers, args.rate, args.restart
+            )
+        else:
+            wall_swapper.run()
     except KeyboardInterrupt:
         console.print("\n")
         logger.error("Прерывание программы пользователем")
@@ -26,4 +59,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Нужно для пула процессов в собранном PyInstaller exe
+    freeze_support()
     main()
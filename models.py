@@ -12,3 +12,26 @@ class WallpaperHistory:
     url: str
     local_path: str
     category: str
+    sha256: str = ""
+
+    @property
+    def urls(self) -> list[str]:
+        """Обои для нескольких мониторов хранятся одной записью, ссылки через пробел."""
+        return self.url.split(" ")
+
+    @property
+    def spanned(self) -> bool:
+        return len(self.urls) > 1
+
+
+@dataclass
+class DownloadStats:
+    size: int
+    elapsed: float
+    resumed_from: int = 0
+    sha256: str = ""
+
+    @property
+    def speed(self) -> float:
+        """Скорость загрузки в байтах в секунду (без докачанной части)."""
+        return (self.size - self.resumed_from) / self.elapsed if self.elapsed else 0.0
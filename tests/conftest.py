@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+from os import path
+
+# Модули читают папку настроек при импорте: тесты не трогают настоящую
+os.environ.setdefault(
+    "WALLSWAP_CONFIG_DIR", tempfile.mkdtemp(prefix="wallswap-tests-")
+)
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
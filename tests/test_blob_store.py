@@ -0,0 +1,182 @@
+import os
+import time
+
+import pytest
+
+from utils import blob_store as blob_store_module
+from utils.blob_store import ORPHAN_MIN_AGE, SAVE_EVERY, BlobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BlobStore(str(tmp_path), str(tmp_path / "blobs.json"), max_bytes=250)
+
+
+def download(store: BlobStore, size: int) -> str:
+    """Файл, как будто только что скачанный во временное имя кэша."""
+    file_path = os.path.join(store.root, f"wallpaper_{os.urandom(4).hex()}.jpg")
+    with open(file_path, "wb") as f:
+        f.write(b"x" * size)
+    return file_path
+
+
+def test_add_moves_file_and_counts_size(store):
+    blob_path = store.add(download(store, 100), "aa")
+    assert blob_path == os.path.join(store.root, "aa.jpg")
+    assert os.path.getsize(blob_path) == 100
+    assert store.path_for("aa") == blob_path
+    assert store.total_bytes() == 100
+
+
+def test_same_digest_stored_once(store):
+    store.add(download(store, 100), "aa")
+    store.add(download(store, 100), "aa")
+    assert store.total_bytes() == 100
+
+
+def test_readd_after_file_vanished(store):
+    os.remove(store.add(download(store, 100), "aa"))
+    store.add(download(store, 120), "aa")
+    assert store.total_bytes() == 120
+
+
+def test_variants_count_toward_entry(store):
+    store.add(download(store, 50), "aa")
+    with open(os.path.join(store.root, "aa_fit.jpg"), "wb") as f:
+        f.write(b"x" * 30)
+    store.add_variant("aa", "aa_fit.jpg")
+    store.add_variant("aa", "aa_fit.jpg")
+    assert store.total_bytes() == 80
+
+
+def test_eviction_over_budget_keeps_newest(store):
+    for digest in ("aa", "bb", "cc"):
+        store.add(download(store, 100), digest)
+    assert store.path_for("aa") is None
+    assert store.total_bytes() == 200
+    # Использованный недавно файл вытесняется последним
+    store.touch("bb")
+    store.add(download(store, 100), "dd")
+    assert store.path_for("cc") is None
+    assert store.path_for("bb") is not None
+
+
+def test_pinned_survives_eviction(store):
+    store.add(download(store, 100), "aa")
+    store.pin("aa")
+    store.add(download(store, 100), "bb")
+    store.add(download(store, 100), "cc")
+    assert store.path_for("aa") is not None
+    assert store.path_for("bb") is None
+
+
+def test_discard_and_clear(store):
+    store.add(download(store, 100), "aa", tentative=True)
+    store.add(download(store, 100), "bb")
+    store.discard("aa")
+    store.discard("bb")
+    assert store.total_bytes() == 100
+    store.clear()
+    assert store.total_bytes() == 0
+
+
+def test_discard_spares_blob_shared_with_history(store):
+    history_path = store.add(download(store, 100), "aa")
+    # Предзагрузка скачала те же байты под другой ссылкой
+    store.pin("aa")
+    assert store.add(download(store, 100), "aa", tentative=True) == history_path
+    store.unpin("aa")
+    store.discard("aa")
+    assert store.path_for("aa") == history_path
+
+
+def test_discard_spares_blob_added_again(store):
+    store.add(download(store, 100), "aa", tentative=True)
+    store.add(download(store, 100), "aa")
+    store.discard("aa")
+    assert store.path_for("aa") is not None
+
+
+def test_kept_blob_not_discarded(store):
+    store.add(download(store, 100), "aa", tentative=True)
+    store.keep("aa")
+    store.discard("aa")
+    assert store.path_for("aa") is not None
+
+
+def test_index_written_in_batches(tmp_path, monkeypatch):
+    saved = []
+    monkeypatch.setattr(
+        blob_store_module, "save_json_atomic", lambda path, data: saved.append(data)
+    )
+    store = BlobStore(str(tmp_path), str(tmp_path / "blobs.json"), max_bytes=10**6)
+    for i in range(SAVE_EVERY - 1):
+        store.add(download(store, 10), f"{i:02x}")
+    assert not saved
+    store.touch("00")
+    assert len(saved) == 1
+    store.save()
+    assert len(saved[-1]) == SAVE_EVERY - 1
+
+
+def test_eviction_writes_index_at_once(tmp_path, monkeypatch):
+    saved = []
+    monkeypatch.setattr(
+        blob_store_module, "save_json_atomic", lambda path, data: saved.append(data)
+    )
+    store = BlobStore(str(tmp_path), str(tmp_path / "blobs.json"), max_bytes=150)
+    store.add(download(store, 100), "aa")
+    assert not saved
+    store.add(download(store, 100), "bb")
+    assert list(saved[-1]) == ["bb"]
+
+
+def wait_deleted(*file_paths: str):
+    """Удаление идет в фоновом потоке: ждем, пока файлы пропадут."""
+    deadline = time.monotonic() + 5
+    while any(map(os.path.exists, file_paths)) and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def age(file_path: str, seconds: float = ORPHAN_MIN_AGE + 1):
+    when = time.time() - seconds
+    os.utime(file_path, (when, when))
+
+
+def test_cleanup_adopts_blobs_missing_from_index(tmp_path):
+    index_path = str(tmp_path / "blobs.json")
+    store = BlobStore(str(tmp_path), index_path)
+    paths = [store.add(download(store, 100), digest) for digest in ("aa", "bb")]
+    # Аварийный выход: индекс на диск так и не записан
+    for file_path in paths:
+        age(file_path)
+    stray = download(store, 10)
+    age(stray)
+    restarted = BlobStore(str(tmp_path), index_path)
+    restarted._cleanup_orphans(set, lambda digest: digest == "aa")
+    assert restarted.path_for("aa") == paths[0]
+    assert restarted.total_bytes() == 100
+    wait_deleted(paths[1], stray)
+    assert os.path.exists(paths[0])
+    assert not os.path.exists(paths[1])
+    assert not os.path.exists(stray)
+
+
+def test_cleanup_keeps_legacy_and_fresh_files(tmp_path):
+    store = BlobStore(str(tmp_path), str(tmp_path / "blobs.json"))
+    legacy, fresh, stray = (download(store, 10) for _ in range(3))
+    age(legacy)
+    age(stray)
+    store._cleanup_orphans(lambda: {legacy}, lambda digest: False)
+    wait_deleted(stray)
+    assert not os.path.exists(stray)
+    assert os.path.exists(legacy)
+    assert os.path.exists(fresh)
+
+
+def test_index_reloaded(tmp_path):
+    index_path = str(tmp_path / "blobs.json")
+    store = BlobStore(str(tmp_path), index_path)
+    store.add(download(store, 100), "aa")
+    store.save()
+    assert BlobStore(str(tmp_path), index_path).total_bytes() == 100
@@ -0,0 +1,95 @@
+import pytest
+
+from models import WallpaperHistory
+from utils.history_store import WINDOW, HistoryStore
+
+
+def entry(i: int) -> WallpaperHistory:
+    return WallpaperHistory(
+        f"https://example.com/{i}", f"/cache/{i}.jpg", "c", f"{i:x}"
+    )
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "history.db")
+
+
+@pytest.fixture
+def store(db_path):
+    store = HistoryStore(db_path)
+    yield store
+    store.close()
+
+
+def test_empty(store):
+    assert store.count() == 0
+    with pytest.raises(IndexError):
+        store.get(0)
+
+
+def test_get_across_windows(store):
+    total = WINDOW * 3 + 10
+    for i in range(total):
+        store.append(entry(i), max_items=10_000)
+    store._window.clear()
+    for i in (0, WINDOW - 1, WINDOW, total // 2, total - 1):
+        assert store.get(i) == entry(i)
+    with pytest.raises(IndexError):
+        store.get(total)
+
+
+def test_window_stays_bounded(store):
+    total = WINDOW * 8
+    for i in range(total):
+        store.append(entry(i), max_items=10_000)
+    store._window.clear()
+    for i in range(0, total, WINDOW // 2):
+        store.get(i)
+    assert len(store._window) <= WINDOW * 5
+
+
+def test_append_trims_head(store):
+    evicted = []
+    for i in range(10):
+        evicted += store.append(entry(i), max_items=4)
+    assert store.count() == 4
+    assert store.get(0) == entry(6)
+    assert evicted == [entry(i) for i in range(6)]
+
+
+def test_duplicate_url_ignored(store):
+    assert store.append(entry(1), max_items=10) == []
+    assert store.append(entry(1), max_items=10) is None
+    assert store.count() == 1
+    assert store.contains(entry(1).url)
+
+
+def test_import_skips_duplicates(store):
+    store.append(entry(0), max_items=10)
+    store.import_entries([entry(0), entry(1), entry(1), entry(2)])
+    assert [store.get(i) for i in range(store.count())] == [
+        entry(0),
+        entry(1),
+        entry(2),
+    ]
+
+
+def test_reopen_keeps_positions(db_path):
+    store = HistoryStore(db_path)
+    for i in range(10):
+        store.append(entry(i), max_items=5)
+    store.close()
+    reopened = HistoryStore(db_path)
+    assert reopened.count() == 5
+    assert reopened.get(0) == entry(5)
+    assert list(reopened.iter_entries()) == [entry(i) for i in range(5, 10)]
+    reopened.close()
+
+
+def test_clear_returns_legacy_entries(store):
+    store.append(entry(1), max_items=10)
+    legacy = WallpaperHistory("https://example.com/old", "/old.jpg", "c")
+    store.append(legacy, max_items=10)
+    assert store.clear() == [legacy]
+    assert store.count() == 0
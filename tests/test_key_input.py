@@ -0,0 +1,75 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from utils.key_input import REPEAT_GAP, KeyInput
+
+
+@pytest.fixture
+def key_input():
+    key_input = KeyInput({"right": "next", "left": "previous"})
+    # Хук keyboard в тестах не ставим: события подаем напрямую
+    key_input._hooked = True
+    return key_input
+
+
+def press(key_input: KeyInput, name: str, at: float, event_type: str = "down"):
+    key_input._on_event(SimpleNamespace(name=name, event_type=event_type, time=at))
+
+
+def test_mapped_key_dispatched(key_input):
+    press(key_input, "right", time.time())
+    assert key_input.get(timeout=0) == "next"
+    assert key_input.get(timeout=0) is None
+
+
+def test_unmapped_key_ignored(key_input):
+    press(key_input, "x", time.time())
+    assert key_input.get(timeout=0) is None
+
+
+def test_auto_repeat_dropped(key_input):
+    now = time.time()
+    press(key_input, "right", now)
+    press(key_input, "right", now + REPEAT_GAP / 2)
+    press(key_input, "right", now + REPEAT_GAP * 0.9)
+    assert key_input.get(timeout=0) == "next"
+    assert key_input.get(timeout=0) is None
+
+
+def test_key_up_rearms(key_input):
+    now = time.time()
+    press(key_input, "right", now)
+    press(key_input, "right", now + 0.05, "up")
+    press(key_input, "right", now + 0.1)
+    assert key_input.get(timeout=0) == "next"
+    assert key_input.get(timeout=0) == "next"
+
+
+def test_lost_key_up_treated_as_new_press(key_input):
+    now = time.time()
+    press(key_input, "left", now)
+    press(key_input, "left", now + REPEAT_GAP * 2)
+    assert key_input.get(timeout=0) == "previous"
+    assert key_input.get(timeout=0) == "previous"
+
+
+def test_suspended_ignores_and_clears(key_input):
+    now = time.time()
+    press(key_input, "right", now)
+    with key_input.suspended():
+        press(key_input, "left", now + 0.1)
+    # Нажатое до подсказки тоже сбрасывается, чтобы не сработать после нее
+    assert key_input.get(timeout=0) is None
+    press(key_input, "left", now + 0.2, "up")
+    press(key_input, "left", now + 0.3)
+    assert key_input.get(timeout=0) == "previous"
+
+
+def test_latency_recorded(key_input):
+    assert key_input.latency() == (0.0, 0.0)
+    press(key_input, "right", time.time() - 0.2)
+    key_input.get(timeout=0)
+    mean, worst = key_input.latency()
+    assert mean == worst >= 0.2
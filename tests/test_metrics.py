@@ -0,0 +1,24 @@
+import os
+import tracemalloc
+
+from utils.metrics import HotPathProfiler
+
+
+def test_profiler_saves_on_demand_and_stops_tracing(tmp_path):
+    profiler = HotPathProfiler(str(tmp_path / "hot_path.prof"))
+    with profiler:
+        pass
+    assert not tracemalloc.is_tracing()
+
+    profiler.set_enabled(True)
+    with profiler:
+        sum(range(1000))
+    assert tracemalloc.is_tracing()
+    # Профиль не переписывается на каждое нажатие
+    assert not os.path.exists(profiler.output_path)
+    assert profiler.report()
+
+    profiler.set_enabled(False)
+    assert not tracemalloc.is_tracing()
+    assert os.path.exists(profiler.output_path)
+    assert profiler.report() == ""
@@ -0,0 +1,72 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.phash import BAND_BITS, MERGE_EVERY, PerceptualIndex
+
+
+@pytest.fixture
+def index(tmp_path):
+    return PerceptualIndex(str(tmp_path / "phash_index.json"))
+
+
+def flip(value: int, *bits: int) -> int:
+    for bit in bits:
+        value ^= 1 << bit
+    return value
+
+
+def random_hashes(count: int) -> list[int]:
+    rng = random.Random(42)
+    return [rng.getrandbits(64) for _ in range(count)]
+
+
+def test_add_rejects_near_duplicate(index):
+    value = 0x0123_4567_89AB_CDEF
+    assert index.add(value)
+    assert not index.add(value)
+    assert not index.add(flip(value, 0, 20, 40))
+    assert index.add(flip(value, 0, 20, 40, 60))
+    assert len(index) == 2
+
+
+def test_find_in_merged_bands(index):
+    hashes = random_hashes(MERGE_EVERY * 3)
+    for value in hashes:
+        assert index.add(value)
+    # Хэши разложены по полосам, а не только в хвосте для перебора
+    assert index._merged >= MERGE_EVERY
+    target = hashes[5]
+    # Отличия в трех полосах из четырех: совпадает только последняя
+    near = flip(target, 0, BAND_BITS, 2 * BAND_BITS)
+    assert index.find(near) == target
+    assert index.find(flip(near, 3 * BAND_BITS)) is None
+
+
+def test_find_returns_closest(index):
+    value = 0
+    index.add(value)
+    index.add(flip(value, 0, 1, 2, 3, 4, 5, 6, 7))
+    assert index.find(flip(value, 1)) == value
+
+
+def test_concurrent_add_of_similar_hashes(index):
+    value = 0xFFFF_0000_FFFF_0000
+    similar = [flip(value, bit) for bit in range(16)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        added = list(executor.map(index.add, similar))
+    assert added.count(True) == 1
+    assert len(index) == 1
+
+
+def test_saved_and_reloaded(tmp_path):
+    file_path = str(tmp_path / "phash_index.json")
+    index = PerceptualIndex(file_path)
+    hashes = random_hashes(MERGE_EVERY + 5)
+    for value in hashes:
+        index.add(value)
+    index.shutdown()
+    reloaded = PerceptualIndex(file_path)
+    assert len(reloaded) == len(hashes)
+    assert reloaded.find(flip(hashes[-1], 1)) == hashes[-1]
@@ -0,0 +1,107 @@
+from datetime import datetime
+
+import pytest
+
+from utils.cli import parse_args
+from utils.schedule import CronSchedule, IntervalSchedule, parse_interval
+
+
+@pytest.mark.parametrize(
+    "value, seconds",
+    [
+        ("90", 90),
+        ("30s", 30),
+        ("15m", 900),
+        ("2h", 7200),
+        ("1d", 86400),
+        ("1.5m", 90),
+    ],
+)
+def test_parse_interval(value, seconds):
+    assert parse_interval(value) == seconds
+
+
+@pytest.mark.parametrize("value", ["", "0", "5x", "-1m"])
+def test_parse_interval_rejects(value):
+    with pytest.raises(ValueError):
+        parse_interval(value)
+
+
+def test_interval_schedule():
+    start = datetime(2024, 1, 1, 12, 0)
+    assert IntervalSchedule(90).next_after(start) == datetime(2024, 1, 1, 12, 1, 30)
+
+
+def test_every_minute_is_strictly_later():
+    start = datetime(2024, 1, 1, 12, 0, 30)
+    assert CronSchedule("* * * * *").next_after(start) == datetime(2024, 1, 1, 12, 1)
+
+
+def test_steps_and_ranges():
+    schedule = CronSchedule("*/15 9-17 * * *")
+    assert schedule.next_after(datetime(2024, 1, 1, 9, 50)) == datetime(
+        2024, 1, 1, 10, 0
+    )
+    # После конца рабочего дня — следующий день с 9:00
+    assert schedule.next_after(datetime(2024, 1, 1, 17, 45)) == datetime(
+        2024, 1, 2, 9, 0
+    )
+
+
+def test_weekdays_skip_weekend():
+    schedule = CronSchedule("0 9 * * 1-5")
+    # 2024-01-05 — пятница
+    assert schedule.next_after(datetime(2024, 1, 5, 10, 0)) == datetime(
+        2024, 1, 8, 9, 0
+    )
+
+
+def test_sunday_as_zero_or_seven():
+    # 2024-01-07 — воскресенье
+    for expression in ("0 0 * * 0", "0 0 * * 7"):
+        assert CronSchedule(expression).next_after(
+            datetime(2024, 1, 1)
+        ) == datetime(2024, 1, 7)
+
+
+def test_day_of_month_or_weekday():
+    # Заданы оба поля: подходит 13-е число или любая пятница
+    schedule = CronSchedule("0 0 13 * 5")
+    assert schedule.next_after(datetime(2024, 1, 1)) == datetime(2024, 1, 5)
+    assert schedule.next_after(datetime(2024, 1, 12, 1)) == datetime(2024, 1, 13)
+
+
+def test_month_rollover_into_next_year():
+    schedule = CronSchedule("30 6 1 2 *")
+    assert schedule.next_after(datetime(2024, 3, 1)) == datetime(2025, 2, 1, 6, 30)
+
+
+def test_leap_day():
+    assert CronSchedule("0 0 29 2 *").next_after(datetime(2024, 3, 1)) == datetime(
+        2028, 2, 29
+    )
+
+
+@pytest.mark.parametrize(
+    "expression",
+    ["* * * *", "60 * * * *", "* 24 * * *", "5-1 * * * *", "*/0 * * * *", "a * * * *"],
+)
+def test_invalid_expression(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression)
+
+
+def test_never_fires():
+    with pytest.raises(ValueError):
+        CronSchedule("0 0 31 2 *").next_after(datetime(2024, 1, 1))
+
+
+def test_cli_rejects_schedule_that_never_fires(capsys):
+    with pytest.raises(SystemExit):
+        parse_args(["--daemon", "-s", "0 0 30 2 *"])
+    assert "никогда не срабатывает" in capsys.readouterr().err
+
+
+def test_cli_accepts_schedule():
+    args = parse_args(["--daemon", "-s", "0 9-18 * * 1-5"])
+    assert isinstance(args.schedule, CronSchedule)
@@ -0,0 +1,135 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from utils import throttle as throttle_module
+from utils.throttle import (
+    COOLDOWN,
+    FAILURE_THRESHOLD,
+    INITIAL_LIMIT,
+    AdaptiveThrottle,
+    parse_retry_after,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Подменные часы ограничителя: время идет только по now["t"] += ..."""
+    now = {"t": 1000.0}
+    monkeypatch.setattr(
+        throttle_module,
+        "time",
+        SimpleNamespace(monotonic=lambda: now["t"], time=time.time),
+    )
+    return now
+
+
+def fail(throttle: AdaptiveThrottle, status: int = 503) -> float | None:
+    assert throttle.acquire(timeout=0)
+    return throttle.release(status, "0")
+
+
+def test_additive_increase():
+    throttle = AdaptiveThrottle(max_limit=10)
+    assert throttle.limit == INITIAL_LIMIT
+    for _ in range(INITIAL_LIMIT):
+        assert throttle.acquire(timeout=0)
+        throttle.release(200)
+    # За окно успешных ответов окно растет примерно на единицу
+    assert INITIAL_LIMIT + 0.8 < throttle.limit < INITIAL_LIMIT + 1
+
+
+def test_increase_capped_by_max_limit():
+    throttle = AdaptiveThrottle(max_limit=2)
+    for _ in range(50):
+        assert throttle.acquire(timeout=0)
+        throttle.release(200)
+    assert throttle.limit == 2
+
+
+def test_multiplicative_decrease_once_per_window():
+    throttle = AdaptiveThrottle(max_limit=10)
+    for _ in range(4):
+        assert throttle.acquire(timeout=0)
+    assert throttle.release(429, "2") == 2.0
+    assert throttle.limit == INITIAL_LIMIT / 2
+    # Ответы на запросы, отправленные до уменьшения, окно второй раз не режут
+    for _ in range(3):
+        assert throttle.release(429, "1") == 1.0
+    assert throttle.limit == INITIAL_LIMIT / 2
+
+
+def test_window_limits_in_flight():
+    throttle = AdaptiveThrottle(max_limit=10)
+    for _ in range(INITIAL_LIMIT):
+        assert throttle.acquire(timeout=0)
+    assert not throttle.acquire(timeout=0)
+    throttle.release(200)
+    assert throttle.acquire(timeout=0)
+
+
+def test_network_error_is_not_retried():
+    throttle = AdaptiveThrottle()
+    assert throttle.acquire(timeout=0)
+    assert throttle.release(None) is None
+    assert throttle.limit == INITIAL_LIMIT / 2
+
+
+def test_circuit_opens_after_threshold(clock):
+    throttle = AdaptiveThrottle()
+    for _ in range(FAILURE_THRESHOLD):
+        fail(throttle)
+    assert throttle.state().open_for == COOLDOWN
+    assert not throttle.acquire(timeout=0)
+    assert throttle.try_acquire(clock["t"] + 60) is None
+
+
+def test_half_open_trial_success_closes(clock):
+    throttle = AdaptiveThrottle()
+    for _ in range(FAILURE_THRESHOLD):
+        fail(throttle)
+    clock["t"] += COOLDOWN
+    assert throttle.try_acquire(clock["t"] + 1) == 0
+    # Пока идет пробный запрос, остальные получают отказ
+    assert throttle.try_acquire(clock["t"] + 1) is None
+    throttle.release(200)
+    assert throttle.state().open_for == 0
+    assert throttle.acquire(timeout=0)
+
+
+def test_half_open_trial_failure_doubles_cooldown(clock):
+    throttle = AdaptiveThrottle()
+    for _ in range(FAILURE_THRESHOLD):
+        fail(throttle)
+    clock["t"] += COOLDOWN
+    fail(throttle)
+    assert throttle.state().open_for == COOLDOWN * 2
+
+
+def test_cancelled_trial_lets_next_request_through(clock):
+    throttle = AdaptiveThrottle()
+    for _ in range(FAILURE_THRESHOLD):
+        fail(throttle)
+    clock["t"] += COOLDOWN
+    assert throttle.acquire(timeout=0)
+    throttle.cancel()
+    assert throttle.acquire(timeout=0)
+
+
+def test_rate_spaces_request_starts(clock):
+    throttle = AdaptiveThrottle()
+    throttle.set_rate(10)
+    assert throttle.try_acquire(clock["t"] + 1) == 0
+    assert throttle.try_acquire(clock["t"] + 1) == pytest.approx(0.1)
+    clock["t"] += 0.1
+    assert throttle.try_acquire(clock["t"] + 1) == 0
+    throttle.set_rate(0)
+    assert throttle.try_acquire(clock["t"] + 1) == 0
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("5") == 5.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
@@ -0,0 +1,27 @@
+import pytest
+
+from utils.transfer import check_received, expected_size, range_headers
+
+
+def test_expected_size_adds_offset():
+    assert expected_size({"content-length": "100"}, 50) == 150
+
+
+def test_expected_size_unknown_when_compressed():
+    headers = {"content-length": "100", "content-encoding": "gzip"}
+    assert expected_size(headers, 0) is None
+    assert expected_size({}, 0) is None
+
+
+def test_check_received():
+    check_received(150, 150)
+    check_received(10, None)
+    with pytest.raises(IOError):
+        check_received(100, 150)
+    with pytest.raises(IOError):
+        check_received(0, None)
+
+
+def test_range_headers():
+    assert range_headers(0) is None
+    assert range_headers(10) == {"Range": "bytes=10-"}
@@ -0,0 +1,36 @@
+from utils.wallpapers import pick_resolution, preview_url
+
+RESOLUTIONS = {
+    (1280, 720): "/download/a/1280x720",
+    (1920, 1080): "/download/a/1920x1080",
+    (2560, 1440): "/download/a/2560x1440",
+    (1080, 1920): "/download/a/1080x1920",
+}
+
+
+def test_exact_match():
+    assert pick_resolution(RESOLUTIONS, (1920, 1080)) == "/download/a/1920x1080"
+
+
+def test_smallest_covering():
+    assert pick_resolution(RESOLUTIONS, (1600, 900)) == "/download/a/1920x1080"
+
+
+def test_covering_needs_both_sides():
+    assert pick_resolution(RESOLUTIONS, (1080, 1800)) == "/download/a/1080x1920"
+
+
+def test_largest_when_nothing_covers():
+    assert pick_resolution(RESOLUTIONS, (3840, 2160)) == "/download/a/2560x1440"
+
+
+def test_no_resolutions():
+    assert pick_resolution({}, (1920, 1080)) is None
+
+
+def test_preview_url():
+    assert (
+        preview_url("https://images.example.com/image/single/cat_1920x1080.jpg")
+        == "https://images.example.com/image/single/cat_300x168.jpg"
+    )
+    assert preview_url("https://images.example.com/image/single/cat.jpg") is None
@@ -1,10 +1,12 @@
-import time
-import keyboard
 from rich.panel import Panel
+from rich.table import Table
 from config import console
 from models import WallpaperHistory
 from enum import Enum
 
+from utils.key_input import KeyInput
+from utils.metrics import StageStats
+
 
 class ActionKey(Enum):
     NEXT = "next"
@@ -15,6 +17,7 @@ class ActionKey(Enum):
     INFO = "info"
     DELETE_HISTORY = "delete_history"
     HELP = "help"
+    STATS = "stats"
     CONFIG_EDIT = "config_edit"
 
 
@@ -32,7 +35,7 @@ options = {
     },
     "shift": {
         "name": "shift",
-        "alias": ["right_shift", "left_shift"],
+        "alias": ["right shift", "left shift"],
         "action": ActionKey.NEXT_HISTORY,
         "description": "Перейти к следующим обоям",
     },
@@ -61,8 +64,26 @@ options = {
         "action": ActionKey.CONFIG_EDIT,
         "description": "Отредактировать конфигурацию",
     },
+    "t": {
+        "name": "t",
+        "action": ActionKey.STATS,
+        "description": "Показать время этапов загрузки",
+    },
+    "h": {
+        "name": "h",
+        "action": ActionKey.HELP,
+        "description": "Показать список команд",
+    },
 }
 
+key_input = KeyInput(
+    {
+        name: option["action"]
+        for key, option in options.items()
+        for name in (key, *option.get("alias", []))
+    }
+)
+
 
 def show_help():
     console.print("\n")
@@ -77,16 +98,17 @@ def show_help():
     )
 
 
+def help_keys() -> dict[str, str]:
+    """Краткая подсказка для панели: клавиша -> действие."""
+    return {
+        key: options[key]["description"]
+        for key in ("enter", "backspace", "shift", "h", "esc")
+    }
+
+
 def wait_for_key_press() -> ActionKey:
-    show_help()
-    console.print("\n[bold]Нажмите клавишу из списка:[/bold]", end=" ")
-    while True:
-        event = keyboard.read_event()
-        if event.event_type == "down":
-            if event.name in options:
-                pressed_key_print(event.name)
-                return options[event.name]["action"]
-        time.sleep(0.1)
+    # Подсказка с клавишами всегда видна в панели, отдельно ее не печатаем
+    return key_input.get()
 
 
 def show_wallpaper_info(wallpaper: WallpaperHistory, index: int, total: int):
@@ -101,7 +123,35 @@ def show_wallpaper_info(wallpaper: WallpaperHistory, index: int, total: int):
     console.print(Panel(info_text, title="Информация", border_style="blue"))
 
 
-def pressed_key_print(key_name: str):
-    console.print(
-        f"[bold yellow]нажата клавиша [underline]{key_name}[/underline][/bold yellow]"
-    )
+def show_stage_stats(
+    stages: list[StageStats], profile: str = "", allocations: list[str] = ()
+):
+    if not stages:
+        console.print("\n\n[bold red]❌ Замеров пока нет.[/bold red]")
+        return
+    table = Table(title="Время этапов (последние замеры)")
+    table.add_column("Этап", style="bold cyan")
+    table.add_column("Кол-во", justify="right")
+    table.add_column("p50, мс", justify="right", style="green")
+    table.add_column("p95, мс", justify="right", style="yellow")
+    table.add_column("p99, мс", justify="right", style="red")
+    table.add_column("Ошибки", justify="right")
+    table.add_column("МБ", justify="right", style="dim")
+    for stage in sorted(stages, key=lambda s: s.name):
+        table.add_row(
+            stage.name,
+            str(stage.count),
+            f"{stage.p50 * 1000:.1f}",
+            f"{stage.p95 * 1000:.1f}",
+            f"{stage.p99 * 1000:.1f}",
+            str(stage.errors),
+            f"{stage.total_bytes / 1024 / 1024:.1f}",
+        )
+    console.print("\n")
+    console.print(table)
+    if profile:
+        console.print(Panel(profile.strip(), title="Профиль", border_style="magenta"))
+    if allocations:
+        console.print(
+            Panel("\n".join(allocations), title="Память", border_style="magenta")
+        )
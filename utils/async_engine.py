@@ -0,0 +1,251 @@
+import asyncio
+import os
+import time
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from config import HEADERS, logger
+from models import Category, DownloadStats, WallpaperHistory
+from utils import fetcher
+from utils.categories import HOME_URL, parse_categories
+from utils.metrics import metrics
+from utils.page_index import parse_last_page
+from utils.throttle import MAX_WAIT, throttle
+from utils.transfer import (
+    MAX_CHUNK,
+    check_received,
+    commit_partial,
+    expected_size,
+    hash_partial,
+    partial_path,
+    partial_size,
+    range_headers,
+)
+from utils.wallpapers import (
+    download_finished,
+    download_wallpaper,
+    find_random_wallpaper_page,
+    get_image_url,
+    harvest_random_page,
+    pick_image_url,
+)
+
+
+# Как часто проверяем, не освободилось ли место в окне ограничителя
+THROTTLE_POLL = 0.02
+
+
+class AsyncEngine:
+    """Асинхронные версии операций парсинга и загрузки с общим клиентом.
+
+    Одновременно выполняется не больше concurrency запросов. Скачивание
+    идет через aiohttp, поиск ссылок — через синхронные функции wallpapers
+    в asyncio.to_thread. Без aiohttp в потоки уходит и скачивание.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = fetcher.DEFAULT_CONCURRENCY,
+        pool_size: int = fetcher.DEFAULT_POOL_SIZE,
+    ):
+        self.concurrency = max(concurrency, 1)
+        self.pool_size = pool_size
+        self._semaphore: asyncio.Semaphore | None = None
+        self._session = None
+
+    async def __aenter__(self):
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        if aiohttp is not None:
+            self._session = aiohttp.ClientSession(
+                headers=HEADERS,
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(
+                    sock_connect=fetcher.TIMEOUT, sock_read=fetcher.TIMEOUT
+                ),
+            )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def fetch(self, url: str) -> str | None:
+        async with self._semaphore:
+            if self._session is None:
+                response = await asyncio.to_thread(fetcher.fetch, url)
+                return response.text if response else None
+            with metrics.span("async.fetch", url=url) as span:
+                try:
+                    response = await self._request("GET", url, span)
+                    if response is None:
+                        logger.error(
+                            f"Запрос к {url} отложен: сайт перегружен или недоступен"
+                        )
+                        return None
+                    async with response:
+                        response.raise_for_status()
+                        text = await response.text()
+                        span.set(bytes=len(text))
+                        return text
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    span.set(error=type(e).__name__)
+                    logger.error(f"Ошибка запроса к {url}: {e}")
+                    return None
+
+    @staticmethod
+    async def _acquire() -> bool:
+        """Дождаться места в окне ограничителя, не блокируя цикл событий."""
+        deadline = time.monotonic() + MAX_WAIT
+        while True:
+            wait = throttle.try_acquire(deadline)
+            if wait is None:
+                return False
+            if not wait:
+                return True
+            await asyncio.sleep(min(wait, THROTTLE_POLL))
+
+    async def _request(self, method: str, url: str, span=None, **kwargs):
+        """Как fetcher.request: ограничитель нагрузки общий для обоих клиентов."""
+        for attempt in range(throttle.max_retries + 1):
+            if not await self._acquire():
+                if span is not None:
+                    span.set(error="throttled", retries=attempt)
+                return None
+            try:
+                response = await self._session.request(method, url, **kwargs)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                throttle.release(None)
+                raise
+            except asyncio.CancelledError:
+                throttle.cancel()
+                raise
+            delay = throttle.release(
+                response.status, response.headers.get("Retry-After")
+            )
+            if span is not None:
+                span.set(status=response.status, retries=attempt)
+            if delay is None or attempt == throttle.max_retries:
+                return response
+            response.release()
+            logger.info(
+                f"Ответ {response.status} от {url}, повтор через {delay:.1f} с"
+            )
+            await asyncio.sleep(delay)
+
+    async def get_categories(self) -> list[Category]:
+        markup = await self.fetch(HOME_URL)
+        if not markup:
+            return []
+        categories = parse_categories(markup)
+        if categories is None:
+            logger.error(
+                "Не удалось найти элемент с категориями. Структура сайта могла измениться."
+            )
+            return []
+        return categories
+
+    async def fetch_page_count(self, category_url: str) -> int | None:
+        markup = await self.fetch(category_url)
+        if not markup:
+            return None
+        try:
+            return parse_last_page(markup)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error(f"Не удалось определить число страниц {category_url}: {e}")
+            return None
+
+    # Поиск и разрешение ссылок — те же синхронные функции в пуле потоков:
+    # чаще всего ответ берется из пула ссылок и кэшей, без запросов к сайту
+
+    async def harvest_random_page(self, category_url: str) -> list[str] | None:
+        async with self._semaphore:
+            return await asyncio.to_thread(harvest_random_page, category_url)
+
+    async def find_random_wallpaper_page(self, category_url: str) -> str | None:
+        async with self._semaphore:
+            return await asyncio.to_thread(find_random_wallpaper_page, category_url)
+
+    async def get_random_wallpaper(
+        self, category_url: str, resolution: str | None = None
+    ) -> str | None:
+        async with self._semaphore:
+            return await asyncio.to_thread(pick_image_url, category_url, resolution)
+
+    async def get_image_url(
+        self, wallpaper_page_url: str, resolution: str | None = None
+    ) -> str | None:
+        async with self._semaphore:
+            return await asyncio.to_thread(
+                get_image_url, wallpaper_page_url, False, resolution
+            )
+
+    async def _open_download(self, image_url: str, offset: int):
+        response = await self._request(
+            "GET", image_url, headers=range_headers(offset)
+        )
+        if response is None:
+            raise aiohttp.ClientConnectionError("сайт перегружен или недоступен")
+        return response
+
+    async def download_wallpaper(
+        self, image_url: str, save_path: str
+    ) -> DownloadStats | None:
+        if self._session is None:
+            async with self._semaphore:
+                return await asyncio.to_thread(
+                    download_wallpaper, image_url, save_path, False
+                )
+
+        part_path = partial_path(image_url, save_path)
+        offset = partial_size(part_path)
+        started = time.perf_counter()
+        async with self._semaphore:
+            with metrics.span("async.download", url=image_url) as span:
+                try:
+                    response = await self._open_download(image_url, offset)
+                    if response.status == 416:
+                        # Кусок на диске не совпадает с файлом на сервере — качаем заново
+                        response.release()
+                        offset = 0
+                        response = await self._open_download(image_url, offset)
+                    async with response:
+                        span.set(status=response.status)
+                        response.raise_for_status()
+                        if offset and response.status != 206:
+                            offset = 0
+                        total_size = expected_size(response.headers, offset)
+                        received = offset
+                        digest = hash_partial(part_path, offset)
+                        file = open(part_path, "ab" if offset else "wb")
+                        try:
+                            async for chunk in response.content.iter_chunked(MAX_CHUNK):
+                                file.write(chunk)
+                                digest.update(chunk)
+                                received += len(chunk)
+                            check_received(received, total_size)
+                            commit_partial(file, part_path, save_path)
+                        finally:
+                            file.close()
+                except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                    span.set(error=type(e).__name__)
+                    logger.error(f"Ошибка загрузки: {e}")
+                    return None
+                span.set(bytes=received - offset, resumed_from=offset)
+        return download_finished(image_url, received, started, offset, digest)
+
+    async def prepare(
+        self, category: Category, cache_dir: str, resolution: str | None = None
+    ) -> WallpaperHistory | None:
+        """Полная цепочка: найти, разрешить ссылку и скачать обои."""
+        image_url = await self.get_random_wallpaper(category.url, resolution)
+        if not image_url:
+            return None
+        save_path = os.path.join(cache_dir, f"wallpaper_{time.time_ns()}.jpg")
+        stats = await self.download_wallpaper(image_url, save_path)
+        if not stats:
+            return None
+        return WallpaperHistory(image_url, save_path, category.name, stats.sha256)
@@ -0,0 +1,294 @@
+import os
+import time
+from collections import OrderedDict
+from os import path
+from queue import Queue
+from threading import Lock, Thread
+from typing import Callable
+
+from config import blob_index_file, cache_dir, logger
+from utils.storage import load_json, save_json_atomic
+
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024
+# Недокачанные файлы старше этого срока считаются брошенными
+PARTIAL_MAX_AGE = 24 * 60 * 60
+# Свежие файлы могут быть еще на пути в хранилище — их не трогаем
+ORPHAN_MIN_AGE = 60
+# Сколько изменений индекса копим перед записью на диск; вытеснение пишется сразу
+SAVE_EVERY = 20
+
+
+class BlobStore:
+    """Кэш изображений, адресуемый по sha256 содержимого.
+
+    Один и тот же файл хранится один раз. При превышении бюджета по байтам
+    удаляются давно не использованные файлы; само удаление идет в фоне.
+    Индекс пишется на диск после вытеснения, раз в SAVE_EVERY изменений
+    и при выходе (save).
+    """
+
+    def __init__(self, root: str, index_path: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.index_path = index_path
+        self.max_bytes = max_bytes
+        self._lock = Lock()
+        # digest -> {"name", "size", "variants"}; порядок — от давно использованных к свежим
+        self._entries: OrderedDict[str, dict] = OrderedDict(
+            load_json(index_path, {})
+        )
+        self._total = sum(e["size"] for e in self._entries.values())
+        self._unsaved = 0
+        self._pinned: set[str] = set()
+        # Файлы, добавленные про запас (очередь предзагрузки): только их
+        # удаляет discard, пока их не взяли в историю (keep) или не добавили
+        # те же байты еще раз
+        self._tentative: set[str] = set()
+        self._trash: Queue[str] = Queue()
+        Thread(target=self._deleter, daemon=True).start()
+
+    def path_for(self, digest: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(digest)
+            return path.join(self.root, entry["name"]) if entry else None
+
+    def add(self, file_path: str, digest: str, tentative: bool = False) -> str:
+        """Переместить скачанный файл в хранилище и вернуть путь к нему.
+
+        tentative=True — файл может не понадобиться и будет удален discard,
+        если только такое же изображение не хранится или не добавится для
+        чего-то еще.
+        """
+        ext = path.splitext(file_path)[1] or ".jpg"
+        name = f"{digest}{ext}"
+        blob_path = path.join(self.root, name)
+        with self._lock:
+            if tentative and digest not in self._entries:
+                self._tentative.add(digest)
+            elif not tentative:
+                self._tentative.discard(digest)
+            if digest in self._entries and path.exists(blob_path):
+                # Такое изображение уже есть — копия не нужна
+                self._entries.move_to_end(digest)
+                if path.abspath(file_path) != path.abspath(blob_path):
+                    self._trash.put(file_path)
+            else:
+                os.replace(file_path, blob_path)
+                size = path.getsize(blob_path)
+                old = self._entries.pop(digest, None)
+                entry = {"name": name, "size": size}
+                if old:
+                    # Файл пропал с диска, запись осталась: ее размер уже в _total
+                    self._total -= old["size"]
+                    variants = {
+                        v: v_size
+                        for v, v_size in old.get("variants", {}).items()
+                        if path.exists(path.join(self.root, v))
+                    }
+                    if variants:
+                        entry["variants"] = variants
+                        entry["size"] += sum(variants.values())
+                self._entries[digest] = entry
+                self._total += entry["size"]
+            need_save = self._changed(self._evict_over_budget())
+        if need_save:
+            self.save()
+        return blob_path
+
+    def add_variant(self, digest: str, name: str):
+        """Учесть производный файл (например, подогнанный под экран) рядом с блобом."""
+        with self._lock:
+            entry = self._entries.get(digest)
+            file_path = path.join(self.root, name)
+            if not entry or name in entry.get("variants", {}):
+                return
+            size = path.getsize(file_path)
+            entry.setdefault("variants", {})[name] = size
+            entry["size"] += size
+            self._total += size
+            need_save = self._changed(self._evict_over_budget())
+        if need_save:
+            self.save()
+
+    def touch(self, digest: str):
+        """Отметить использование, чтобы файл не был вытеснен первым."""
+        with self._lock:
+            if digest not in self._entries:
+                return
+            self._entries.move_to_end(digest)
+            need_save = self._changed(False)
+        if need_save:
+            self.save()
+
+    def pin(self, digest: str):
+        with self._lock:
+            self._pinned.add(digest)
+
+    def unpin(self, digest: str):
+        with self._lock:
+            self._pinned.discard(digest)
+
+    def keep(self, digest: str):
+        """Файл, добавленный с tentative=True, понадобился: discard его не удалит."""
+        with self._lock:
+            self._tentative.discard(digest)
+
+    def discard(self, digest: str):
+        """Удалить добавленный с tentative=True файл, который так и не понадобился."""
+        with self._lock:
+            if (
+                digest not in self._tentative
+                or digest not in self._entries
+                or digest in self._pinned
+            ):
+                return
+            self._remove(digest)
+        self.save()
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._total
+
+    def clear(self):
+        with self._lock:
+            for digest in list(self._entries):
+                if digest not in self._pinned:
+                    self._remove(digest)
+        self.save()
+
+    def save(self):
+        with self._lock:
+            data = dict(self._entries)
+            self._unsaved = 0
+        save_json_atomic(self.index_path, data)
+
+    def cleanup_orphans_async(
+        self, keep: Callable[[], set[str]], referenced: Callable[[str], bool]
+    ):
+        """Фоном удалить файлы кэша, о которых не знают ни индекс, ни история.
+
+        keep — пути файлов вне хранилища, на которые ссылается история;
+        вызывается уже в фоновом потоке, чтобы чтение истории не задерживало
+        старт. Файл хранилища, чей хэш есть в истории (referenced), но не
+        в индексе — индекс не успели записать перед аварийным выходом, —
+        возвращается в индекс, а не удаляется.
+        """
+        Thread(
+            target=self._cleanup_orphans, args=(keep, referenced), daemon=True
+        ).start()
+
+    def _cleanup_orphans(
+        self, keep: Callable[[], set[str]], referenced: Callable[[str], bool]
+    ):
+        try:
+            keep = {path.abspath(p) for p in keep()}
+        except Exception as e:
+            logger.error(f"Ошибка чтения истории для очистки кэша: {e}")
+            return
+        with self._lock:
+            known = {e["name"] for e in self._entries.values()}
+            variants = {
+                name
+                for e in self._entries.values()
+                for name in e.get("variants", {})
+            }
+        now = time.time()
+        try:
+            names = os.listdir(self.root)
+        except OSError as e:
+            logger.error(f"Ошибка чтения кэша: {e}")
+            return
+        adopted = False
+        for name in names:
+            file_path = path.join(self.root, name)
+            if name in known or name in variants or path.abspath(file_path) in keep:
+                continue
+            try:
+                if self._adopt(name, referenced):
+                    adopted = True
+                    continue
+            except Exception as e:
+                # Без ответа истории файл не трогаем: вдруг он ей нужен
+                logger.error(f"Ошибка проверки файла кэша {name}: {e}")
+                continue
+            min_age = PARTIAL_MAX_AGE if name.endswith(".part") else ORPHAN_MIN_AGE
+            try:
+                if now - path.getmtime(file_path) < min_age:
+                    continue
+            except OSError:
+                continue
+            self._trash.put(file_path)
+
+        # Записи индекса, чьи файлы удалили вручную
+        missing = known - set(names)
+        if missing:
+            with self._lock:
+                for digest, entry in list(self._entries.items()):
+                    if entry["name"] in missing:
+                        self._total -= self._entries.pop(digest)["size"]
+        if missing or adopted:
+            self.save()
+
+    def _adopt(self, name: str, referenced: Callable[[str], bool]) -> bool:
+        """Вернуть в индекс файл <sha256>.<ext>, на который ссылается история."""
+        digest, ext = path.splitext(name)
+        if not ext or ext == ".part" or not referenced(digest):
+            return False
+        file_path = path.join(self.root, name)
+        with self._lock:
+            if digest in self._entries:
+                # Уже добавлен заново, пока шла проверка
+                return True
+            try:
+                size = path.getsize(file_path)
+            except OSError:
+                return False
+            self._entries[digest] = {"name": name, "size": size}
+            self._total += size
+        logger.info(f"Файл возвращен в индекс кэша: {name}")
+        return True
+
+    def _changed(self, evicted: bool) -> bool:
+        """Учесть изменение индекса. True — пора записать его на диск."""
+        self._unsaved += 1
+        return evicted or self._unsaved >= SAVE_EVERY
+
+    def _evict_over_budget(self) -> bool:
+        """Вытеснить старые файлы сверх бюджета. True — если что-то удалено."""
+        evicted = False
+        # Самый свежий файл (текущие обои) не трогаем
+        for digest in list(self._entries)[:-1]:
+            if self._total <= self.max_bytes:
+                break
+            if digest not in self._pinned:
+                self._remove(digest)
+                evicted = True
+        return evicted
+
+    def _remove(self, digest: str):
+        self._tentative.discard(digest)
+        entry = self._entries.pop(digest)
+        self._total -= entry["size"]
+        for name in (entry["name"], *entry.get("variants", {})):
+            self._trash.put(path.join(self.root, name))
+        logger.info(f"Из кэша вытеснен файл: {entry['name']}")
+
+    def _deleter(self):
+        while True:
+            file_path = self._trash.get()
+            with self._lock:
+                # Файл могли снова добавить в хранилище, пока он ждал удаления
+                name = path.basename(file_path)
+                entry = self._entries.get(name.split(".", 1)[0])
+                if entry and (
+                    name == entry["name"] or name in entry.get("variants", {})
+                ):
+                    continue
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.error(f"Ошибка удаления файла: {e}")
+
+
+blob_store = BlobStore(cache_dir, blob_index_file)
@@ -1,58 +1,76 @@
-from bs4 import BeautifulSoup
+import time
+from dataclasses import asdict
+from threading import Event, Thread
+from typing import Callable
+
 from rich.table import Table
-from config import console, logger
+from config import BASE_URL, categories_file, console, logger
 from models import Category
-from utils.fetcher import fetch
-from rich.progress import Progress, SpinnerColumn, TextColumn
+from utils.fetcher import TIMEOUT, fetch
+from utils.storage import load_json, save_json_atomic
+from rich.progress import SpinnerColumn, TextColumn
+from utils.tui import make_progress
+
+HOME_URL = f"{BASE_URL}/"
+# Повторы фонового обновления без сети: от минуты до 10 минут
+RETRY_DELAY = 60
+MAX_RETRY_DELAY = 10 * 60
+
+
+def _link_name(link) -> str:
+    return "".join(t for t in link.contents if isinstance(t, str)).strip()
+
+
+def parse_categories(markup: str) -> list[Category] | None:
+    """Разбираем категории с главной страницы. None — если блок не найден."""
+    # bs4 грузится при первом разборе, а не при старте программы
+    from utils.parser import FILTERS, parse_html
 
+    soup = parse_html(markup, FILTERS)
+    filter_div = soup.select_one(".filters")
+    if not filter_div:
+        return None
+    categories = [
+        Category(_link_name(link), f"{BASE_URL}{link['href']}")
+        for link in filter_div.select(".filters__list .filter__link")
+        if not link.get("href") == "javascript:;"
+    ]
 
-def get_categories() -> list[Category]:
+    # Дополнительные категории
+    content_sidebar_shift = soup.select_one(".content-sidebar_shift")
+    if content_sidebar_shift:
+        for link in content_sidebar_shift.select(".filters__list .filter__link"):
+            if not link.get("href") == "javascript:;":
+                categories.append(
+                    Category(_link_name(link), f"{BASE_URL}{link['href']}")
+                )
+
+    categories.append(Category("Все категории", BASE_URL))
+    return categories
+
+
+def get_categories(timeout: float = TIMEOUT) -> list[Category]:
     console.rule("[bold cyan]Получаем категории...[/bold cyan]")
-    with Progress(
+    with make_progress(
         SpinnerColumn(),
         TextColumn("[cyan]Получаем категории...[/cyan]"),
-        transient=True,
     ) as progress:
         task = progress.add_task("", total=None)  # Бесконечный лоадер
-        response = fetch("https://wallpaperscraft.ru/")
+        response = fetch(HOME_URL, timeout)
         if not response:
             return []
 
-        soup = BeautifulSoup(response.text, "html.parser")
-        filter_div = soup.select_one(".filters")
-        if not filter_div:
+        categories = parse_categories(response.text)
+        if categories is None:
             logger.error(
                 "Не удалось найти элемент с категориями. Структура сайта могла измениться."
             )
             return []
-        categories = [
-            Category(
-                "".join(t for t in link.contents if isinstance(t, str)).strip(),
-                f"https://wallpaperscraft.ru{link['href']}",
-            )
-            for link in filter_div.select(".filters__list .filter__link")
-            if not link.get("href") == "javascript:;"
-        ]
-
-        # Дополнительные категории
-        content_sidebar_shift = soup.select_one(".content-sidebar_shift")
-        if content_sidebar_shift:
-            for link in content_sidebar_shift.select(".filters__list .filter__link"):
-                if not link.get("href") == "javascript:;":
-                    categories.append(
-                        Category(
-                            "".join(
-                                t for t in link.contents if isinstance(t, str)
-                            ).strip(),
-                            f"https://wallpaperscraft.ru{link['href']}",
-                        )
-                    )
-
-        categories.append(Category("Все категории", "https://wallpaperscraft.ru"))
 
         progress.remove_task(task)
 
     if categories:
+        category_snapshot.save(categories)
         console.print(
             f"[bold white]Найдено категорий:[/bold white] [underline cyan]{len(categories)}[/underline cyan]",
             end="",
@@ -62,6 +80,65 @@ def get_categories() -> list[Category]:
     return categories
 
 
+class CategorySnapshot:
+    """Последний удачно загруженный список категорий на диске.
+
+    На старте показывается сразу, а свежий список подтягивается в фоне.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._refresh_thread: Thread | None = None
+        self._stopped = Event()
+
+    def load(self) -> list[Category] | None:
+        data = load_json(self.file_path)
+        if not data or not data.get("categories"):
+            return None
+        try:
+            return [Category(**item) for item in data["categories"]]
+        except TypeError as e:
+            logger.error(f"Ошибка чтения {self.file_path}: {e}")
+            return None
+
+    def save(self, categories: list[Category]):
+        save_json_atomic(
+            self.file_path,
+            {
+                "updated": time.time(),
+                "categories": [asdict(category) for category in categories],
+            },
+        )
+
+    def refresh_async(self, on_update: Callable[[list[Category]], None]):
+        """Фоном загрузить категории; без сети повторять с растущей паузой."""
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return
+        self._refresh_thread = Thread(
+            target=self._refresh, args=(on_update,), daemon=True
+        )
+        self._refresh_thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _refresh(self, on_update: Callable[[list[Category]], None]):
+        delay = RETRY_DELAY
+        while not self._stopped.is_set():
+            response = fetch(HOME_URL)
+            categories = parse_categories(response.text) if response else None
+            if categories:
+                self.save(categories)
+                on_update(categories)
+                return
+            if self._stopped.wait(delay):
+                return
+            delay = min(delay * 2, MAX_RETRY_DELAY)
+
+
+category_snapshot = CategorySnapshot(categories_file)
+
+
 def show_categories(categories: list[Category]):
     console.rule("[bold blue]Выбор категории[/bold blue]")
     table = Table()
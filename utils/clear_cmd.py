@@ -1,5 +1,6 @@
-from os import system
+from config import console
 
 
 def clear_cmd():
-    return system("cls")
+    # Escape-последовательность вместо запуска cls/clear в отдельном процессе
+    console.clear()
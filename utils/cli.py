@@ -0,0 +1,134 @@
+import argparse
+from datetime import datetime
+
+from utils.schedule import CronSchedule, IntervalSchedule, parse_interval
+
+DEFAULT_INTERVAL = "30m"
+# За сколько секунд до смены обоев проверяем, что следующие уже скачаны
+DEFAULT_PREFETCH_LEAD = 60.0
+DEFAULT_HARVEST_WORKERS = 4
+# Вежливость к сайту: не больше стольких запросов в секунду при сборе
+DEFAULT_HARVEST_RATE = 2.0
+
+
+def _interval(value: str) -> float:
+    try:
+        return parse_interval(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def _cron(value: str) -> CronSchedule:
+    try:
+        schedule = CronSchedule(value)
+        # Расписание вроде 30 февраля разбирается, но никогда не срабатывает
+        schedule.next_after(datetime.now())
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return schedule
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("нужно число больше нуля")
+    return number
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="wallswap",
+        description="Смена обоев рабочего стола с wallpaperscraft.ru",
+    )
+    parser.add_argument(
+        "category",
+        nargs="?",
+        type=int,
+        help="номер категории из списка (0 — выход)",
+    )
+    parser.add_argument(
+        "-d",
+        "--daemon",
+        action="store_true",
+        help="работать без клавиатуры, меняя обои по расписанию",
+    )
+    timing = parser.add_mutually_exclusive_group()
+    timing.add_argument(
+        "-i",
+        "--interval",
+        type=_interval,
+        help=f"интервал смены обоев: 90, 30s, 15m, 2h, 1d (по умолчанию {DEFAULT_INTERVAL})",
+    )
+    timing.add_argument(
+        "-s",
+        "--schedule",
+        type=_cron,
+        help="расписание в формате cron, например '0 9-18 * * 1-5'",
+    )
+    parser.add_argument(
+        "--prefetch-lead",
+        type=_interval,
+        default=DEFAULT_PREFETCH_LEAD,
+        help="за сколько до смены убедиться, что обои скачаны (по умолчанию 60s)",
+    )
+    parser.add_argument(
+        "--startup-profile",
+        action="store_true",
+        help="показать время этапов запуска и выйти после первой отрисовки",
+    )
+    parser.add_argument(
+        "--export-history",
+        metavar="FILE",
+        help="выгрузить историю в JSON прежнего формата (history.json) и выйти",
+    )
+    harvest = parser.add_argument_group(
+        "сбор обоев", "скачать обои заранее, например для киоска без сети"
+    )
+    harvest.add_argument(
+        "--harvest",
+        type=_positive_int,
+        metavar="COUNT",
+        help="скачать COUNT обоев в кэш и историю и выйти",
+    )
+    harvest.add_argument(
+        "--categories",
+        type=_positive_int,
+        nargs="+",
+        metavar="N",
+        help="номера категорий для сбора (по умолчанию — категория из аргумента)",
+    )
+    harvest.add_argument(
+        "--workers",
+        type=_positive_int,
+        default=DEFAULT_HARVEST_WORKERS,
+        help=f"одновременных загрузок (по умолчанию {DEFAULT_HARVEST_WORKERS})",
+    )
+    harvest.add_argument(
+        "--rate",
+        type=float,
+        default=DEFAULT_HARVEST_RATE,
+        help=f"не больше запросов в секунду, 0 — без ограничения (по умолчанию {DEFAULT_HARVEST_RATE:g})",
+    )
+    harvest.add_argument(
+        "--restart",
+        action="store_true",
+        help="начать сбор заново, не продолжая прерванный",
+    )
+    args = parser.parse_args(argv)
+    if (args.interval or args.schedule) and not args.daemon:
+        parser.error("--interval и --schedule работают только с --daemon")
+    if args.harvest and args.daemon:
+        parser.error("--harvest и --daemon нельзя использовать вместе")
+    if args.categories and not args.harvest:
+        parser.error("--categories работает только с --harvest")
+    if args.harvest and not args.categories:
+        if args.category is None:
+            parser.error("для --harvest укажите категории через --categories")
+        args.categories = [args.category]
+    return args
+
+
+def build_schedule(args: argparse.Namespace) -> CronSchedule | IntervalSchedule:
+    if args.schedule:
+        return args.schedule
+    return IntervalSchedule(args.interval or parse_interval(DEFAULT_INTERVAL))
@@ -1,9 +1,11 @@
 import json
+import re
 from os import path
 
 from rich.panel import Panel
-from rich.prompt import Confirm, IntPrompt, Prompt
+from rich.prompt import Confirm, FloatPrompt, IntPrompt, Prompt
 from config import config_file, logger, console
+from utils.setter import BACKENDS
 from enum import Enum
 from dataclasses import dataclass, asdict
 from typing import Optional, Type, TypeVar
@@ -12,6 +14,24 @@ from typing import Optional, Type, TypeVar
 @dataclass
 class AppConfig:
     max_items: int = 50
+    cache_max_mb: int = 500
+    pool_size: int = 10
+    max_retries: int = 3
+    retry_backoff: float = 0.5
+    prefetch_depth: int = 2
+    max_concurrency: int = 4
+    page_index_ttl_hours: int = 24
+    image_url_ttl_hours: int = 168
+    target_resolution: str = ""
+    fit_to_screen: bool = True
+    progressive_set: bool = True
+    setter_backend: str = "auto"
+    setter_command: str = ""
+    trace_file: str = ""
+    profile_hot_path: bool = False
+    multi_monitor: bool = False
+    monitor_categories: str = ""
+    skip_duplicates: bool = True
     # theme: str = "light"
     # language: str = "en"
     # добавляешь новые поля здесь:
@@ -20,6 +40,24 @@ class AppConfig:
 
 class ConfigKey(Enum):
     MAX_ITEMS = "max_items"
+    CACHE_MAX_MB = "cache_max_mb"
+    POOL_SIZE = "pool_size"
+    MAX_RETRIES = "max_retries"
+    RETRY_BACKOFF = "retry_backoff"
+    PREFETCH_DEPTH = "prefetch_depth"
+    MAX_CONCURRENCY = "max_concurrency"
+    PAGE_INDEX_TTL_HOURS = "page_index_ttl_hours"
+    IMAGE_URL_TTL_HOURS = "image_url_ttl_hours"
+    TARGET_RESOLUTION = "target_resolution"
+    FIT_TO_SCREEN = "fit_to_screen"
+    PROGRESSIVE_SET = "progressive_set"
+    SETTER_BACKEND = "setter_backend"
+    SETTER_COMMAND = "setter_command"
+    TRACE_FILE = "trace_file"
+    PROFILE_HOT_PATH = "profile_hot_path"
+    MULTI_MONITOR = "multi_monitor"
+    MONITOR_CATEGORIES = "monitor_categories"
+    SKIP_DUPLICATES = "skip_duplicates"
     # THEME = 'theme'
     # LANGUAGE = 'language'
     # DOWNLOAD_FOLDER = 'download_folder'
@@ -121,6 +159,24 @@ class ConfigManager:
         # Список доступных параметров
         options = {
             "max_items": "Максимальное количество записей в истории",
+            "cache_max_mb": "Максимальный размер кэша изображений (МБ)",
+            "pool_size": "Размер пула HTTP-соединений",
+            "max_retries": "Количество повторов при ошибках сети",
+            "retry_backoff": "Множитель задержки между повторами (сек)",
+            "prefetch_depth": "Сколько обоев держать скачанными заранее",
+            "max_concurrency": "Максимум одновременных запросов в фоне",
+            "page_index_ttl_hours": "Срок жизни индекса страниц категорий (часы)",
+            "image_url_ttl_hours": "Срок жизни кэша ссылок на изображения (часы)",
+            "target_resolution": "Разрешение изображений: 1920x1080, auto — по экрану, пусто — оригинал",
+            "fit_to_screen": "Подгонять обои под размер экрана",
+            "progressive_set": "Сначала ставить превью, затем полное изображение",
+            "setter_backend": "Способ установки обоев",
+            "setter_command": "Команда установки обоев, например feh --bg-fill {path}",
+            "trace_file": "Файл трейса этапов в формате JSON Lines (пусто — выключен)",
+            "profile_hot_path": "Профилировать загрузку обоев (cProfile и tracemalloc)",
+            "multi_monitor": "Свои обои на каждый монитор",
+            "monitor_categories": "Номера категорий по мониторам через запятую (пусто — текущая)",
+            "skip_duplicates": "Пропускать обои, похожие на уже показанные",
             # "theme": "Тема приложения",
             # "language": "Язык приложения",
             # "enable_notifications": "Включить уведомления"
@@ -160,11 +216,58 @@ class ConfigManager:
         selected_key = list(options.keys())[choice - 1]
         current_value = getattr(self.config, selected_key)
 
-        if selected_key == "max_items":
+        if selected_key in (
+            "max_items",
+            "cache_max_mb",
+            "pool_size",
+            "max_retries",
+            "prefetch_depth",
+            "max_concurrency",
+            "page_index_ttl_hours",
+            "image_url_ttl_hours",
+        ):
             new_value = IntPrompt.ask(
                 f"\n{options[selected_key]} (текущее: {current_value})",
                 default=current_value,
             )
+        elif selected_key == "retry_backoff":
+            new_value = FloatPrompt.ask(
+                f"\n{options[selected_key]} (текущее: {current_value})",
+                default=current_value,
+            )
+        elif selected_key == "target_resolution":
+            while True:
+                new_value = Prompt.ask(
+                    f"\n{options[selected_key]} (текущее: {current_value})",
+                    default=current_value,
+                ).strip()
+                if new_value in ("", "auto") or re.fullmatch(r"\d+x\d+", new_value):
+                    break
+                console.print(
+                    "[bold red]Ошибка: укажите разрешение в формате 1920x1080 или auto.[/bold red]"
+                )
+        elif selected_key == "monitor_categories":
+            while True:
+                new_value = Prompt.ask(
+                    f"\n{options[selected_key]} (текущее: {current_value})",
+                    default=current_value,
+                ).strip()
+                if re.fullmatch(r"(\d+(\s*,\s*\d+)*)?", new_value):
+                    break
+                console.print(
+                    "[bold red]Ошибка: укажите номера через запятую, например 3, 5.[/bold red]"
+                )
+        elif selected_key == "setter_backend":
+            new_value = Prompt.ask(
+                f"\n{options[selected_key]} (текущее: {current_value})",
+                choices=list(BACKENDS),
+                default=current_value,
+            )
+        elif selected_key in ("setter_command", "trace_file"):
+            new_value = Prompt.ask(
+                f"\n{options[selected_key]} (текущее: {current_value})",
+                default=current_value,
+            ).strip()
         elif selected_key == "theme":
             new_value = Prompt.ask(
                 f"\n{options[selected_key]} (текущее: {current_value})",
@@ -177,7 +280,14 @@ class ConfigManager:
                 choices=["en", "ru"],
                 default=current_value,
             )
-        elif selected_key == "enable_notifications":
+        elif selected_key in (
+            "fit_to_screen",
+            "progressive_set",
+            "profile_hot_path",
+            "multi_monitor",
+            "skip_duplicates",
+            "enable_notifications",
+        ):
             new_value = Confirm.ask(
                 f"{options[selected_key]} (текущее: {current_value})",
                 default=current_value,
@@ -1,11 +1,208 @@
-import requests
+import time
+from dataclasses import dataclass
+from threading import Lock, Thread
+from typing import TYPE_CHECKING
+
 from config import logger, HEADERS
+from utils.metrics import Span, metrics
+from utils.throttle import throttle
+
+if TYPE_CHECKING:
+    # requests импортируется при первом запросе, а не при старте программы
+    import requests
+
+DEFAULT_POOL_SIZE = 10
+# Одновременных фоновых запросов в асинхронном движке
+DEFAULT_CONCURRENCY = 4
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_RETRY_BACKOFF = 0.5
+TIMEOUT = 10
+
+
+@dataclass
+class ConnectionStats:
+    opened: int
+    reused: int
+
+
+_session: "requests.Session | None" = None
+_session_lock = Lock()
+_session_params = {
+    "pool_size": DEFAULT_POOL_SIZE,
+    "max_retries": DEFAULT_MAX_RETRIES,
+    "retry_backoff": DEFAULT_RETRY_BACKOFF,
+}
+
+
+def _create_session(pool_size: int, max_retries: int, retry_backoff: float):
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    # urllib3 повторяет только обрывы соединения; 429 и 5xx обрабатывает
+    # request() через общий ограничитель, чтобы паузы касались всех потоков
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=retry_backoff,
+        allowed_methods=("GET", "HEAD"),
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def configure_session(
+    pool_size: int = DEFAULT_POOL_SIZE,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    retry_backoff: float = DEFAULT_RETRY_BACKOFF,
+):
+    """Задать параметры пула соединений. Старая сессия закрывается."""
+    global _session
+    params = {
+        "pool_size": pool_size,
+        "max_retries": max_retries,
+        "retry_backoff": retry_backoff,
+    }
+    throttle.configure(pool_size, max_retries, retry_backoff)
+    with _session_lock:
+        if params == _session_params:
+            return
+        _session_params.update(params)
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def get_session() -> "requests.Session":
+    """Общая keep-alive сессия для всех запросов к сайту."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _create_session(**_session_params)
+        return _session
+
+
+def get_connection_stats() -> ConnectionStats:
+    """Сколько соединений открыто заново и сколько запросов прошло по уже открытым."""
+    opened = requests_total = 0
+    with _session_lock:
+        session = _session
+    if session is None:
+        return ConnectionStats(0, 0)
+
+    adapters = {id(a): a for a in session.adapters.values()}.values()
+    for adapter in adapters:
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            opened += pool.num_connections
+            requests_total += pool.num_requests
+    return ConnectionStats(opened, max(requests_total - opened, 0))
+
+
+def warm_up(url: str):
+    """Фоном создать сессию и открыть соединение, пока программа загружается."""
+
+    def run():
+        import requests
+
+        try:
+            get_session().head(url, timeout=TIMEOUT)
+        except requests.RequestException:
+            pass
+
+    Thread(target=run, daemon=True).start()
+
+
+def _retries(response: "requests.Response") -> int:
+    """Сколько повторов urllib3 понадобилось для ответа."""
+    retries = getattr(response.raw, "retries", None)
+    return len(retries.history) if retries else 0
+
+
+def request(
+    method: str,
+    url: str,
+    span: Span | None = None,
+    timeout: float = TIMEOUT,
+    **kwargs,
+) -> "requests.Response | None":
+    """Запрос через общую сессию и ограничитель нагрузки на сайт.
+
+    На 429 и 5xx запрос повторяется после паузы (Retry-After или
+    экспоненциальной). None — ограничитель не пустил запрос: сайт перегружен
+    или недоступен. Сетевые ошибки пробрасываются как requests.RequestException.
+    """
+    import requests
+
+    attempts = throttle.max_retries + 1
+    for attempt in range(attempts):
+        if not throttle.acquire():
+            if span is not None:
+                span.set(error="throttled", retries=attempt)
+            return None
+        try:
+            response = get_session().request(method, url, timeout=timeout, **kwargs)
+        except requests.RequestException:
+            throttle.release(None)
+            raise
+        delay = throttle.release(
+            response.status_code, response.headers.get("Retry-After")
+        )
+        if span is not None:
+            span.set(
+                status=response.status_code, retries=attempt + _retries(response)
+            )
+        if delay is None or attempt == attempts - 1:
+            return response
+        response.close()
+        logger.info(
+            f"Ответ {response.status_code} от {url}, повтор через {delay:.1f} с"
+        )
+        time.sleep(delay)
+
+
+def fetch(url: str, timeout: float = TIMEOUT) -> "requests.Response | None":
+    import requests
+
+    with metrics.span("fetch", url=url) as span:
+        try:
+            response = request("GET", url, span, timeout)
+            if response is None:
+                logger.error(f"Запрос к {url} отложен: сайт перегружен или недоступен")
+                return None
+            span.set(bytes=len(response.content))
+            response.raise_for_status()
+            return response
+        except requests.RequestException as e:
+            span.set(error=type(e).__name__)
+            logger.error(f"Ошибка запроса к {url}: {e}")
+            return None
+
+
+def probe(url: str) -> bool:
+    """Проверить HEAD-запросом, что по ссылке отдается изображение."""
+    import requests
 
-def fetch(url: str) -> requests.Response | None:
-    try:
-        response = requests.get(url, headers=HEADERS, timeout=10)
-        response.raise_for_status()
-        return response
-    except requests.RequestException as e:
-        logger.error(f"Ошибка запроса к {url}: {e}")
-        return None
\ No newline at end of file
+    with metrics.span("probe", url=url) as span:
+        try:
+            response = request("HEAD", url, span, allow_redirects=True)
+        except requests.RequestException as e:
+            span.set(error=type(e).__name__)
+            return False
+    if response is None:
+        return False
+    return response.ok and response.headers.get("content-type", "").startswith(
+        "image/"
+    )
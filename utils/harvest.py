@@ -0,0 +1,266 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from threading import Event, Lock
+
+from rich.progress import (
+    BarColumn,
+    MofNCompleteColumn,
+    SpinnerColumn,
+    TextColumn,
+    TimeElapsedColumn,
+)
+from rich.table import Table
+
+from config import BASE_URL, cache_dir, console, harvest_state_file, logger
+from models import Category, WallpaperHistory
+from utils.blob_store import blob_store
+from utils.fetcher import fetch
+from utils.history_manager import WallpaperHistoryManager
+from utils.page_index import fetch_page_count, page_index
+from utils.storage import load_json, save_json_atomic
+from utils.throttle import throttle
+from utils.tui import make_progress
+from utils.wallpapers import (
+    download_wallpaper,
+    get_image_url,
+    listing_page_url,
+    parse_wallpaper_links,
+)
+
+
+@dataclass
+class HarvestStats:
+    downloaded: int = 0
+    skipped: int = 0
+    failed: int = 0
+    bytes: int = 0
+    elapsed: float = 0.0
+
+
+class Harvester:
+    """Сбор обоев из категорий: страницы списков по порядку, загрузки в пуле.
+
+    Прогресс — номер следующей страницы каждой категории — сохраняется после
+    каждой страницы, поэтому прерванный сбор продолжается с того же места.
+    Уже скачанные обои со страницы пропускаются по истории. Ограничение rate
+    действует на каждый запрос к сайту: страницы, проверки ссылок и загрузки.
+    """
+
+    def __init__(
+        self,
+        history_manager: WallpaperHistoryManager,
+        categories: list[Category],
+        target: int,
+        workers: int,
+        rate: float,
+        resolution: str | None = None,
+        state_path: str = harvest_state_file,
+    ):
+        self.history_manager = history_manager
+        self.categories = categories
+        self.target = target
+        self.workers = workers
+        self.rate = rate
+        self.resolution = resolution
+        self.state_path = state_path
+        self.stats = HarvestStats()
+        self._lock = Lock()
+        self._stopped = Event()
+        # Сколько загрузок уже начато: не качаем больше, чем осталось до цели
+        self._reserved = 0
+        # Ссылки, уже взятые потоками: одни обои бывают в нескольких категориях
+        self._claimed: set[str] = set()
+        self._state = {
+            "target": target,
+            "categories": [c.url for c in categories],
+            "downloaded": 0,
+            "pages": {c.url: 1 for c in categories},
+        }
+
+    def resume(self) -> bool:
+        """Продолжить прерванный сбор с теми же категориями и целью."""
+        state = load_json(self.state_path)
+        if not state or state.get("categories") != self._state["categories"]:
+            return False
+        if state.get("target") != self.target:
+            return False
+        self._state = state
+        return True
+
+    @property
+    def remaining(self) -> int:
+        return max(self.target - self._state["downloaded"], 0)
+
+    def run(self) -> HarvestStats:
+        started = time.perf_counter()
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        interrupted = False
+        throttle.set_rate(self.rate)
+        try:
+            with make_progress(
+                SpinnerColumn(),
+                TextColumn("[cyan]{task.description}[/cyan]"),
+                BarColumn(bar_width=40, style="magenta"),
+                MofNCompleteColumn(),
+                TimeElapsedColumn(),
+                transient=False,
+            ) as progress:
+                task = progress.add_task(
+                    "Сбор обоев", total=self.target, completed=self._state["downloaded"]
+                )
+                for category, page in self._pages():
+                    links = None
+                    if page is not None:
+                        progress.update(
+                            task, description=f"{category.name}, стр. {page}"
+                        )
+                        links = self._harvest_page(category, page)
+                    if links is None:
+                        # Скорее всего, пропала сеть: продолжим с этой же страницы
+                        console.print(
+                            f"[bold red]❌ Не удалось загрузить категорию {category.name}, "
+                            f"сбор остановлен. При следующем запуске продолжим.[/bold red]"
+                        )
+                        interrupted = True
+                        break
+                    futures = [
+                        executor.submit(self._collect, category, link)
+                        for link in links
+                    ]
+                    for future in futures:
+                        if future.result():
+                            progress.advance(task)
+                    self._save_progress(category, page + 1)
+                    if self.remaining <= 0:
+                        break
+        except KeyboardInterrupt:
+            self._stopped.set()
+            interrupted = True
+            console.print(
+                "\n[bold yellow]Сбор прерван, при следующем запуске продолжим с этого места.[/bold yellow]"
+            )
+        finally:
+            # Начатые загрузки дожидаемся, чтобы не оставить недокачанные файлы
+            executor.shutdown(wait=True, cancel_futures=True)
+            throttle.set_rate(0)
+            self.stats.elapsed = time.perf_counter() - started
+        if interrupted and self.remaining > 0:
+            # Страница остается той же: уже скачанное с нее пропустим по истории
+            self._save_state()
+        else:
+            # Цель достигнута или во всех категориях кончились страницы
+            self._finish()
+        return self.stats
+
+    def _pages(self):
+        """Страницы категорий по кругу: 1-я каждой категории, затем 2-я и т. д.
+
+        Если число страниц категории узнать не удалось, отдает ее со
+        страницей None: это обрыв сбора, а не конец категории.
+        """
+        active = list(self.categories)
+        while active and self.remaining > 0 and not self._stopped.is_set():
+            for category in list(active):
+                page = self._state["pages"][category.url]
+                last_page = self._last_page(category)
+                if last_page is None:
+                    yield category, None
+                    return
+                if page > last_page:
+                    active.remove(category)
+                    continue
+                yield category, page
+
+    def _last_page(self, category: Category) -> int | None:
+        last_page = page_index.get(category.url)
+        if last_page is None:
+            last_page = fetch_page_count(category.url)
+            if last_page is not None:
+                page_index.set(category.url, last_page)
+        return last_page
+
+    def _harvest_page(self, category: Category, page: int) -> list[str] | None:
+        response = fetch(listing_page_url(category.url, page))
+        if not response:
+            return None
+        return [f"{BASE_URL}{href}" for href in parse_wallpaper_links(response.text)]
+
+    def _collect(self, category: Category, page_url: str) -> bool:
+        """Скачать обои со страницы в кэш и историю. True — если добавлены."""
+        # Место до цели занимаем до первого запроса: когда цель набрана
+        # (с учетом уже идущих загрузок), ссылки больше не разрешаются
+        with self._lock:
+            if self._stopped.is_set() or self._reserved >= self.remaining:
+                return False
+            self._reserved += 1
+        try:
+            image_url = get_image_url(
+                page_url, verbose=False, resolution=self.resolution
+            )
+            if not image_url:
+                return self._count(failed=1)
+            with self._lock:
+                duplicate = image_url in self._claimed or self.history_manager.contains(
+                    image_url
+                )
+                self._claimed.add(image_url)
+            if duplicate:
+                return self._count(skipped=1)
+            save_path = os.path.join(cache_dir, f"wallpaper_{time.time_ns()}.jpg")
+            stats = download_wallpaper(image_url, save_path, verbose=False)
+            if not stats:
+                return self._count(failed=1)
+            save_path = blob_store.add(save_path, stats.sha256)
+            self.history_manager.add_entry(
+                WallpaperHistory(image_url, save_path, category.name, stats.sha256)
+            )
+            return self._count(downloaded=1, size=stats.size - stats.resumed_from)
+        finally:
+            with self._lock:
+                self._reserved -= 1
+
+    def _count(
+        self, downloaded: int = 0, skipped: int = 0, failed: int = 0, size: int = 0
+    ) -> bool:
+        with self._lock:
+            self.stats.downloaded += downloaded
+            self.stats.skipped += skipped
+            self.stats.failed += failed
+            self.stats.bytes += size
+            self._state["downloaded"] += downloaded
+        return bool(downloaded)
+
+    def _save_progress(self, category: Category, next_page: int):
+        with self._lock:
+            self._state["pages"][category.url] = next_page
+        self._save_state()
+
+    def _save_state(self):
+        with self._lock:
+            state = dict(self._state, pages=dict(self._state["pages"]))
+        save_json_atomic(self.state_path, state)
+
+    def _finish(self):
+        try:
+            os.remove(self.state_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"Ошибка удаления {self.state_path}: {e}")
+
+
+def show_harvest_summary(stats: HarvestStats):
+    elapsed = stats.elapsed or 1e-9
+    table = Table(title="Итоги сбора")
+    table.add_column("Показатель", style="bold cyan")
+    table.add_column("Значение", justify="right", style="yellow")
+    table.add_row("Скачано обоев", str(stats.downloaded))
+    table.add_row("Уже были в истории", str(stats.skipped))
+    table.add_row("Ошибок", str(stats.failed))
+    table.add_row("Объем", f"{stats.bytes / 1024 / 1024:.1f} МБ")
+    table.add_row("Время", f"{stats.elapsed:.1f} с")
+    table.add_row("Обоев в минуту", f"{stats.downloaded / elapsed * 60:.1f}")
+    table.add_row("Скорость", f"{stats.bytes / elapsed / 1024 / 1024:.2f} МБ/с")
+    console.print(table)
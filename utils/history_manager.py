@@ -2,10 +2,14 @@ from dataclasses import asdict
 import json
 from os import path
 import os
+import sqlite3
 import sys
-from config import history_file, logger
+from config import history_db_file, history_file, logger
 from models import WallpaperHistory
+from utils.blob_store import blob_store
 from utils.config_manager import ConfigKey, ConfigManager
+from utils.history_store import HistoryStore
+from utils.phash import phash_index
 
 
 class WallpaperHistoryManager:
@@ -17,81 +21,121 @@ class WallpaperHistoryManager:
 
         self.history_file_path = history_file
 
-        self.history = self.load_history()
-
-    def load_history(self) -> list[WallpaperHistory | None]:
-        if not path.exists(self.history_file_path):
-            return []
-
         try:
-            with open(self.history_file_path, "r", encoding="utf-8") as f:
-                history_data = json.load(f)
-        except Exception as e:
+            self.store = HistoryStore(history_db_file)
+        except sqlite3.Error as e:
             logger.error(f"Ошибка загрузки истории: {e}")
             sys.exit(1)
 
+        self.migrate_json_history()
+
+    def migrate_json_history(self):
+        """Перенести history.json старого формата в базу и убрать его в .bak."""
+        if not path.exists(self.history_file_path):
+            return
+        if self.store.count() == 0:
+            self.import_json(self.history_file_path)
+        try:
+            os.replace(self.history_file_path, f"{self.history_file_path}.bak")
+        except OSError as e:
+            logger.error(f"Ошибка переименования {self.history_file_path}: {e}")
+
+    def import_json(self, file_path: str):
         try:
-            return [WallpaperHistory(**item) for item in history_data]
+            with open(file_path, "r", encoding="utf-8") as f:
+                history_data = json.load(f)
+            entries = [WallpaperHistory(**item) for item in history_data]
+            self.store.import_entries(entries)
         except Exception as e:
             logger.error(f"Ошибка загрузки истории: {e}")
             sys.exit(1)
 
-    def save_history(self):
-        # Применяем лимит, обновляем значение max_items в случае изменений
-        self.max_items = self.config_manager.get_value(ConfigKey.MAX_ITEMS)
-
-        if len(self.history) > self.max_items:
-            self.history = self.history[-self.max_items :]
+        self.save_history()
+        logger.info(f"История импортирована: {file_path}")
 
+    def export_json(self, file_path: str) -> bool:
+        """Выгрузить историю в JSON в прежнем формате (history.json)."""
         try:
-            with open(self.history_file_path, "w", encoding="utf-8") as f:
+            with open(file_path, "w", encoding="utf-8") as f:
                 json.dump(
-                    [asdict(item) for item in self.history],
+                    [asdict(item) for item in self.store.iter_entries()],
                     f,
                     ensure_ascii=False,
                     indent=4,
                 )
         except Exception as e:
             logger.error(f"Ошибка сохранения истории: {e}")
-            sys.exit(1)
+            return False
 
-        logger.info(f"История сохранена: {self.history_file_path}")
+        logger.info(f"История сохранена: {file_path}")
+        return True
 
-    def add_entry(self, wallpaper: WallpaperHistory):
-        if len(self.history) >= self.max_items:
-            item = self.history.pop(0)
-            if item.local_path:
-                try:
-                    os.remove(item.local_path)
-                    logger.info(f"Удален файл: {item.local_path}")
-                except Exception as e:
-                    logger.error(f"Ошибка удаления файла: {e}")
+    def save_history(self):
+        # Записи сохраняются при добавлении; здесь только применяем лимит,
+        # обновляем значение max_items в случае изменений
+        self.max_items = self.config_manager.get_value(ConfigKey.MAX_ITEMS)
 
-        # Проверяем, есть ли уже запись с этим url
-        if any(entry.url == wallpaper.url for entry in self.history):
+        try:
+            self.__remove_files(self.store.trim(self.max_items))
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка сохранения истории: {e}")
+            sys.exit(1)
+
+    def add_entry(self, wallpaper: WallpaperHistory):
+        # Вызывается и из фоновых потоков: ошибку базы только логируем
+        self.max_items = self.config_manager.get_value(ConfigKey.MAX_ITEMS)
+        try:
+            # Проверка на повтор url и вставка — одной транзакцией
+            evicted = self.store.append(wallpaper, self.max_items)
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка сохранения истории: {e}")
+            return
+        if evicted is None:
             logger.info(f"Запись уже есть: {wallpaper.url}")
             return
-
-        self.history.append(wallpaper)
         logger.info(f"Добавлена запись: {wallpaper}")
+        if not wallpaper.spanned:
+            # Кроме точного url запоминаем, как обои выглядят: сайт выкладывает
+            # одну картинку под разными адресами и в разных категориях
+            phash_index.add_file_async(wallpaper.local_path)
 
-        self.save_history()
+        self.__remove_files(evicted)
 
     def clear_history(self) -> []:
-        if not self.history:
+        if not self.store.count():
             logger.info("История уже пуста.")
             return
 
-        for wallpaper in self.history:
-            if wallpaper.local_path:
-                try:
-                    os.remove(wallpaper.local_path)
-                    logger.info(f"Удален файл: {wallpaper.local_path}")
-                except Exception as e:
-                    logger.error(f"Ошибка удаления файла: {e}")
+        self.__remove_files(self.store.clear())
+        blob_store.clear()
 
-        self.history = []
-        self.save_history()
+    def count(self) -> int:
+        return self.store.count()
+
+    def contains(self, url: str) -> bool:
+        return self.store.contains(url)
+
+    def get(self, index: int) -> WallpaperHistory:
+        return self.store.get(index)
+
+    def legacy_paths(self) -> set[str]:
+        return self.store.legacy_paths()
+
+    def has_digest(self, sha256: str) -> bool:
+        return self.store.has_digest(sha256)
 
     def get_history(self) -> list[WallpaperHistory | None]:
-        return self.history
+        """Вся история списком. Для больших историй лучше count()/get()."""
+        return list(self.store.iter_entries())
+
+    @staticmethod
+    def __remove_files(entries: list[WallpaperHistory]):
+        # Файлы из хранилища вытесняет само хранилище по бюджету байт,
+        # здесь удаляем только старые записи без хэша
+        for item in entries:
+            if item.local_path and not item.sha256:
+                try:
+                    os.remove(item.local_path)
+                    logger.info(f"Удален файл: {item.local_path}")
+                except Exception as e:
+                    logger.error(f"Ошибка удаления файла: {e}")
@@ -0,0 +1,176 @@
+import sqlite3
+from threading import RLock
+
+from models import WallpaperHistory
+
+# Сколько записей подгружаем за раз при навигации по истории
+WINDOW = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    seq INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    local_path TEXT NOT NULL,
+    category TEXT NOT NULL,
+    sha256 TEXT NOT NULL DEFAULT ''
+)
+"""
+# По хэшу ищутся файлы хранилища, о которых индекс кэша не успел узнать
+SHA256_INDEX = "CREATE INDEX IF NOT EXISTS history_sha256 ON history (sha256)"
+
+
+class HistoryStore:
+    """Хранилище истории в SQLite.
+
+    Записи получают возрастающий seq и удаляются только с головы, поэтому
+    живые seq всегда идут подряд: позиция index — это seq = head + index.
+    На старте читаются только границы, записи подгружаются окнами.
+    """
+
+    def __init__(self, db_path: str):
+        self._lock = RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(SCHEMA)
+            self._conn.execute(SHA256_INDEX)
+        head, tail = self._conn.execute(
+            "SELECT MIN(seq), MAX(seq) FROM history"
+        ).fetchone()
+        self._head = head or 1
+        self._tail = tail or 0
+        self._window: dict[int, WallpaperHistory] = {}
+
+    def count(self) -> int:
+        with self._lock:
+            return self._tail - self._head + 1
+
+    def get(self, index: int) -> WallpaperHistory:
+        with self._lock:
+            if not 0 <= index < self.count():
+                raise IndexError(index)
+            seq = self._head + index
+            if seq not in self._window:
+                self._load_window(seq)
+            return self._window[seq]
+
+    def contains(self, url: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM history WHERE url = ?", (url,)
+            ).fetchone()
+            return row is not None
+
+    def append(
+        self, entry: WallpaperHistory, max_items: int
+    ) -> list[WallpaperHistory] | None:
+        """Добавить запись и вытеснить лишние с головы.
+
+        Возвращает вытесненные записи или None, если такой url уже есть.
+        """
+        with self._lock, self._conn:
+            seq = self._tail + 1
+            if not self._insert(seq, entry):
+                return None
+            self._tail = seq
+            self._window[seq] = entry
+            return self._trim(max_items)
+
+    def trim(self, max_items: int) -> list[WallpaperHistory]:
+        with self._lock, self._conn:
+            return self._trim(max_items)
+
+    def clear(self) -> list[WallpaperHistory]:
+        """Удалить все записи. Возвращает записи без хэша (старый формат)."""
+        with self._lock, self._conn:
+            legacy = self._rows(
+                "SELECT url, local_path, category, sha256 FROM history"
+                " WHERE sha256 = ''"
+            )
+            self._conn.execute("DELETE FROM history")
+            self._head, self._tail = 1, 0
+            self._window.clear()
+            return legacy
+
+    def has_digest(self, sha256: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM history WHERE sha256 = ? LIMIT 1", (sha256,)
+            ).fetchone()
+            return row is not None
+
+    def legacy_paths(self) -> set[str]:
+        """Файлы записей без хэша: они лежат вне хранилища изображений."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT local_path FROM history WHERE sha256 = ''"
+            ).fetchall()
+            return {row[0] for row in rows}
+
+    def iter_entries(self):
+        """Все записи по порядку, пачками по WINDOW."""
+        seq = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT seq, url, local_path, category, sha256 FROM history"
+                    " WHERE seq > ? ORDER BY seq LIMIT ?",
+                    (seq, WINDOW),
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                seq = row[0]
+                yield WallpaperHistory(*row[1:])
+
+    def import_entries(self, entries: list[WallpaperHistory]):
+        """Загрузить записи одной транзакцией (для перехода со старого формата)."""
+        with self._lock, self._conn:
+            for entry in entries:
+                if self._insert(self._tail + 1, entry):
+                    self._tail += 1
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _insert(self, seq: int, entry: WallpaperHistory) -> bool:
+        """Вставить запись, если такого url еще нет. True — если вставлена."""
+        cursor = self._conn.execute(
+            "INSERT OR IGNORE INTO history (seq, url, local_path, category, sha256)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (seq, entry.url, entry.local_path, entry.category, entry.sha256),
+        )
+        return cursor.rowcount > 0
+
+    def _trim(self, max_items: int) -> list[WallpaperHistory]:
+        if self.count() <= max_items:
+            return []
+        new_head = self._tail - max_items + 1
+        evicted = self._rows(
+            "SELECT url, local_path, category, sha256 FROM history"
+            " WHERE seq < ? ORDER BY seq",
+            (new_head,),
+        )
+        self._conn.execute("DELETE FROM history WHERE seq < ?", (new_head,))
+        self._window = {s: e for s, e in self._window.items() if s >= new_head}
+        self._head = new_head
+        return evicted
+
+    def _load_window(self, seq: int):
+        if len(self._window) > WINDOW * 4:
+            self._window.clear()
+        start = max(seq - WINDOW // 2, self._head)
+        rows = self._conn.execute(
+            "SELECT seq, url, local_path, category, sha256 FROM history"
+            " WHERE seq BETWEEN ? AND ?",
+            (start, start + WINDOW - 1),
+        ).fetchall()
+        for row in rows:
+            self._window[row[0]] = WallpaperHistory(*row[1:])
+
+    def _rows(self, query: str, params: tuple = ()) -> list[WallpaperHistory]:
+        return [
+            WallpaperHistory(*row) for row in self._conn.execute(query, params)
+        ]
@@ -0,0 +1,155 @@
+import hashlib
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from importlib.util import find_spec
+from os import path
+from threading import Lock
+from typing import Callable
+
+from config import logger
+
+# Сам Pillow и numpy импортируются только в процессах пула
+HAS_PILLOW = find_spec("PIL") is not None
+HAS_NUMPY = find_spec("numpy") is not None
+
+JPEG_QUALITY = 88
+
+
+def variant_path(original: str, size: tuple[int, int]) -> str:
+    """Подогнанная копия лежит рядом с оригиналом: <имя>.<W>x<H>.jpg."""
+    stem = path.splitext(original)[0]
+    return f"{stem}.{size[0]}x{size[1]}.jpg"
+
+
+def fit_image(src: str, dst: str, size: tuple[int, int]) -> str:
+    """Декодировать, обрезать/масштабировать под экран и сохранить в JPEG.
+
+    Выполняется в отдельном процессе, поэтому не трогает глобальное состояние.
+    """
+    _save_jpeg(_load_fitted(src, size), dst)
+    return dst
+
+
+def compose_span(
+    sources: list[str], monitors: list[tuple[int, int, int, int]], dst: str
+) -> tuple[str, str]:
+    """Собрать одно полотно на все мониторы: каждое изображение — под свой.
+
+    monitors — (x, y, ширина, высота) на общем рабочем столе. Возвращает
+    путь и sha256 готового файла. Выполняется в отдельном процессе.
+    """
+    from PIL import Image
+
+    left = min(x for x, _, _, _ in monitors)
+    top = min(y for _, y, _, _ in monitors)
+    width = max(x + w for x, _, w, _ in monitors) - left
+    height = max(y + h for _, y, _, h in monitors) - top
+    tiles = [
+        (_load_fitted(src, (w, h)), x - left, y - top)
+        for src, (x, y, w, h) in zip(sources, monitors)
+    ]
+    if HAS_NUMPY:
+        import numpy as np
+
+        # Полотно — один массив, каждый монитор копируется срезом целиком
+        canvas = np.zeros((height, width, 3), dtype=np.uint8)
+        for tile, x, y in tiles:
+            canvas[y : y + tile.height, x : x + tile.width] = np.asarray(tile)
+        image = Image.fromarray(canvas)
+    else:
+        image = Image.new("RGB", (width, height))
+        for tile, x, y in tiles:
+            image.paste(tile, (x, y))
+    _save_jpeg(image, dst)
+    digest = hashlib.sha256()
+    with open(dst, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return dst, digest.hexdigest()
+
+
+def _load_fitted(src: str, size: tuple[int, int]):
+    from PIL import Image, ImageOps
+
+    with Image.open(src) as image:
+        # JPEG сразу декодируется в уменьшенном масштабе, если это возможно
+        image.draft("RGB", size)
+        return ImageOps.fit(image.convert("RGB"), size, method=Image.Resampling.LANCZOS)
+
+
+def _save_jpeg(image, dst: str):
+    tmp_path = f"{dst}.tmp"
+    image.save(tmp_path, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    os.replace(tmp_path, dst)
+
+
+class ImageFitter:
+    """Подгонка скачанных обоев под экран в пуле процессов."""
+
+    def __init__(
+        self,
+        size: tuple[int, int] | None = None,
+        workers: int = 2,
+        on_variant: Callable[[str, str], None] | None = None,
+    ):
+        self.size = size
+        self.workers = workers
+        # Вызывается с (digest, имя файла), когда подогнанная копия готова
+        self.on_variant = on_variant
+        self._executor: ProcessPoolExecutor | None = None
+        self._pending: dict[str, Future] = {}
+        self._lock = Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return HAS_PILLOW and self.size is not None
+
+    def submit(self, original: str, digest: str = "") -> Future | None:
+        """Запустить подгонку в фоне; None — если она не нужна или уже есть."""
+        if not self.enabled:
+            return None
+        dst = variant_path(original, self.size)
+        if path.exists(dst):
+            return None
+        with self._lock:
+            if dst in self._pending:
+                return self._pending[dst]
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            future = self._executor.submit(fit_image, original, dst, self.size)
+            self._pending[dst] = future
+        future.add_done_callback(lambda f: self._on_done(dst, digest, f))
+        return future
+
+    def compose(self, sources: list[str], monitors: list, dst: str) -> Future:
+        """Собрать полотно на несколько мониторов в пуле процессов."""
+        geometry = [(m.x, m.y, m.width, m.height) for m in monitors]
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor.submit(compose_span, sources, geometry, dst)
+
+    def fitted(self, original: str) -> str:
+        """Путь к подогнанной копии, если она готова, иначе к оригиналу."""
+        if not self.enabled:
+            return original
+        dst = variant_path(original, self.size)
+        return dst if path.exists(dst) else original
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _on_done(self, dst: str, digest: str, future: Future):
+        with self._lock:
+            self._pending.pop(dst, None)
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error:
+            logger.error(f"Ошибка подгонки изображения: {error}")
+            return
+        if digest and self.on_variant:
+            self.on_variant(digest, path.basename(dst))
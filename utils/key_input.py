@@ -0,0 +1,102 @@
+import time
+from contextlib import contextmanager
+from queue import Empty, Queue
+from threading import Lock
+from typing import TYPE_CHECKING, Generic, TypeVar
+
+if TYPE_CHECKING:
+    import keyboard
+
+T = TypeVar("T")
+
+# Повторы удерживаемой клавиши идут чаще; более долгая пауза значит, что
+# отпускание клавиши потерялось и это новое нажатие
+REPEAT_GAP = 0.5
+# Сколько последних замеров задержки держим для статистики
+LATENCY_WINDOW = 100
+
+
+class KeyInput(Generic[T]):
+    """Ввод с клавиатуры через колбэки keyboard и очередь событий.
+
+    Колбэк только кладет действие в очередь, поэтому поток ввода никогда не
+    ждет основной цикл, а основной цикл не опрашивает клавиатуру.
+    """
+
+    def __init__(self, key_map: dict[str, T]):
+        self.key_map = key_map
+        self._queue: Queue[tuple[T, float]] = Queue()
+        self._lock = Lock()
+        # Клавиша -> время последнего "down", пока она не отпущена
+        self._held: dict[str, float] = {}
+        self._suspended = 0
+        self._hooked = False
+        self._latencies: list[float] = []
+
+    def start(self):
+        with self._lock:
+            if self._hooked:
+                return
+            # keyboard нужен только интерактивному режиму: демон его не грузит
+            import keyboard
+
+            keyboard.hook(self._on_event)
+            self._hooked = True
+
+    def get(self, timeout: float | None = None) -> T | None:
+        """Следующее действие; None — если за timeout ничего не нажали."""
+        self.start()
+        try:
+            action, pressed_at = self._queue.get(timeout=timeout)
+        except Empty:
+            return None
+        latency = time.time() - pressed_at
+        with self._lock:
+            self._latencies.append(latency)
+            del self._latencies[:-LATENCY_WINDOW]
+        return action
+
+    @contextmanager
+    def suspended(self):
+        """Не принимать клавиши, пока идет ввод текста в подсказках."""
+        with self._lock:
+            self._suspended += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._suspended -= 1
+            self.clear()
+
+    def clear(self):
+        while True:
+            try:
+                self._queue.get_nowait()
+            except Empty:
+                return
+
+    def latency(self) -> tuple[float, float]:
+        """Средняя и максимальная задержка от нажатия до обработки (сек)."""
+        with self._lock:
+            latencies = list(self._latencies)
+        if not latencies:
+            return 0.0, 0.0
+        return sum(latencies) / len(latencies), max(latencies)
+
+    def _on_event(self, event: "keyboard.KeyboardEvent"):
+        name = event.name
+        if event.event_type == "up":
+            with self._lock:
+                self._held.pop(name, None)
+            return
+
+        with self._lock:
+            last = self._held.get(name)
+            self._held[name] = event.time
+            if last is not None and event.time - last < REPEAT_GAP:
+                return  # автоповтор удерживаемой клавиши
+            if self._suspended:
+                return
+        action = self.key_map.get(name)
+        if action is not None:
+            self._queue.put((action, event.time))
@@ -0,0 +1,87 @@
+import random
+from threading import Lock, Thread
+from typing import Callable
+
+from config import link_pool_file, logger
+from utils.storage import load_json, save_json_atomic
+
+# Ниже этого числа ссылок пул категории пополняется в фоне
+LOW_WATERMARK = 10
+# Верхняя граница пула одной категории, чтобы файл не разрастался
+MAX_LINKS = 500
+
+
+class WallpaperLinkPool:
+    """Пул собранных ссылок на страницы обоев по категориям."""
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._lock = Lock()
+        self._pools: dict[str, list[str]] = load_json(file_path, {})
+        self._dirty = False
+        self._refilling: set[str] = set()
+
+    def size(self, category_url: str) -> int:
+        with self._lock:
+            return len(self._pools.get(category_url, []))
+
+    def take(self, category_url: str) -> str | None:
+        """Достать случайную ссылку из пула категории."""
+        with self._lock:
+            links = self._pools.get(category_url)
+            if not links:
+                return None
+            # Меняем местами со случайным элементом и снимаем с конца — O(1)
+            i = random.randrange(len(links))
+            links[i], links[-1] = links[-1], links[i]
+            self._dirty = True
+            return links.pop()
+
+    def add(self, category_url: str, links: list[str]):
+        with self._lock:
+            pool = self._pools.setdefault(category_url, [])
+            known = set(pool)
+            for link in links:
+                if link not in known and len(pool) < MAX_LINKS:
+                    pool.append(link)
+                    known.add(link)
+            self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {url: list(links) for url, links in self._pools.items()}
+            self._dirty = False
+        save_json_atomic(self.file_path, data)
+
+    def refill_async(
+        self, category_url: str, harvest: Callable[[str], list[str] | None]
+    ):
+        """Пополнить пул категории в фоне, если он почти пуст."""
+        with self._lock:
+            if (
+                len(self._pools.get(category_url, [])) >= LOW_WATERMARK
+                or category_url in self._refilling
+            ):
+                return
+            self._refilling.add(category_url)
+        Thread(
+            target=self._refill, args=(category_url, harvest), daemon=True
+        ).start()
+
+    def _refill(self, category_url: str, harvest: Callable[[str], list[str] | None]):
+        try:
+            links = harvest(category_url)
+            if links:
+                self.add(category_url, links)
+                self.save()
+                logger.info(f"Пул {category_url} пополнен: +{len(links)}")
+        except Exception as e:
+            logger.error(f"Ошибка пополнения пула {category_url}: {e}")
+        finally:
+            with self._lock:
+                self._refilling.discard(category_url)
+
+
+link_pool = WallpaperLinkPool(link_pool_file)
@@ -0,0 +1,217 @@
+import json
+import time
+from collections import deque
+from dataclasses import dataclass
+from threading import Lock
+
+from config import logger, profile_file
+
+# Сколько последних замеров каждого этапа учитывается в перцентилях
+WINDOW = 500
+# Сколько строк выводить из профиля и tracemalloc
+PROFILE_TOP = 15
+
+
+@dataclass
+class StageStats:
+    name: str
+    count: int
+    errors: int
+    p50: float
+    p95: float
+    p99: float
+    total_bytes: int
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    """Перцентиль методом ближайшего ранга по отсортированному списку."""
+    if not ordered:
+        return 0.0
+    rank = max(int(round(q * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+class Span:
+    """Замер одного этапа: with metrics.span("fetch", url=url) as span: ..."""
+
+    __slots__ = ("metrics", "name", "meta", "started")
+
+    def __init__(self, metrics: "Metrics", name: str, meta: dict):
+        self.metrics = metrics
+        self.name = name
+        self.meta = meta
+        self.started = 0.0
+
+    def set(self, **meta):
+        """Добавить метаданные: байты, статус, число повторов и т. п."""
+        self.meta.update(meta)
+
+    def __enter__(self) -> "Span":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.meta["error"] = exc_type.__name__
+        self.metrics.record(self.name, time.perf_counter() - self.started, **self.meta)
+        return False
+
+
+class Metrics:
+    """Скользящая статистика времени по этапам и необязательный JSONL-трейс."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._durations: dict[str, deque[float]] = {}
+        self._counts: dict[str, int] = {}
+        self._errors: dict[str, int] = {}
+        self._bytes: dict[str, int] = {}
+        self._trace_path = ""
+        self._trace = None
+
+    def span(self, name: str, **meta) -> Span:
+        return Span(self, name, meta)
+
+    def record(self, name: str, duration: float, **meta):
+        with self._lock:
+            if name not in self._durations:
+                self._durations[name] = deque(maxlen=WINDOW)
+                self._counts[name] = self._errors[name] = self._bytes[name] = 0
+            self._durations[name].append(duration)
+            self._counts[name] += 1
+            if meta.get("error"):
+                self._errors[name] += 1
+            self._bytes[name] += meta.get("bytes") or 0
+            if self._trace is not None:
+                record = {"ts": time.time(), "stage": name, "duration": duration}
+                record.update(meta)
+                self._trace.write(json.dumps(record, ensure_ascii=False, default=str))
+                self._trace.write("\n")
+
+    def summary(self) -> list[StageStats]:
+        with self._lock:
+            stats = []
+            for name, durations in self._durations.items():
+                ordered = sorted(durations)
+                stats.append(
+                    StageStats(
+                        name,
+                        self._counts[name],
+                        self._errors[name],
+                        _percentile(ordered, 0.50),
+                        _percentile(ordered, 0.95),
+                        _percentile(ordered, 0.99),
+                        self._bytes[name],
+                    )
+                )
+            return stats
+
+    def reset(self):
+        with self._lock:
+            self._durations.clear()
+            self._counts.clear()
+            self._errors.clear()
+            self._bytes.clear()
+
+    def set_trace_file(self, file_path: str):
+        """Писать каждый замер строкой JSON в file_path; пустой путь — выключить."""
+        with self._lock:
+            if file_path == self._trace_path:
+                return
+            if self._trace is not None:
+                self._trace.close()
+                self._trace = None
+            self._trace_path = file_path
+            if file_path:
+                try:
+                    # Построчная буферизация: трейс читаем, пока программа работает
+                    self._trace = open(file_path, "a", encoding="utf-8", buffering=1)
+                except OSError as e:
+                    logger.error(f"Ошибка открытия файла трейса {file_path}: {e}")
+
+    def close(self):
+        self.set_trace_file("")
+
+
+class HotPathProfiler:
+    """cProfile и tracemalloc вокруг горячего пути, включается настройкой.
+
+    Профиль копится между нажатиями и сохраняется в файл для snakeviz/pstats
+    при показе статистики, выключении профилирования и выходе (save).
+    """
+
+    def __init__(self, output_path: str):
+        self.output_path = output_path
+        self.enabled = False
+        self.top_allocations: list[str] = []
+        self._profile = None
+        # tracemalloc запущен нами, а не кем-то еще: нам его и останавливать
+        self._started_tracing = False
+
+    def set_enabled(self, enabled: bool):
+        """Включить или выключить; при выключении профиль сохраняется и сбрасывается."""
+        if enabled == self.enabled:
+            return
+        self.enabled = enabled
+        if enabled:
+            return
+        self.save()
+        self._profile = None
+        self.top_allocations = []
+        if self._started_tracing:
+            import tracemalloc
+
+            # Трассировка замедляет все выделения памяти в процессе
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def save(self):
+        if self._profile is None:
+            return
+        try:
+            self._profile.dump_stats(self.output_path)
+        except OSError as e:
+            logger.error(f"Ошибка сохранения профиля {self.output_path}: {e}")
+
+    def __enter__(self):
+        if not self.enabled:
+            return self
+        import cProfile
+        import tracemalloc
+
+        if self._profile is None:
+            self._profile = cProfile.Profile()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._snapshot = tracemalloc.take_snapshot()
+        self._profile.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        if not self.enabled or self._profile is None:
+            return False
+        import tracemalloc
+
+        self._profile.disable()
+        diff = tracemalloc.take_snapshot().compare_to(self._snapshot, "lineno")
+        # Где больше всего выделено памяти за последнее нажатие
+        self.top_allocations = [str(line) for line in diff[:PROFILE_TOP]]
+        return False
+
+    def report(self) -> str:
+        """Самые затратные функции из накопленного профиля."""
+        if self._profile is None:
+            return ""
+        import io
+        import pstats
+
+        stream = io.StringIO()
+        pstats.Stats(self._profile, stream=stream).sort_stats(
+            "cumulative"
+        ).print_stats(PROFILE_TOP)
+        return stream.getvalue()
+
+
+metrics = Metrics()
+hot_path_profiler = HotPathProfiler(profile_file)
@@ -0,0 +1,72 @@
+import asyncio
+import os
+
+from config import logger
+from models import Category, WallpaperHistory
+from utils.fetcher import DEFAULT_CONCURRENCY, DEFAULT_POOL_SIZE
+from utils.screen import Monitor
+
+
+def parse_monitor_categories(value: str) -> list[int]:
+    """'3, 5' -> [3, 5]: номера категорий из списка по мониторам слева направо."""
+    return [int(part) for part in value.replace(",", " ").split()]
+
+
+def pick_categories(
+    categories: list[Category], numbers: list[int], default: Category, count: int
+) -> list[Category]:
+    """Категория для каждого из count мониторов; без настройки — default на всех."""
+    chosen = [
+        categories[n - 1] if 1 <= n <= len(categories) else default for n in numbers
+    ] or [default]
+    # Если номеров меньше, чем мониторов, повторяем их по кругу
+    return [chosen[i % len(chosen)] for i in range(count)]
+
+
+def fetch_parts(
+    categories: list[Category],
+    monitors: tuple[Monitor, ...],
+    cache_dir: str,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    pool_size: int = DEFAULT_POOL_SIZE,
+) -> list[WallpaperHistory] | None:
+    """Скачать обои под каждый монитор одновременно.
+
+    Общее время — как у одной самой долгой загрузки, а не сумма. Если хоть
+    одна часть не скачалась, остальные удаляются и возвращается None.
+    """
+    parts = asyncio.run(
+        _fetch_parts(categories, monitors, cache_dir, concurrency, pool_size)
+    )
+    for i, part in enumerate(parts):
+        if isinstance(part, BaseException):
+            logger.error(f"Ошибка загрузки обоев для монитора {i + 1}: {part}")
+            parts[i] = None
+    if all(parts):
+        return parts
+    remove_parts(part for part in parts if part)
+    return None
+
+
+async def _fetch_parts(categories, monitors, cache_dir, concurrency, pool_size):
+    # Тяжелый модуль нужен только в режиме нескольких мониторов
+    from utils.async_engine import AsyncEngine
+
+    # На каждый монитор — свой запрос, иначе загрузки встанут в очередь
+    async with AsyncEngine(max(concurrency, len(monitors)), pool_size) as engine:
+        # Ошибка одной части не должна бросать уже скачанные остальные
+        return await asyncio.gather(
+            *(
+                engine.prepare(category, cache_dir, monitor.resolution)
+                for category, monitor in zip(categories, monitors)
+            ),
+            return_exceptions=True,
+        )
+
+
+def remove_parts(parts):
+    for part in parts:
+        try:
+            os.remove(part.local_path)
+        except OSError as e:
+            logger.error(f"Ошибка удаления части обоев: {e}")
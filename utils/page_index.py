@@ -0,0 +1,100 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock, Thread
+
+from config import logger, page_index_file
+from models import Category
+from utils.fetcher import fetch
+from utils.storage import load_json, save_json_atomic
+
+DEFAULT_TTL = 24 * 60 * 60
+REFRESH_WORKERS = 4
+
+
+def parse_last_page(markup: str) -> int:
+    """Номер последней страницы категории по пагинатору."""
+    # bs4 грузится при первом разборе, а не при старте программы
+    from utils.parser import PAGER, parse_html
+
+    pager_items = parse_html(markup, PAGER).select(".pager__item")
+    if len(pager_items) >= 4:
+        href = pager_items[3].select_one("a")["href"]
+        return int(href.split("page")[-1])
+    return 1
+
+
+def fetch_page_count(category_url: str) -> int | None:
+    response = fetch(category_url)
+    if not response:
+        return None
+    try:
+        return parse_last_page(response.text)
+    except (KeyError, TypeError, ValueError) as e:
+        logger.error(f"Не удалось определить число страниц {category_url}: {e}")
+        return None
+
+
+class PageCountIndex:
+    """Кэш количества страниц по категориям, хранится на диске."""
+
+    def __init__(self, file_path: str, ttl: int = DEFAULT_TTL):
+        self.file_path = file_path
+        self.ttl = ttl
+        self._lock = Lock()
+        self._entries: dict[str, dict] = load_json(file_path, {})
+        self._refresh_thread: Thread | None = None
+
+    def _is_fresh(self, entry: dict | None) -> bool:
+        return bool(entry) and time.time() - entry["updated"] < self.ttl
+
+    def get(self, category_url: str) -> int | None:
+        """Количество страниц, если запись есть и не устарела."""
+        with self._lock:
+            entry = self._entries.get(category_url)
+            return entry["pages"] if self._is_fresh(entry) else None
+
+    def set(self, category_url: str, pages: int, save: bool = True):
+        with self._lock:
+            self._entries[category_url] = {"pages": pages, "updated": time.time()}
+        if save:
+            self.save()
+
+    def invalidate(self, category_url: str):
+        with self._lock:
+            removed = self._entries.pop(category_url, None)
+        if removed:
+            self.save()
+
+    def save(self):
+        with self._lock:
+            data = dict(self._entries)
+        save_json_atomic(self.file_path, data)
+
+    def refresh_async(self, categories: list[Category]):
+        """Фоном обновить устаревшие записи для всех категорий."""
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return
+        self._refresh_thread = Thread(
+            target=self.refresh, args=(categories,), daemon=True
+        )
+        self._refresh_thread.start()
+
+    def refresh(self, categories: list[Category]):
+        with self._lock:
+            stale = [
+                c.url
+                for c in categories
+                if not self._is_fresh(self._entries.get(c.url))
+            ]
+        if not stale:
+            return
+
+        with ThreadPoolExecutor(max_workers=REFRESH_WORKERS) as executor:
+            for url, pages in zip(stale, executor.map(fetch_page_count, stale)):
+                if pages is not None:
+                    self.set(url, pages, save=False)
+        self.save()
+        logger.info(f"Индекс страниц обновлен: {len(stale)} категорий")
+
+
+page_index = PageCountIndex(page_index_file)
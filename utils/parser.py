@@ -0,0 +1,28 @@
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from utils.metrics import metrics
+
+try:
+    import lxml  # noqa: F401
+
+    PARSER = "lxml"
+except ImportError:
+    PARSER = "html.parser"
+
+# Поддеревья страниц, которые реально нужны при разборе. Всё остальное
+# (шапка, скрипты, подвал) парсер пропускает и не строит в памяти.
+FILTERS = SoupStrainer(class_=["filters", "content-sidebar_shift"])
+PAGER = SoupStrainer(class_=re.compile(r"^pager"))
+WALLPAPER_LINKS = SoupStrainer("a", class_="wallpapers__link")
+WALLPAPER_INFO = SoupStrainer(class_=["wallpaper-info", "gui-toolbar"])
+WALLPAPER = SoupStrainer(class_="wallpaper")
+
+
+def parse_html(
+    markup: str, only: SoupStrainer | None = None, parser: str | None = None
+) -> BeautifulSoup:
+    """Разобрать HTML быстрым парсером, по возможности только нужные поддеревья."""
+    with metrics.span("parse", bytes=len(markup)):
+        return BeautifulSoup(markup, parser or PARSER, parse_only=only)
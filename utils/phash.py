@@ -0,0 +1,194 @@
+import io
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
+from threading import Lock
+
+from config import logger, phash_index_file
+from utils.storage import load_json, save_json_atomic
+
+HAS_PILLOW = find_spec("PIL") is not None
+HAS_NUMPY = find_spec("numpy") is not None
+
+HASH_SIZE = 8
+# 64-битный хэш делится на BANDS полос. Если хэши отличаются не больше
+# чем в MAX_DISTANCE < BANDS битах, хотя бы одна полоса совпадает целиком
+BANDS = 4
+BAND_BITS = HASH_SIZE * HASH_SIZE // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+MAX_DISTANCE = 3
+MAX_ENTRIES = 100_000
+# Сколько свежих хэшей проверяем перебором, прежде чем разложить по полосам
+MERGE_EVERY = 64
+# Сколько новых хэшей копим перед записью на диск
+SAVE_EVERY = 10
+
+
+def dhash(source: str | bytes) -> int:
+    """Разностный хэш: 64 бита — ярче ли пиксель соседа справа на 9x8 копии.
+
+    Почти не меняется при масштабировании и пережатии, поэтому у превью
+    и полного изображения он совпадает или отличается на пару бит.
+    """
+    from PIL import Image
+
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    with Image.open(source) as image:
+        # JPEG сразу декодируется в уменьшенном масштабе — это в разы быстрее
+        image.draft("L", (HASH_SIZE * 8, HASH_SIZE * 8))
+        small = image.convert("L").resize(
+            (HASH_SIZE + 1, HASH_SIZE), Image.Resampling.BILINEAR
+        )
+    if HAS_NUMPY:
+        import numpy as np
+
+        pixels = np.asarray(small, dtype=np.int16)
+        bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+        return int.from_bytes(np.packbits(bits).tobytes(), "big")
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(HASH_SIZE):
+        for col in range(HASH_SIZE):
+            left = pixels[row * (HASH_SIZE + 1) + col]
+            value = (value << 1) | (pixels[row * (HASH_SIZE + 1) + col + 1] > left)
+    return value
+
+
+class PerceptualIndex:
+    """Индекс перцептивных хэшей уже показанных обоев с поиском похожих.
+
+    Хэши лежат в array, для каждой из BANDS полос — отсортированные значения
+    полосы и позиции хэшей (около 32 байт на хэш). Поиск — бинарный поиск
+    в BANDS массивах и проверка хвоста свежих хэшей, поэтому его цена почти
+    не зависит от размера индекса. Файл читается при первом обращении.
+    """
+
+    def __init__(self, file_path: str, max_distance: int = MAX_DISTANCE):
+        self.file_path = file_path
+        self.max_distance = max_distance
+        self.enabled = HAS_PILLOW
+        self._lock = Lock()
+        self._loaded = False
+        self._unsaved = 0
+        self._hashes = array("Q")
+        self._keys = [array("H") for _ in range(BANDS)]
+        self._order = [array("I") for _ in range(BANDS)]
+        # Хэши с позиции _merged еще не разложены по полосам
+        self._merged = 0
+        # Растет при вытеснении старых хэшей: позиции в полосах устаревают
+        self._epoch = 0
+        self._executor: ThreadPoolExecutor | None = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._hashes)
+
+    def find(self, value: int) -> int | None:
+        """Ближайший хэш на расстоянии не больше max_distance или None."""
+        with self._lock:
+            return self._find(value)
+
+    def add(self, value: int) -> bool:
+        """Добавить хэш. False — если такой или очень похожий уже есть."""
+        snapshot = None
+        with self._lock:
+            # Проверка и вставка под одной блокировкой: два похожих хэша
+            # из разных потоков не попадут в индекс оба
+            if self._find(value) is not None:
+                return False
+            self._hashes.append(value)
+            if len(self._hashes) > MAX_ENTRIES:
+                # Убираем самую старую десятую часть разом: позиции сдвигаются
+                del self._hashes[: MAX_ENTRIES // 10]
+                self._epoch += 1
+                self._set_bands(self._hashes, _build_bands(self._hashes))
+            elif len(self._hashes) - self._merged >= MERGE_EVERY:
+                snapshot, epoch = self._hashes[:], self._epoch
+            self._unsaved += 1
+            need_save = self._unsaved >= SAVE_EVERY
+        if snapshot is not None:
+            # Полосы строятся без блокировки, поиск тем временем смотрит хвост
+            bands = _build_bands(snapshot)
+            with self._lock:
+                if epoch == self._epoch and len(snapshot) > self._merged:
+                    self._set_bands(snapshot, bands)
+        if need_save:
+            self.save()
+        return True
+
+    def add_file_async(self, file_path: str):
+        """Посчитать хэш скачанного файла в фоне и добавить в индекс."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1)
+            self._executor.submit(self._add_file, file_path)
+
+    def save(self):
+        with self._lock:
+            if not self._unsaved:
+                return
+            data = [f"{value:016x}" for value in self._hashes]
+            self._unsaved = 0
+        save_json_atomic(self.file_path, data)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        self.save()
+
+    def _add_file(self, file_path: str):
+        try:
+            self.add(dhash(file_path))
+        except Exception as e:
+            logger.error(f"Ошибка хэширования {file_path}: {e}")
+
+    def _find(self, value: int) -> int | None:
+        self._ensure_loaded()
+        candidates = list(range(self._merged, len(self._hashes)))
+        for band, keys, order in zip(_bands(value), self._keys, self._order):
+            lo = bisect_left(keys, band)
+            candidates.extend(order[lo : bisect_right(keys, band, lo)])
+        best, best_distance = None, self.max_distance + 1
+        for position in candidates:
+            candidate = self._hashes[position]
+            distance = (candidate ^ value).bit_count()
+            if distance < best_distance:
+                best, best_distance = candidate, distance
+        return best
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        self._hashes.extend(int(value, 16) for value in load_json(self.file_path, []))
+        self._set_bands(self._hashes, _build_bands(self._hashes))
+
+    def _set_bands(self, hashes: array, bands: tuple[list, list]):
+        self._keys, self._order = bands
+        self._merged = len(hashes)
+
+
+def _build_bands(hashes: array) -> tuple[list[array], list[array]]:
+    """Отсортированные значения каждой полосы и позиции хэшей: O(n log n)."""
+    keys_by_band, order_by_band = [], []
+    for i in range(BANDS):
+        shift = i * BAND_BITS
+        keys = [(value >> shift) & BAND_MASK for value in hashes]
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        order_by_band.append(array("I", order))
+        keys_by_band.append(array("H", [keys[p] for p in order]))
+    return keys_by_band, order_by_band
+
+
+def _bands(value: int) -> list[int]:
+    return [(value >> (i * BAND_BITS)) & BAND_MASK for i in range(BANDS)]
+
+
+phash_index = PerceptualIndex(phash_index_file)
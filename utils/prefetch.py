@@ -0,0 +1,178 @@
+import asyncio
+from collections import deque
+from threading import Condition, Event, Thread
+
+from config import logger
+from models import Category, WallpaperHistory
+from utils.blob_store import blob_store
+from utils.fetcher import DEFAULT_CONCURRENCY, DEFAULT_POOL_SIZE
+from utils.image_fit import ImageFitter
+
+# Пауза после неудачной попытки, чтобы не долбить сайт
+RETRY_DELAY = 5
+
+
+class WallpaperPrefetcher:
+    """Фоновая очередь уже скачанных обоев для выбранной категории."""
+
+    def __init__(
+        self,
+        cache_dir: str,
+        depth: int,
+        resolution: str | None = None,
+        fitter: ImageFitter | None = None,
+    ):
+        self.cache_dir = cache_dir
+        self.fitter = fitter
+        self.depth = max(depth, 0)
+        self.resolution = resolution
+        # Параметры асинхронного движка, применяются при старте воркера
+        self.concurrency = DEFAULT_CONCURRENCY
+        self.pool_size = DEFAULT_POOL_SIZE
+        self.category: Category | None = None
+
+        self._queue: deque[WallpaperHistory] = deque()
+        self._cond = Condition()
+        # Растёт при смене категории, чтобы отбросить результаты "старых" загрузок
+        self._generation = 0
+        self._stopped = Event()
+        self._thread: Thread | None = None
+
+    def set_category(self, category: Category):
+        """Сменить категорию: очередь сбрасывается и наполняется заново."""
+        with self._cond:
+            if self.category == category:
+                return
+            self.category = category
+            self._generation += 1
+            self._discard_queue()
+            self._cond.notify_all()
+        self._ensure_started()
+
+    def set_depth(self, depth: int):
+        with self._cond:
+            self.depth = max(depth, 0)
+            while len(self._queue) > self.depth:
+                self._remove_file(self._queue.pop())
+            self._cond.notify_all()
+
+    def pop(self) -> WallpaperHistory | None:
+        """Забрать готовые обои из очереди, не дожидаясь загрузки."""
+        with self._cond:
+            if not self._queue:
+                return None
+            item = self._queue.popleft()
+            self._cond.notify_all()
+        # Обои уходят в историю: файл больше не запасной
+        blob_store.keep(item.sha256)
+        blob_store.unpin(item.sha256)
+        return item
+
+    def wait_ready(self, timeout: float | None = None) -> bool:
+        """Дождаться, пока в очереди появятся готовые обои."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self._queue or self._stopped.is_set(), timeout
+            ) and bool(self._queue)
+
+    def size(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+    def stop(self):
+        """Остановить воркер и удалить неиспользованные файлы."""
+        self._stopped.set()
+        with self._cond:
+            self._discard_queue()
+            self._cond.notify_all()
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = Thread(target=self._worker, daemon=True)
+            self._thread.start()
+
+    def _discard_queue(self):
+        while self._queue:
+            self._remove_file(self._queue.popleft())
+
+    @staticmethod
+    def _remove_file(item: WallpaperHistory):
+        blob_store.unpin(item.sha256)
+        blob_store.discard(item.sha256)
+
+    def _wait_for_slot(self) -> tuple[int, Category, int] | None:
+        with self._cond:
+            while not self._stopped.is_set() and (
+                self.category is None or len(self._queue) >= self.depth
+            ):
+                self._cond.wait()
+            if self._stopped.is_set():
+                return None
+            return self._generation, self.category, self.depth - len(self._queue)
+
+    def _worker(self):
+        asyncio.run(self._run())
+
+    async def _run(self):
+        # aiohttp тяжелый — грузим его уже в фоновом потоке
+        from utils.async_engine import AsyncEngine
+
+        async with AsyncEngine(self.concurrency, self.pool_size) as engine:
+            while True:
+                slot = await asyncio.to_thread(self._wait_for_slot)
+                if slot is None:
+                    return
+                generation, category, missing = slot
+
+                # Недостающие обои готовим параллельно
+                results = await asyncio.gather(
+                    *(
+                        engine.prepare(category, self.cache_dir, self.resolution)
+                        for _ in range(missing)
+                    ),
+                    return_exceptions=True,
+                )
+                items = []
+                for result in results:
+                    if isinstance(result, BaseException):
+                        logger.error(f"Ошибка предзагрузки обоев: {result}")
+                    elif result is not None:
+                        # Закрепляем, пока обои ждут в очереди
+                        blob_store.pin(result.sha256)
+                        # Такие же байты могут уже храниться для истории:
+                        # тогда discard общий файл не тронет
+                        result.local_path = blob_store.add(
+                            result.local_path, result.sha256, tentative=True
+                        )
+                        items.append(result)
+                await self._fit(items)
+
+                self._enqueue(generation, items)
+                if not items:
+                    await asyncio.to_thread(self._stopped.wait, RETRY_DELAY)
+
+    async def _fit(self, items: list[WallpaperHistory]):
+        """Дождаться подгонки под экран, чтобы из очереди брались готовые файлы."""
+        if self.fitter is None:
+            return
+        futures = [
+            asyncio.wrap_future(future)
+            for item in items
+            if (future := self.fitter.submit(item.local_path, item.sha256))
+        ]
+        # Ошибки уже залогированы в ImageFitter, тогда применится оригинал
+        await asyncio.gather(*futures, return_exceptions=True)
+
+    def _enqueue(self, generation: int, items: list[WallpaperHistory]):
+        with self._cond:
+            for item in items:
+                if (
+                    generation != self._generation
+                    or self._stopped.is_set()
+                    or len(self._queue) >= self.depth
+                ):
+                    self._remove_file(item)
+                    continue
+                self._queue.append(item)
+                logger.info(f"Обои готовы в очереди: {item.url}")
+            self._cond.notify_all()
@@ -0,0 +1,103 @@
+import re
+from datetime import datetime, timedelta
+
+INTERVAL_UNITS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+
+# Поле cron: (минимум, максимум)
+CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+
+def parse_interval(value: str) -> float:
+    """'90', '30s', '15m', '2h', '1d' -> секунды."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*", value.lower())
+    if not match:
+        raise ValueError(f"Неверный интервал: {value}")
+    seconds = float(match.group(1)) * INTERVAL_UNITS[match.group(2) or "s"]
+    if seconds <= 0:
+        raise ValueError(f"Интервал должен быть больше нуля: {value}")
+    return seconds
+
+
+class IntervalSchedule:
+    """Смена обоев через равные промежутки времени."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def next_after(self, moment: datetime) -> datetime:
+        return moment + timedelta(seconds=self.seconds)
+
+    def __str__(self) -> str:
+        return f"каждые {self.seconds:g} с"
+
+
+class CronSchedule:
+    """Расписание в формате cron: 'минуты часы день месяц день_недели'.
+
+    Поддерживаются *, числа, диапазоны a-b, шаги */n и a-b/n, списки через
+    запятую. День недели 0 или 7 — воскресенье.
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"В расписании должно быть 5 полей: {expression}")
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            self._parse_field(part, *bounds) for part, bounds in zip(parts, CRON_FIELDS)
+        )
+        self.weekdays = frozenset(day % 7 for day in self.weekdays)
+        # Как в cron: если заданы и день месяца, и день недели, подходит любой
+        self._any_day = parts[2] == "*" or parts[4] == "*"
+
+    @staticmethod
+    def _parse_field(field: str, low: int, high: int) -> frozenset[int]:
+        values = set()
+        for item in field.split(","):
+            match = re.fullmatch(r"(\*|\d+(?:-\d+)?)(?:/(\d+))?", item)
+            if not match:
+                raise ValueError(f"Неверное поле расписания: {field}")
+            span, step = match.group(1), int(match.group(2) or 1)
+            if span == "*":
+                start, end = low, high
+            elif "-" in span:
+                start, end = map(int, span.split("-"))
+            else:
+                start = int(span)
+                end = high if match.group(2) else start
+            if not low <= start <= end <= high or step < 1:
+                raise ValueError(f"Значение вне диапазона: {field}")
+            values.update(range(start, end + 1, step))
+        return frozenset(values)
+
+    def _day_matches(self, moment: datetime) -> bool:
+        in_month = moment.day in self.days
+        # datetime: понедельник = 0, cron: воскресенье = 0
+        in_week = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._any_day:
+            return in_month and in_week
+        return in_month or in_week
+
+    def next_after(self, moment: datetime) -> datetime:
+        """Ближайший момент строго позже moment."""
+        moment = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Перескакиваем сразу месяцами, днями и часами, а не перебираем минуты
+        limit = moment + timedelta(days=366 * 5)
+        while moment < limit:
+            if moment.month not in self.months:
+                year, month = divmod(moment.month, 12)
+                moment = moment.replace(
+                    year=moment.year + year, month=month + 1, day=1, hour=0, minute=0
+                )
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"Расписание никогда не срабатывает: {self.expression}")
+
+    def __str__(self) -> str:
+        return f"по расписанию '{self.expression}'"
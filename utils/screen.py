@@ -0,0 +1,104 @@
+import re
+import subprocess
+import sys
+from dataclasses import dataclass
+from functools import lru_cache
+
+from config import logger
+
+
+@lru_cache(maxsize=1)
+def get_screen_size() -> tuple[int, int] | None:
+    """Разрешение основного экрана или None, если определить не удалось."""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+
+            user32 = ctypes.windll.user32
+            # Без этого Windows отдает размеры с учетом масштабирования
+            user32.SetProcessDPIAware()
+            return user32.GetSystemMetrics(0), user32.GetSystemMetrics(1)
+
+        output = subprocess.run(
+            ["xrandr", "--current"], capture_output=True, text=True, timeout=5
+        ).stdout
+        match = re.search(r"current (\d+) x (\d+)", output)
+        if match:
+            return int(match.group(1)), int(match.group(2))
+    except (OSError, AttributeError, subprocess.SubprocessError) as e:
+        logger.warning(f"Не удалось определить разрешение экрана: {e}")
+    return None
+
+
+@dataclass(frozen=True)
+class Monitor:
+    x: int
+    y: int
+    width: int
+    height: int
+
+    @property
+    def resolution(self) -> str:
+        return f"{self.width}x{self.height}"
+
+
+# Строка xrandr: "HDMI-1 connected primary 1920x1080+1920+0 ..."
+XRANDR_MONITOR = re.compile(r" connected (?:primary )?(\d+)x(\d+)\+(-?\d+)\+(-?\d+)")
+
+
+@lru_cache(maxsize=1)
+def get_monitors() -> tuple[Monitor, ...]:
+    """Геометрия подключенных мониторов на общем рабочем столе, слева направо."""
+    monitors = []
+    try:
+        if sys.platform == "win32":
+            monitors = _windows_monitors()
+        else:
+            output = subprocess.run(
+                ["xrandr", "--current"], capture_output=True, text=True, timeout=5
+            ).stdout
+            monitors = [
+                Monitor(int(x), int(y), int(w), int(h))
+                for w, h, x, y in XRANDR_MONITOR.findall(output)
+            ]
+    except (OSError, AttributeError, subprocess.SubprocessError) as e:
+        logger.warning(f"Не удалось определить мониторы: {e}")
+    return tuple(sorted(monitors, key=lambda m: (m.x, m.y)))
+
+
+def _windows_monitors() -> list[Monitor]:
+    import ctypes
+    from ctypes import wintypes
+
+    user32 = ctypes.windll.user32
+    user32.SetProcessDPIAware()
+    monitors = []
+    callback_type = ctypes.WINFUNCTYPE(
+        ctypes.c_int,
+        wintypes.HMONITOR,
+        wintypes.HDC,
+        ctypes.POINTER(wintypes.RECT),
+        wintypes.LPARAM,
+    )
+
+    def callback(monitor, dc, rect, data):
+        r = rect.contents
+        monitors.append(Monitor(r.left, r.top, r.right - r.left, r.bottom - r.top))
+        return 1
+
+    user32.EnumDisplayMonitors(None, None, callback_type(callback), 0)
+    return monitors
+
+
+def parse_resolution(value: str | None) -> tuple[int, int] | None:
+    """'1920x1080' -> (1920, 1080)."""
+    match = re.fullmatch(r"(\d+)x(\d+)", value or "")
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def resolve_resolution(value: str | None) -> str | None:
+    """Значение настройки -> 'WxH': 'auto' берет разрешение экрана, пусто — None."""
+    if value == "auto":
+        size = get_screen_size()
+        return f"{size[0]}x{size[1]}" if size else None
+    return value or None
@@ -0,0 +1,251 @@
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Condition, Thread
+
+from config import logger
+from utils.metrics import metrics
+
+DEFAULT_COMMAND = "feh --bg-fill {path}"
+# Без --no-xinerama feh растягивает картинку на каждый монитор отдельно
+DEFAULT_SPAN_COMMAND = "feh --bg-fill --no-xinerama {path}"
+COMMAND_TIMEOUT = 10
+# Сколько последних замеров держим для статистики
+LATENCY_WINDOW = 100
+
+
+class SetterBackend:
+    """Способ установить обои. apply бросает исключение при ошибке.
+
+    span=True — изображение собрано на все мониторы и растягивается на них.
+    """
+
+    name = "base"
+
+    def apply(self, image_path: str, span: bool = False):
+        raise NotImplementedError
+
+
+class WindowsBackend(SetterBackend):
+    name = "windows"
+    SPI_SETDESKWALLPAPER = 20
+    SPIF_UPDATE_AND_SEND = 3
+    DESKTOP_KEY = r"Control Panel\Desktop"
+    SPAN_STYLE = "22"
+
+    def __init__(self):
+        # Стиль пользователя до включения растягивания, чтобы вернуть его
+        self._saved_style: str | None = None
+
+    def apply(self, image_path: str, span: bool = False):
+        import ctypes
+
+        if span != (self._saved_style is not None):
+            self._set_span(span)
+        ok = ctypes.windll.user32.SystemParametersInfoW(
+            self.SPI_SETDESKWALLPAPER, 0, image_path, self.SPIF_UPDATE_AND_SEND
+        )
+        if not ok:
+            raise ctypes.WinError()
+
+    def _set_span(self, span: bool):
+        import winreg
+
+        with winreg.OpenKey(
+            winreg.HKEY_CURRENT_USER, self.DESKTOP_KEY, 0, winreg.KEY_ALL_ACCESS
+        ) as key:
+            if span:
+                self._saved_style = winreg.QueryValueEx(key, "WallpaperStyle")[0]
+                style = self.SPAN_STYLE
+            else:
+                style, self._saved_style = self._saved_style, None
+            winreg.SetValueEx(key, "WallpaperStyle", 0, winreg.REG_SZ, style)
+            winreg.SetValueEx(key, "TileWallpaper", 0, winreg.REG_SZ, "0")
+
+
+class GnomeBackend(SetterBackend):
+    name = "gnome"
+    SCHEMA = "org.gnome.desktop.background"
+    KEYS = ("picture-uri", "picture-uri-dark")
+
+    def __init__(self):
+        self._saved_options: str | None = None
+
+    def apply(self, image_path: str, span: bool = False):
+        if span != (self._saved_options is not None):
+            if span:
+                self._saved_options = self._gsettings("get", "picture-options")
+                self._gsettings("set", "picture-options", "spanned")
+            else:
+                options, self._saved_options = self._saved_options, None
+                self._gsettings("set", "picture-options", options)
+        uri = Path(image_path).absolute().as_uri()
+        for key in self.KEYS:
+            self._gsettings("set", key, uri)
+
+    def _gsettings(self, action: str, key: str, *value: str) -> str:
+        return subprocess.run(
+            ["gsettings", action, self.SCHEMA, key, *value],
+            check=True,
+            capture_output=True,
+            text=True,
+            timeout=COMMAND_TIMEOUT,
+        ).stdout.strip()
+
+
+class CommandBackend(SetterBackend):
+    """Внешняя команда, например 'feh --bg-fill {path}'."""
+
+    name = "command"
+
+    def __init__(self, command: str = DEFAULT_COMMAND):
+        self.command = command or DEFAULT_COMMAND
+
+    def apply(self, image_path: str, span: bool = False):
+        command = self.command
+        if span and command == DEFAULT_COMMAND:
+            command = DEFAULT_SPAN_COMMAND
+        args = [arg.replace("{path}", image_path) for arg in shlex.split(command)]
+        if "{path}" not in command:
+            args.append(image_path)
+        subprocess.run(args, check=True, capture_output=True, timeout=COMMAND_TIMEOUT)
+
+
+class RecordingBackend(SetterBackend):
+    """Ничего не меняет, только запоминает пути (для тестов и бенчмарков)."""
+
+    name = "none"
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.applied: list[str] = []
+
+    def apply(self, image_path: str, span: bool = False):
+        if self.delay:
+            time.sleep(self.delay)
+        self.applied.append(image_path)
+
+
+BACKENDS = ("auto", "windows", "gnome", "command", "none")
+
+
+def create_backend(name: str = "auto", command: str = "") -> SetterBackend:
+    """Бэкенд по имени из настроек; auto выбирает по платформе."""
+    if name == "auto":
+        if sys.platform == "win32":
+            name = "windows"
+        elif shutil.which("gsettings") and "GNOME" in os.environ.get(
+            "XDG_CURRENT_DESKTOP", ""
+        ).upper():
+            name = "gnome"
+        elif command or shutil.which("feh"):
+            name = "command"
+        else:
+            logger.warning("Не найден способ установки обоев, они не будут меняться")
+            name = "none"
+
+    match name:
+        case "windows":
+            return WindowsBackend()
+        case "gnome":
+            return GnomeBackend()
+        case "command":
+            return CommandBackend(command)
+        case _:
+            return RecordingBackend()
+
+
+@dataclass
+class ApplyStats:
+    applied: int
+    coalesced: int
+    failed: int
+    mean_latency: float
+    max_latency: float
+
+
+class ApplyQueue:
+    """Одна фоновая очередь установки обоев.
+
+    Хранится только последний запрошенный путь: если пока применялись одни
+    обои пришло несколько новых, ставятся только самые свежие.
+    """
+
+    def __init__(self, backend: SetterBackend | None = None):
+        # Если бэкенд не задан настройками, он выбирается при первой установке
+        self.backend = backend
+        self._cond = Condition()
+        self._pending: tuple[str, bool, float] | None = None
+        self._busy = False
+        self._latencies: list[float] = []
+        self._applied = self._coalesced = self._failed = 0
+        self._thread: Thread | None = None
+
+    def set_backend(self, backend: SetterBackend):
+        with self._cond:
+            self.backend = backend
+
+    def submit(self, image_path: str, span: bool = False):
+        with self._cond:
+            if self._pending is not None:
+                self._coalesced += 1
+            self._pending = (image_path, span, time.perf_counter())
+            if self.backend is None:
+                self.backend = create_backend()
+            if self._thread is None:
+                self._thread = Thread(target=self._worker, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def wait_idle(self, timeout: float | None = None) -> bool:
+        """Дождаться, пока все запрошенные обои будут применены."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self._pending is None and not self._busy, timeout
+            )
+
+    def stats(self) -> ApplyStats:
+        with self._cond:
+            latencies = list(self._latencies)
+            return ApplyStats(
+                self._applied,
+                self._coalesced,
+                self._failed,
+                sum(latencies) / len(latencies) if latencies else 0.0,
+                max(latencies, default=0.0),
+            )
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending is not None)
+                (image_path, span, submitted), self._pending = self._pending, None
+                backend = self.backend
+                self._busy = True
+            error = None
+            try:
+                backend.apply(image_path, span)
+            except Exception as e:
+                logger.error(f"Ошибка установки обоев ({backend.name}): {e}")
+                error = type(e).__name__
+            ok = error is None
+            latency = time.perf_counter() - submitted
+            metrics.record("apply", latency, backend=backend.name, error=error)
+            with self._cond:
+                self._busy = False
+                if ok:
+                    self._applied += 1
+                    self._latencies.append(latency)
+                    del self._latencies[:-LATENCY_WINDOW]
+                    logger.info(f"Обои установлены за {latency:.3f} с: {image_path}")
+                else:
+                    self._failed += 1
+                self._cond.notify_all()
+
+
+apply_queue = ApplyQueue()
@@ -0,0 +1,35 @@
+import time
+
+
+class StartupProfile:
+    """Замеры этапов запуска для --startup-profile."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.phases: list[tuple[str, float]] = []
+
+    def mark(self, name: str):
+        """Закончить этап name: время считается от предыдущей отметки."""
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last))
+        self._last = now
+
+    @property
+    def total(self) -> float:
+        return self._last - self.started
+
+    def report(self):
+        from rich.table import Table
+
+        from config import console
+
+        table = Table(title="Профиль запуска")
+        table.add_column("Этап", style="bold cyan")
+        table.add_column("мс", justify="right", style="yellow")
+        table.add_column("%", justify="right", style="dim")
+        total = self.total or 1
+        for name, elapsed in self.phases:
+            table.add_row(name, f"{elapsed * 1000:.1f}", f"{elapsed / total * 100:.0f}")
+        table.add_row("Всего", f"{self.total * 1000:.1f}", "100", style="bold")
+        console.print(table)
@@ -0,0 +1,32 @@
+import json
+import os
+from os import path
+
+from config import logger
+
+
+def load_json(file_path: str, default=None):
+    """Прочитать JSON-файл; при отсутствии или ошибке вернуть default."""
+    if not path.exists(file_path):
+        return default
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"Ошибка чтения {file_path}: {e}")
+        return default
+
+
+def save_json_atomic(file_path: str, data) -> bool:
+    """Записать JSON через временный файл, чтобы сбой не оставил битый файл."""
+    tmp_path = f"{file_path}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+        return True
+    except Exception as e:
+        logger.error(f"Ошибка сохранения {file_path}: {e}")
+        return False
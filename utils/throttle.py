@@ -0,0 +1,223 @@
+import math
+import random
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from threading import Condition
+
+from config import logger
+
+# Ответы, после которых сайт просит подождать или сам не справляется
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+INITIAL_LIMIT = 4
+DEFAULT_MAX_LIMIT = 10
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+MAX_BACKOFF = 30.0
+# Сколько ошибок подряд размыкают цепь: дальше запросы не уходят на сайт
+FAILURE_THRESHOLD = 5
+COOLDOWN = 5.0
+MAX_COOLDOWN = 60.0
+# Дольше этого запрос не ждет своей очереди, а сразу получает отказ
+MAX_WAIT = 30.0
+
+
+@dataclass
+class ThrottleState:
+    limit: int
+    in_flight: int
+    paused_for: float
+    open_for: float
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Retry-After в секундах: число секунд или HTTP-дата."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveThrottle:
+    """Общее окно одновременных запросов к сайту, паузы и размыкатель цепи.
+
+    Окно растет на единицу за каждое окно успешных ответов и делится пополам
+    на 429/5xx (AIMD), поэтому держится около того, что сайт выдерживает.
+    Ошибки запросов, отправленных до уменьшения окна, считаются вместе с ним
+    одной. Отклоненный запрос повторяется не раньше Retry-After или
+    экспоненциальной паузы; если сайт ошибается и после уменьшения окна,
+    пауза касается всех запросов. После FAILURE_THRESHOLD таких ошибок без
+    единого успеха запросы получают отказ сразу; по истечении паузы проходит
+    один пробный, и по его ответу цепь замыкается или пауза удваивается.
+    """
+
+    def __init__(
+        self,
+        max_limit: int = DEFAULT_MAX_LIMIT,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+    ):
+        self.max_limit = max_limit
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.limit = float(min(INITIAL_LIMIT, max_limit))
+        # Не меньше стольких секунд между началами запросов; 0 — без ограничения
+        self.interval = 0.0
+        self._cond = Condition()
+        self._in_flight = 0
+        # Раньше этого момента (time.monotonic) новые запросы не уходят
+        self._not_before = 0.0
+        self._next_start = 0.0
+        self._open_until = 0.0
+        self._failures = 0
+        # Сколько ответов на запросы, отправленные до последнего уменьшения
+        # окна, еще не пришло: их ошибки окно второй раз не уменьшают
+        self._stale = 0
+        self._cooldown = COOLDOWN
+        # Цепь полуоткрыта и пробный запрос уже отправлен
+        self._trial = False
+
+    def configure(self, max_limit: int, max_retries: int, backoff: float):
+        with self._cond:
+            self.max_limit = max(max_limit, 1)
+            self.max_retries = max_retries
+            self.backoff = backoff
+            self.limit = min(self.limit, self.max_limit)
+            self._cond.notify_all()
+
+    def set_rate(self, rate: float):
+        """Не больше rate запросов в секунду; rate <= 0 — без ограничения."""
+        with self._cond:
+            self.interval = 1 / rate if rate > 0 else 0.0
+            # Пауза, назначенная по прежнему ограничению, больше не действует
+            self._next_start = 0.0
+            self._cond.notify_all()
+
+    def acquire(self, timeout: float = MAX_WAIT) -> bool:
+        """Дождаться места в окне. False — цепь разомкнута или ждать слишком долго."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                wait = self._try_admit(deadline)
+                if wait is None:
+                    return False
+                if not wait:
+                    return True
+                self._cond.wait(min(wait, deadline - time.monotonic()))
+
+    def try_acquire(self, deadline: float) -> float | None:
+        """Занять место без ожидания, для asyncio.
+
+        0 — место занято; иначе через сколько секунд спросить снова
+        (inf — когда освободится место в окне); None — отказ.
+        """
+        with self._cond:
+            return self._try_admit(deadline)
+
+    def release(
+        self, status: int | None, retry_after: str | None = None
+    ) -> float | None:
+        """Учесть ответ (None — сетевая ошибка).
+
+        Возвращает, через сколько секунд запрос стоит повторить, или None.
+        """
+        with self._cond:
+            self._in_flight -= 1
+            stale = self._stale > 0
+            self._stale = max(self._stale - 1, 0)
+            delay = None
+            if status is None or status in RETRY_STATUSES:
+                delay = self._on_failure(status, parse_retry_after(retry_after), stale)
+            else:
+                self._on_success()
+            self._cond.notify_all()
+        if status in RETRY_STATUSES and delay <= MAX_WAIT:
+            return delay
+        return None
+
+    def cancel(self):
+        """Освободить место запроса, который так и не был отправлен."""
+        with self._cond:
+            self._in_flight -= 1
+            self._stale = max(self._stale - 1, 0)
+            self._trial = False
+            self._cond.notify_all()
+
+    def state(self) -> ThrottleState:
+        with self._cond:
+            now = time.monotonic()
+            return ThrottleState(
+                int(self.limit),
+                self._in_flight,
+                max(self._not_before - now, 0.0),
+                max(self._open_until - now, 0.0),
+            )
+
+    def _try_admit(self, deadline: float) -> float | None:
+        now = time.monotonic()
+        if not self._admissible(now):
+            return None
+        wait = max(self._not_before, self._next_start) - now
+        if wait <= 0 and self._in_flight < int(self.limit):
+            self._admit()
+            self._next_start = now + self.interval
+            return 0.0
+        if now >= deadline or wait > deadline - now:
+            return None
+        return wait if wait > 0 else math.inf
+
+    def _admissible(self, now: float) -> bool:
+        if now < self._open_until:
+            return False
+        # Цепь полуоткрыта: пока идет пробный запрос, остальные получают отказ
+        return not (self._failures >= FAILURE_THRESHOLD and self._trial)
+
+    def _admit(self):
+        self._in_flight += 1
+        if self._failures >= FAILURE_THRESHOLD:
+            self._trial = True
+
+    def _on_success(self):
+        if self._failures >= FAILURE_THRESHOLD:
+            logger.info("Сайт снова отвечает, запросы возобновлены")
+        self._failures = 0
+        self._trial = False
+        self._cooldown = COOLDOWN
+        self.limit = min(self.limit + 1 / self.limit, self.max_limit)
+
+    def _on_failure(
+        self, status: int | None, retry_after: float | None, stale: bool
+    ) -> float:
+        now = time.monotonic()
+        if not stale:
+            self._failures += 1
+            self.limit = max(self.limit / 2, 1.0)
+            self._stale = self._in_flight
+        delay = retry_after
+        if delay is None:
+            # Случайная доля паузы разводит повторы разных потоков во времени
+            delay = min(self.backoff * 2 ** (self._failures - 1), MAX_BACKOFF)
+            delay *= random.uniform(0.5, 1.0)
+        if stale and not self._trial:
+            return delay
+        if self._trial:
+            self._cooldown = min(self._cooldown * 2, MAX_COOLDOWN)
+            self._trial = False
+        if self._failures >= FAILURE_THRESHOLD or delay > MAX_WAIT:
+            pause = max(self._cooldown, delay)
+            self._open_until = max(self._open_until, now + pause)
+            logger.warning(
+                f"Сайт не справляется (ответ {status or 'нет'}), "
+                f"запросы приостановлены на {pause:.0f} с"
+            )
+        elif self._failures > 1:
+            # Уменьшение окна не помогло: ждут все, а не только этот запрос
+            self._not_before = max(self._not_before, now + delay)
+        return delay
+
+throttle = AdaptiveThrottle()
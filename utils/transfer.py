@@ -0,0 +1,77 @@
+import hashlib
+import os
+from os import path
+
+MIN_CHUNK = 64 * 1024
+MAX_CHUNK = 4 * 1024 * 1024
+# Желаемое время чтения одного куска: быстрее — растим кусок, медленнее — уменьшаем
+TARGET_CHUNK_TIME = 0.05
+# Как часто перерисовывать прогресс, секунды
+PROGRESS_INTERVAL = 0.1
+
+
+def partial_path(image_url: str, save_path: str) -> str:
+    """Имя недокачанного файла зависит только от ссылки — так его можно докачать."""
+    digest = hashlib.sha1(image_url.encode("utf-8")).hexdigest()[:16]
+    return path.join(path.dirname(save_path), f"download_{digest}.part")
+
+
+def partial_size(part_path: str) -> int:
+    try:
+        return os.path.getsize(part_path)
+    except OSError:
+        return 0
+
+
+class ChunkSizer:
+    """Подбирает размер куска под текущую скорость соединения."""
+
+    def __init__(self):
+        self.size = MIN_CHUNK
+
+    def update(self, received: int, elapsed: float):
+        if received >= self.size and elapsed < TARGET_CHUNK_TIME / 2:
+            self.size = min(self.size * 2, MAX_CHUNK)
+        elif elapsed > TARGET_CHUNK_TIME * 2:
+            self.size = max(self.size // 2, MIN_CHUNK)
+
+
+def range_headers(offset: int) -> dict[str, str] | None:
+    """Заголовок докачки с offset; None — качаем с начала."""
+    return {"Range": f"bytes={offset}-"} if offset else None
+
+
+def hash_partial(part_path: str, offset: int):
+    """sha256 уже скачанной части; дальше хэш дополняется по мере загрузки."""
+    digest = hashlib.sha256()
+    if offset:
+        with open(part_path, "rb") as f:
+            while chunk := f.read(MAX_CHUNK):
+                digest.update(chunk)
+    return digest
+
+
+def commit_partial(file, part_path: str, save_path: str):
+    """Сбросить данные на диск и атомарно переименовать в итоговый файл."""
+    file.flush()
+    os.fsync(file.fileno())
+    file.close()
+    os.replace(part_path, save_path)
+
+
+def expected_size(headers, offset: int) -> int | None:
+    """Ожидаемый размер файла с учетом докачки; None — размер неизвестен."""
+    length = headers.get("content-length")
+    # Со сжатием content-length не равен числу байт после распаковки
+    if length and not headers.get("content-encoding"):
+        return int(length) + offset
+    return None
+
+
+def check_received(received: int, total_size: int | None):
+    """Файл скачан целиком и не пуст — иначе IOError."""
+    if total_size is not None and received != total_size:
+        raise IOError(f"получено {received} из {total_size} байт")
+    if not received:
+        # Без content-length пустой ответ иначе сохранился бы как обои
+        raise IOError("пустой файл")
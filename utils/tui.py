@@ -0,0 +1,146 @@
+from contextlib import contextmanager
+from threading import RLock
+
+from rich.console import Group, RenderableType
+from rich.live import Live
+from rich.panel import Panel
+from rich.progress import Progress, ProgressColumn
+from rich.table import Table
+from rich.text import Text
+
+from config import console
+
+
+class _RegionProgress(Progress):
+    """Прогресс, который рисуется внутри панели, а не в своем Live."""
+
+    def __init__(self, dashboard: "Dashboard", *columns: ProgressColumn, **kwargs):
+        super().__init__(*columns, console=console, auto_refresh=False, **kwargs)
+        self._dashboard = dashboard
+
+    def refresh(self):
+        self._dashboard.refresh()
+
+
+class Dashboard:
+    """Постоянная панель внизу терминала: статус, история, загрузка, подсказка.
+
+    Перерисовка идет только при изменении одной из областей; обычный вывод
+    console.print печатается над панелью.
+    """
+
+    REGIONS = ("status", "history", "progress", "help")
+
+    def __init__(self):
+        self._lock = RLock()
+        self._regions: dict[str, RenderableType | None] = dict.fromkeys(self.REGIONS)
+        # Текстовые ключи областей, чтобы не перерисовывать без изменений
+        self._keys: dict[str, str] = {}
+        self._live: Live | None = None
+        self._paused = 0
+
+    @property
+    def active(self) -> bool:
+        return self._live is not None and not self._paused
+
+    def start(self):
+        with self._lock:
+            if self._live is None:
+                # transient: на время подсказок панель стирается целиком
+                self._live = Live(
+                    self._render(), console=console, auto_refresh=False, transient=True
+                )
+                self._live.start()
+
+    def stop(self):
+        with self._lock:
+            if self._live is not None:
+                self._live.stop()
+                self._live = None
+
+    @contextmanager
+    def paused(self):
+        """Убрать панель на время подсказок ввода."""
+        with self._lock:
+            self._paused += 1
+            if self._live is not None and self._paused == 1:
+                self._live.stop()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._paused -= 1
+                if self._live is not None and not self._paused:
+                    self._live.start()
+                    self.refresh()
+
+    def set_region(self, name: str, renderable: RenderableType | None, key: str = ""):
+        with self._lock:
+            if key and self._keys.get(name) == key:
+                return
+            self._keys[name] = key
+            self._regions[name] = renderable
+            self.refresh()
+
+    def set_status(self, rows: dict[str, str]):
+        table = Table.grid(padding=(0, 1))
+        table.add_column(style="bold yellow", no_wrap=True)
+        table.add_column(overflow="ellipsis", no_wrap=True)
+        for label, value in rows.items():
+            table.add_row(label, value)
+        self.set_region(
+            "status",
+            Panel(table, title="WallSwap", border_style="cyan"),
+            key=repr(rows),
+        )
+
+    def set_history(self, index: int, total: int):
+        text = (
+            f"История: {index + 1} из {total}" if index >= 0 else "История пуста"
+        )
+        self.set_region("history", Text(text, style="bold blue"), key=text)
+
+    def set_help(self, keys: dict[str, str]):
+        text = Text()
+        for key, description in keys.items():
+            text.append(f" {key} ", style="bold black on yellow")
+            text.append(f" {description}  ")
+        self.set_region("help", text, key=text.plain)
+
+    def refresh(self):
+        with self._lock:
+            if self.active:
+                self._live.update(self._render(), refresh=True)
+
+    def _render(self) -> Group:
+        return Group(*(r for r in self._regions.values() if r is not None))
+
+
+dashboard = Dashboard()
+
+
+@contextmanager
+def make_progress(
+    *columns: ProgressColumn,
+    transient: bool = True,
+    auto_refresh: bool = True,
+    disable: bool = False,
+):
+    """Прогресс-бар: в области панели, если она активна, иначе отдельный."""
+    if disable or not dashboard.active:
+        with Progress(
+            *columns,
+            console=console,
+            transient=transient,
+            auto_refresh=auto_refresh,
+            disable=disable,
+        ) as progress:
+            yield progress
+        return
+
+    progress = _RegionProgress(dashboard, *columns)
+    dashboard.set_region("progress", progress)
+    try:
+        yield progress
+    finally:
+        dashboard.set_region("progress", None)
@@ -0,0 +1,63 @@
+import time
+from threading import Lock
+
+from config import image_url_cache_file
+from utils.storage import load_json, save_json_atomic
+
+DEFAULT_TTL = 7 * 24 * 60 * 60
+# Сколько новых записей копим перед записью на диск
+SAVE_EVERY = 10
+MAX_ENTRIES = 5000
+
+
+class ImageUrlCache:
+    """Соответствие страницы обоев и прямой ссылки на изображение."""
+
+    def __init__(self, file_path: str, ttl: int = DEFAULT_TTL):
+        self.file_path = file_path
+        self.ttl = ttl
+        self._lock = Lock()
+        self._unsaved = 0
+        now = time.time()
+        self._entries: dict[str, dict] = {
+            key: entry
+            for key, entry in load_json(file_path, {}).items()
+            if now - entry["updated"] < ttl
+        }
+
+    @staticmethod
+    def key(page_url: str, resolution: str | None = None) -> str:
+        return f"{page_url}@{resolution}" if resolution else page_url
+
+    def get(self, page_url: str, resolution: str | None = None) -> str | None:
+        with self._lock:
+            entry = self._entries.get(self.key(page_url, resolution))
+            if not entry or time.time() - entry["updated"] >= self.ttl:
+                return None
+            return entry["url"]
+
+    def set(self, page_url: str, image_url: str, resolution: str | None = None):
+        with self._lock:
+            self._entries[self.key(page_url, resolution)] = {
+                "url": image_url,
+                "updated": time.time(),
+            }
+            if len(self._entries) > MAX_ENTRIES:
+                # dict хранит порядок вставки — убираем самые старые
+                for key in list(self._entries)[: len(self._entries) - MAX_ENTRIES]:
+                    del self._entries[key]
+            self._unsaved += 1
+            need_save = self._unsaved >= SAVE_EVERY
+        if need_save:
+            self.save()
+
+    def save(self):
+        with self._lock:
+            if not self._unsaved:
+                return
+            data = dict(self._entries)
+            self._unsaved = 0
+        save_json_atomic(self.file_path, data)
+
+
+url_cache = ImageUrlCache(image_url_cache_file)
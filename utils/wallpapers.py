@@ -1,10 +1,12 @@
+import hashlib
 import random
-from threading import Thread
-import requests
-import ctypes
-from bs4 import BeautifulSoup
+import re
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import TYPE_CHECKING
+
 from rich.progress import (
-    Progress,
     SpinnerColumn,
     BarColumn,
     TextColumn,
@@ -13,12 +15,164 @@ from rich.progress import (
     DownloadColumn,
 )
 
-from config import console, logger, HEADERS
-from utils.clear_cmd import clear_cmd
-from utils.fetcher import fetch
+from config import BASE_URL, IMAGES_URL, console, logger
+from models import DownloadStats
+from utils.fetcher import fetch, probe, request
+from utils.link_pool import link_pool
+from utils.metrics import metrics
+from utils.page_index import fetch_page_count, page_index
+from utils.phash import dhash, phash_index
+from utils.screen import parse_resolution
+from utils.setter import apply_queue
+from utils.tui import make_progress
+from utils.transfer import (
+    PROGRESS_INTERVAL,
+    ChunkSizer,
+    check_received,
+    commit_partial,
+    expected_size,
+    hash_partial,
+    partial_path,
+    partial_size,
+    range_headers,
+)
+from utils.url_cache import url_cache
+
+if TYPE_CHECKING:
+    import requests
+
+# Ссылки на страницы разрешений: /download/<slug>/<W>x<H>
+RESOLUTION_LINK = re.compile(r'href="(/download/[^/"]+/(\d+)x(\d+))"')
+# Самая маленькая картинка, которую отдает сайт (превью в списках)
+PREVIEW_RESOLUTION = "300x168"
+IMAGE_SIZE_SUFFIX = re.compile(r"_\d+x\d+\.jpg$")
+# Сколько раз перевыбираем обои, если попались похожие на уже показанные
+MAX_REROLLS = 3
+# Сколько превью, скачанных для проверки на повтор, держим в памяти
+PREVIEW_CACHE_SIZE = 4
+
+# Превью последних проверенных обоев: их же ставим, не скачивая второй раз
+_previews: OrderedDict[str, bytes] = OrderedDict()
+_previews_lock = Lock()
+
+
+def parse_wallpaper_links(markup: str) -> list[str]:
+    """Ссылки на страницы обоев со страницы списка."""
+    # bs4 грузится при первом разборе, а не при старте программы
+    from utils.parser import WALLPAPER_LINKS, parse_html
+
+    soup = parse_html(markup, WALLPAPER_LINKS)
+    return [a["href"] for a in soup.select(".wallpapers__link")]
+
+
+def parse_resolutions(markup: str) -> dict[tuple[int, int], str]:
+    """Все перечисленные на странице разрешения: (W, H) -> ссылка."""
+    return {
+        (int(w), int(h)): href for href, w, h in RESOLUTION_LINK.findall(markup)
+    }
+
+
+def pick_resolution(
+    resolutions: dict[tuple[int, int], str], target: tuple[int, int]
+) -> str | None:
+    """Наименьший вариант, покрывающий target; если таких нет — наибольший."""
+    if not resolutions:
+        return None
+    covering = [
+        size
+        for size in resolutions
+        if size[0] >= target[0] and size[1] >= target[1]
+    ]
+    if covering:
+        return resolutions[min(covering, key=lambda s: s[0] * s[1])]
+    return resolutions[max(resolutions, key=lambda s: s[0] * s[1])]
+
+
+def parse_image_link(
+    markup: str, target: tuple[int, int] | None = None
+) -> str | None:
+    """Ссылка со страницы обоев: на страницу разрешения или сразу на jpg.
+
+    С target выбирается наименьшее разрешение, которое его покрывает.
+    """
+    if target:
+        href = pick_resolution(parse_resolutions(markup), target)
+        if href:
+            return href
+
+    from utils.parser import WALLPAPER_INFO, parse_html
+
+    soup = parse_html(markup, WALLPAPER_INFO)
+
+    # Вариант 1
+    info = soup.select_one(".wallpaper-info .wallpaper-table__row")
+    if info:
+        return info.select(".wallpaper-table__cell")[1].select_one("a")["href"]
+
+    # Вариант 2
+    toolbar = soup.select_one(".gui-toolbar .gui-button")
+    if toolbar:
+        return toolbar["href"]
+    return None
+
+
+def parse_direct_link(markup: str) -> str | None:
+    """Прямая ссылка на изображение со страницы разрешения."""
+    from utils.parser import WALLPAPER, parse_html
+
+    soup = parse_html(markup, WALLPAPER)
+    wallpaper_w_tag = soup.select_one(".wallpaper")
+    wrapper_button = wallpaper_w_tag.select_one(".gui-toolbar div")
+    return wrapper_button.select_one("a").get("href")
+
+
+def listing_page_url(category_url: str, page: int) -> str:
+    if category_url == BASE_URL:
+        return f"{BASE_URL}/all/page{page}"
+    return f"{category_url}/page{page}"
+
+
+def harvest_random_page(category_url: str) -> list[str] | None:
+    """Собираем все ссылки на обои со случайной страницы категории."""
+    # Число страниц берем из индекса, на сайт ходим только если записи нет
+    last_page = page_index.get(category_url)
+    if last_page is None:
+        last_page = fetch_page_count(category_url)
+        if last_page is None:
+            return None
+        page_index.set(category_url, last_page)
+
+    url = listing_page_url(category_url, random.randint(1, last_page))
+    response = fetch(url)
+    if not response:
+        # Возможно, в категории стало меньше страниц
+        page_index.invalidate(category_url)
+        return None
+
+    wallpapers = parse_wallpaper_links(response.text)
+    if not wallpapers:
+        logger.warning(f"Нет обоев на странице {url}")
+        return None
+    return wallpapers
+
+
+def find_random_wallpaper_page(category_url: str) -> str | None:
+    """Выбираем случайную страницу обоев в категории (без вывода в консоль)."""
+    href = link_pool.take(category_url)
+    if href is None:
+        wallpapers = harvest_random_page(category_url)
+        if not wallpapers:
+            return None
+        link_pool.add(category_url, wallpapers)
+        href = link_pool.take(category_url)
+    link_pool.refill_async(category_url, harvest_random_page)
+
+    return f"{BASE_URL}{href}"
 
 
-def get_random_wallpaper(category_url: str, category_name: str) -> str | None:
+def get_random_wallpaper(
+    category_url: str, category_name: str, resolution: str | None = None
+) -> str | None:
     """Ищем случайную обложку из выбранной категории."""
     console.rule("[bold violet]Поиск обоев...[/bold violet]")
 
@@ -26,168 +180,314 @@ def get_random_wallpaper(category_url: str, category_name: str) -> str | None:
         f"[bold gray]Выбрана категория:[/bold gray] [yellow]{category_name}[/yellow]"
     )
 
-    random_page = None
-
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[cyan]Поиск страниц и получения рандомных обоев...[/cyan]"),
-        transient=True,
-    ) as progress:
-        task = progress.add_task("", total=None)  # Бесконечный лоадер
-        response = fetch(category_url)
-        if not response:
+    for attempt in range(MAX_REROLLS + 1):
+        with make_progress(
+            SpinnerColumn(),
+            TextColumn("[cyan]Поиск страниц и получения рандомных обоев...[/cyan]"),
+        ) as progress:
+            task = progress.add_task("", total=None)  # Бесконечный лоадер
+            wallpaper_page = find_random_wallpaper_page(category_url)
             progress.remove_task(task)
+
+        if not wallpaper_page:
+            console.print("[bold red]Не удалось найти обои в категории.[/bold red]")
             return None
 
-        soup = BeautifulSoup(response.text, "html.parser")
-        # Определяем последнюю страницу
-        pager_items = soup.select(".pager__item")
-        last_page = 1
-        if len(pager_items) >= 4:
-            href = pager_items[3].select_one("a")["href"]
-            last_page = int(href.split("page")[-1])
-
-        # console.print(f"[bold gray]Всего страниц:[/bold gray] [yellow]{last_page}[/yellow]")
-        page = random.randint(1, last_page)
-        # console.print(
-        #     f"[bold violet]Выбрана страница:[/bold violet] [yellow]{page}[/yellow]"
-        # )
-
-        if category_url == "https://wallpaperscraft.ru":
-            url = f"https://wallpaperscraft.ru/all/page{page}"
-        else:
-            url = f"{category_url}/page{page}"
-        # console.print(
-        #     f"[bold violet]Выбрана страница:[/bold violet] [yellow]{url}[/yellow]"
-        # )
+        image_url = get_image_url(wallpaper_page, resolution=resolution)
+        if not image_url or attempt == MAX_REROLLS or not is_duplicate(image_url):
+            return image_url
+        console.print(
+            "[bold yellow]Похожие обои уже были, ищем другие...[/bold yellow]"
+        )
 
+
+def pick_image_url(category_url: str, resolution: str | None = None) -> str | None:
+    """Ссылка на случайные обои категории без вывода в консоль, без повторов."""
+    for attempt in range(MAX_REROLLS + 1):
+        page = find_random_wallpaper_page(category_url)
+        image_url = page and get_image_url(page, verbose=False, resolution=resolution)
+        if not image_url or attempt == MAX_REROLLS or not is_duplicate(image_url):
+            return image_url
+
+
+def is_duplicate(image_url: str) -> bool:
+    """Похожи ли обои на уже показанные: хэш считаем по превью, не качая оригинал."""
+    if not phash_index.enabled or not len(phash_index):
+        return False
+    url = preview_url(image_url) or image_url
+    with metrics.span("dedup", url=url) as span:
         response = fetch(url)
         if not response:
-            progress.remove_task(task)
-            return None
+            return False
+        _remember_preview(url, response.content)
+        try:
+            value = dhash(response.content)
+        except Exception as e:
+            logger.error(f"Ошибка хэширования превью {url}: {e}")
+            return False
+        duplicate = phash_index.find(value) is not None
+        span.set(bytes=len(response.content), duplicate=duplicate)
+    if duplicate:
+        logger.info(f"Похожие обои уже были: {image_url}")
+    return duplicate
 
-        soup = BeautifulSoup(response.text, "html.parser")
-        wallpapers = [a["href"] for a in soup.select(".wallpapers__link")]
-        if not wallpapers:
-            progress.remove_task(task)
-            console.print("[bold red]Нет обоев на этой странице.[/bold red]")
-            return None
 
-        random_page = random.choice(wallpapers)
-        # console.print(
-        #     f"[bold violet]Выбрана ссылка на обои:[/bold violet] [yellow]{random_page}[/yellow]"
-        # )
-        progress.remove_task(task)
+def _remember_preview(url: str, content: bytes):
+    with _previews_lock:
+        _previews[url] = content
+        _previews.move_to_end(url)
+        while len(_previews) > PREVIEW_CACHE_SIZE:
+            _previews.popitem(last=False)
 
-    return get_image_url(f"https://wallpaperscraft.ru{random_page}")
 
+def download_preview(url: str, save_path: str) -> DownloadStats | None:
+    """Сохранить превью: из памяти, если его уже скачала проверка на повтор."""
+    with _previews_lock:
+        content = _previews.pop(url, None)
+    if content is None:
+        return download_wallpaper(url, save_path, verbose=False)
+    started = time.perf_counter()
+    try:
+        with open(save_path, "wb") as file:
+            file.write(content)
+    except OSError as e:
+        logger.error(f"Ошибка записи превью: {e}")
+        return None
+    return DownloadStats(
+        len(content),
+        time.perf_counter() - started,
+        sha256=hashlib.sha256(content).hexdigest(),
+    )
 
-def get_image_url(wallpaper_page_url: str) -> str | None:
-    """Получаем прямую ссылку на изображение с страницы обоев."""
-    response = fetch(wallpaper_page_url)
-    if not response:
+
+def derive_image_url(wallpaper_page_url: str, resolution: str) -> str | None:
+    """Прямая ссылка по слагу страницы: /wallpaper/<slug> -> <slug>_<WxH>.jpg."""
+    slug = wallpaper_page_url.rstrip("/").rsplit("/wallpaper/", 1)[-1]
+    if not slug or "/" in slug:
         return None
+    return f"{IMAGES_URL}/{slug}_{resolution}.jpg"
 
-    soup = BeautifulSoup(response.text, "html.parser")
-    img_link = None
 
-    # Вариант 1
-    info = soup.select_one(".wallpaper-info .wallpaper-table__row")
-    if info:
-        img_link = info.select(".wallpaper-table__cell")[1].select_one("a")["href"]
+def preview_url(image_url: str) -> str | None:
+    """Ссылка на превью тех же обоев: <slug>_<WxH>.jpg -> <slug>_300x168.jpg."""
+    if not IMAGE_SIZE_SUFFIX.search(image_url):
+        return None
+    preview = IMAGE_SIZE_SUFFIX.sub(f"_{PREVIEW_RESOLUTION}.jpg", image_url)
+    return preview if preview != image_url else None
 
-    # Вариант 2
-    if not img_link:
-        toolbar = soup.select_one(".gui-toolbar .gui-button")
-        if toolbar:
-            img_link = toolbar["href"]
-            if img_link.endswith(".jpg"):
+
+def get_image_url(
+    wallpaper_page_url: str, verbose: bool = True, resolution: str | None = None
+) -> str | None:
+    """Получаем прямую ссылку на изображение с страницы обоев."""
+    with metrics.span("resolve_url", source="cache") as span:
+        img_link = url_cache.get(wallpaper_page_url, resolution)
+        if not img_link and resolution:
+            # Быстрый путь: собираем ссылку по слагу и проверяем HEAD-запросом
+            candidate = derive_image_url(wallpaper_page_url, resolution)
+            if candidate and probe(candidate):
+                img_link = candidate
+                span.set(source="derived")
+                url_cache.set(wallpaper_page_url, img_link, resolution)
+        if img_link:
+            if verbose:
                 console.print(
                     f"[bold pink]Прямая ссылка на изображение:[/bold pink] [green]{img_link}[/green]"
                 )
-                return img_link
+            return img_link
+
+        span.set(source="scraped")
+        img_link = _scrape_image_url(wallpaper_page_url, verbose, resolution)
+        if img_link:
+            url_cache.set(wallpaper_page_url, img_link, resolution)
+        else:
+            span.set(error="not_found")
+        return img_link
+
+
+def _scrape_image_url(
+    wallpaper_page_url: str, verbose: bool, resolution: str | None = None
+) -> str | None:
+    """Полный разбор: страница обоев, затем страница разрешения."""
+    response = fetch(wallpaper_page_url)
+    if not response:
+        return None
+
+    img_link = parse_image_link(response.text, parse_resolution(resolution))
+    if img_link and img_link.endswith(".jpg"):
+        if verbose:
+            console.print(
+                f"[bold pink]Прямая ссылка на изображение:[/bold pink] [green]{img_link}[/green]"
+            )
+        return img_link
 
     if not img_link:
-        console.print("[bold red]Не удалось найти ссылку на изображение.[/bold red]")
+        if verbose:
+            console.print(
+                "[bold red]Не удалось найти ссылку на изображение.[/bold red]"
+            )
         return None
 
-    if not img_link.startswith("https://"):
-        url = f"https://wallpaperscraft.ru{img_link}"
+    if not img_link.startswith(("http://", "https://")):
+        url = f"{BASE_URL}{img_link}"
     else:
         url = img_link
 
-    console.print(f"[bold pink]Выбрано изображение: {url}[/bold pink]")
+    if verbose:
+        console.print(f"[bold pink]Выбрано изображение: {url}[/bold pink]")
     response_w = fetch(url)
     if not response_w:
         return None
-    soup_w = BeautifulSoup(response_w.text, "html.parser")
-    wallpaper_w_tag = soup_w.select_one(".wallpaper")
-    wrapper_button = wallpaper_w_tag.select_one(".gui-toolbar div")
-    img_link = wrapper_button.select_one("a").get("href")
+    img_link = parse_direct_link(response_w.text)
     if not img_link:
-        console.print(
-            "[bold red]Не удалось найти прямую ссылку на изображение.[/bold red]"
-        )
+        if verbose:
+            console.print(
+                "[bold red]Не удалось найти прямую ссылку на изображение.[/bold red]"
+            )
         return None
 
-    console.print(
-        f"[bold pink]Прямая ссылка на изображение:[/bold pink] [green]{img_link}[/green]"
-    )
+    if verbose:
+        console.print(
+            f"[bold pink]Прямая ссылка на изображение:[/bold pink] [green]{img_link}[/green]"
+        )
     return img_link
 
 
-def download_wallpaper(image_url: str, save_path: str) -> bool:
-    """Скачиваем обои с отображением прогресса, скорости и объёма."""
-    console.rule("[bold green]Скачивание обоев...[/bold green]")
+def _open_download(image_url: str, offset: int) -> "requests.Response":
+    import requests
+
+    response = request("GET", image_url, headers=range_headers(offset), stream=True)
+    if response is None:
+        raise requests.ConnectionError("сайт перегружен или недоступен")
+    return response
+
+
+def download_wallpaper(
+    image_url: str, save_path: str, verbose: bool = True
+) -> DownloadStats | None:
+    """Скачиваем обои и записываем замер этапа "download"."""
+    with metrics.span("download", url=image_url) as span:
+        stats = _download_wallpaper(image_url, save_path, verbose)
+        if stats:
+            span.set(bytes=stats.size - stats.resumed_from, resumed_from=stats.resumed_from)
+        else:
+            span.set(error="failed")
+        return stats
+
+
+def _download_wallpaper(
+    image_url: str, save_path: str, verbose: bool
+) -> DownloadStats | None:
+    """Скачиваем обои с отображением прогресса, скорости и объёма.
+
+    Данные пишутся во временный .part-файл и переименовываются в save_path
+    только после полной загрузки. Оборванная загрузка докачивается через Range.
+    """
+    import requests
+
+    if verbose:
+        console.rule("[bold green]Скачивание обоев...[/bold green]")
+
+    part_path = partial_path(image_url, save_path)
+    offset = partial_size(part_path)
+    started = time.perf_counter()
 
     try:
-        with requests.get(
-            image_url, headers=HEADERS, stream=True, timeout=10
-        ) as response:
+        response = _open_download(image_url, offset)
+        if response.status_code == 416:
+            # Кусок на диске не совпадает с файлом на сервере — качаем заново
+            response.close()
+            offset = 0
+            response = _open_download(image_url, offset)
+
+        with response:
             response.raise_for_status()
-            total_size = int(response.headers.get("content-length", 0))
+            if offset and response.status_code != 206:
+                offset = 0  # Сервер не поддержал Range
 
+            total_size = expected_size(response.headers, offset)
             if total_size == 0:
-                console.print(
-                    "[bold red]Ошибка: пустой файл или неизвестный размер.[/bold red]"
-                )
-                return False
-            console.print("\n")
+                if verbose:
+                    console.print("[bold red]Ошибка: пустой файл.[/bold red]")
+                return None
+            if verbose:
+                console.print("\n")
+
+            received = offset
+            # Хэш считаем на лету, чтобы не перечитывать файл после загрузки
+            digest = hash_partial(part_path, offset)
+            file = open(part_path, "ab" if offset else "wb")
             try:
-                with (
-                    open(save_path, "wb") as file,
-                    Progress(
-                        SpinnerColumn(style="cyan"),
-                        TextColumn("[progress.description]{task.description}"),
-                        BarColumn(bar_width=40, style="magenta"),
-                        DownloadColumn(),  # показывает объем данных, например "5.3 MB / 20.0 MB"
-                        TransferSpeedColumn(),  # показывает скорость загрузки
-                        TimeRemainingColumn(),  # оценка оставшегося времени
-                        transient=True,
-                    ) as progress,
-                ):
-                    task = progress.add_task("Загрузка", total=total_size)
-                    for chunk in response.iter_content(chunk_size=8192):  # 8KB буфер
-                        if chunk:
-                            file.write(chunk)
-                            progress.update(task, advance=len(chunk))
+                with make_progress(
+                    SpinnerColumn(style="cyan"),
+                    TextColumn("[progress.description]{task.description}"),
+                    BarColumn(bar_width=40, style="magenta"),
+                    DownloadColumn(),  # показывает объем данных, например "5.3 MB / 20.0 MB"
+                    TransferSpeedColumn(),  # показывает скорость загрузки
+                    TimeRemainingColumn(),  # оценка оставшегося времени
+                    auto_refresh=False,
+                    disable=not verbose,
+                ) as progress:
+                    task = progress.add_task(
+                        "Загрузка", total=total_size, completed=offset
+                    )
+                    sizer = ChunkSizer()
+                    last_render = 0.0
+                    while True:
+                        chunk_started = time.perf_counter()
+                        chunk = response.raw.read(sizer.size, decode_content=True)
+                        if not chunk:
+                            break
+                        file.write(chunk)
+                        digest.update(chunk)
+                        received += len(chunk)
+                        now = time.perf_counter()
+                        sizer.update(len(chunk), now - chunk_started)
+                        # Перерисовываем прогресс не чаще PROGRESS_INTERVAL
+                        if now - last_render >= PROGRESS_INTERVAL:
+                            progress.update(task, completed=received, refresh=True)
+                            last_render = now
+
+                check_received(received, total_size)
+                commit_partial(file, part_path, save_path)
             except Exception as e:
                 logger.error(f"Ошибка при скачивании файла: {e}")
-                return False
-
-        clear_cmd()
-        console.print("[bold green]✅ Скачивание завершено![/bold green]", end="")
-        return True
+                return None
+            finally:
+                file.close()
 
     except requests.RequestException as e:
         logger.error(f"Ошибка загрузки: {e}")
-        return False
+        return None
 
+    stats = download_finished(image_url, received, started, offset, digest)
+    if verbose:
+        console.print(
+            f"[bold green]✅ Скачивание завершено![/bold green] "
+            f"[dim]{stats.size / 1024 / 1024:.1f} МБ за {stats.elapsed:.1f} с, "
+            f"{stats.speed / 1024 / 1024:.1f} МБ/с[/dim]",
+            end="",
+        )
+    return stats
 
-def set_wallpaper(image_path: str):
-    """Установка обоев на рабочий стол."""
-    # ctypes.windll.user32.SystemParametersInfoW(20, 0, image_path, 3)
-    thread = Thread(
-        target=ctypes.windll.user32.SystemParametersInfoW, args=(20, 0, image_path, 3)
+
+def download_finished(
+    image_url: str, received: int, started: float, offset: int, digest
+) -> DownloadStats:
+    """Итог загрузки для обоих клиентов: статистика и запись в лог."""
+    stats = DownloadStats(
+        received, time.perf_counter() - started, offset, digest.hexdigest()
+    )
+    logger.info(
+        f"Скачано {stats.size} байт за {stats.elapsed:.2f} с "
+        f"({stats.speed / 1024 / 1024:.2f} МБ/с): {image_url}"
     )
-    thread.start()
+    return stats
+
+
+def set_wallpaper(image_path: str, span: bool = False):
+    """Установка обоев на рабочий стол (в фоне, побеждает последний вызов).
+
+    span=True — изображение собрано на все мониторы сразу.
+    """
+    apply_queue.submit(image_path, span)
@@ -1,42 +1,192 @@
+import argparse
 import os
+import signal
 import sys
 import time
+from datetime import datetime, timedelta
+from threading import Event, Lock, Thread
 
 from config import console, logger, cache_dir
 from models import Category, WallpaperHistory
 
-from utils.categories import get_categories, show_categories
-from utils.wallpapers import get_random_wallpaper, download_wallpaper, set_wallpaper
-from utils.actions import ActionKey, wait_for_key_press, show_wallpaper_info
-from utils.config_manager import ConfigManager
+from utils.categories import category_snapshot, get_categories, show_categories
+from utils.wallpapers import (
+    get_random_wallpaper,
+    download_wallpaper,
+    download_preview,
+    pick_image_url,
+    preview_url,
+    set_wallpaper,
+)
+from utils.actions import (
+    ActionKey,
+    help_keys,
+    key_input,
+    show_help,
+    show_stage_stats,
+    show_wallpaper_info,
+    wait_for_key_press,
+)
+from utils.config_manager import ConfigKey, ConfigManager
+from utils.blob_store import blob_store
+from utils.fetcher import configure_session, get_connection_stats
+from utils.harvest import Harvester, show_harvest_summary
 from utils.history_manager import WallpaperHistoryManager
+from utils.image_fit import HAS_PILLOW, ImageFitter
+from utils.link_pool import link_pool
+from utils.metrics import Span, hot_path_profiler, metrics
+from utils.multi_monitor import (
+    fetch_parts,
+    parse_monitor_categories,
+    pick_categories,
+    remove_parts,
+)
+from utils.page_index import page_index
+from utils.phash import phash_index
+from utils.url_cache import url_cache
+from utils.prefetch import WallpaperPrefetcher
+from utils.schedule import CronSchedule, IntervalSchedule
+from utils.screen import (
+    Monitor,
+    get_monitors,
+    get_screen_size,
+    parse_resolution,
+    resolve_resolution,
+)
+from utils.setter import apply_queue, create_backend
 from utils.clear_cmd import clear_cmd
+from utils.startup import StartupProfile
+from utils.throttle import throttle
+from utils.tui import dashboard
 
 from rich.prompt import Prompt, Confirm
 
+# Даже долгий сон прерываем, чтобы сверить часы (сон/гибернация, перевод времени)
+MAX_SLEEP = 5 * 60
+# Сколько раз подряд ищем обои, если пользователь просит попробовать еще
+MAX_PICK_ATTEMPTS = 5
+# Сколько ждем сайт при запуске, если есть история: дальше работаем из кэша
+ONLINE_CHECK_TIMEOUT = 3
+
 
 class WallSwapper:
     def __init__(
         self,
-        sys_params: list[str],
+        args: argparse.Namespace,
         config_manager: ConfigManager,
         history_manager: WallpaperHistoryManager,
+        profile: StartupProfile | None = None,
     ):
         self.config_manager = config_manager
+        self.profile = profile
         self.history_manager = history_manager
         self.cache_dir = cache_dir
         self.categories: list[Category] | None = None
         self.select_category: Category | None = None
-        self.current_index: int = len(self.history_manager.get_history()) - 1
+        # Сайт недоступен: обои берутся из истории и очереди
+        self.offline: bool = False
+        self.current_index: int = self.history_manager.count() - 1
         self.sys_choice: str | None = None
-        self.sys_params: list[str] | None = sys_params
+        self.args = args
+        # Растет при каждой смене обоев; фоновая подмена превью сверяется с ним
+        self.apply_generation: int = 0
+        # Под ним меняется поколение и фоновый поток ставит полные обои
+        self._apply_lock = Lock()
+        # Индекс в истории обоев, поставленных фоновым потоком; current_index
+        # по нему обновляет только главный поток
+        self._applied_index: int | None = None
+        # Превью, оставшееся на экране после неудачной докачки: удаляется,
+        # когда на экран встанут другие обои
+        self._live_preview: str | None = None
+        self.fitter = ImageFitter(on_variant=blob_store.add_variant)
+        self.prefetcher = WallpaperPrefetcher(
+            cache_dir,
+            self.config_manager.get_value(ConfigKey.PREFETCH_DEPTH),
+            fitter=self.fitter,
+        )
+        self.__apply_config()
+
+    def __apply_config(self):
+        configure_session(
+            pool_size=self.config_manager.get_value(ConfigKey.POOL_SIZE),
+            max_retries=self.config_manager.get_value(ConfigKey.MAX_RETRIES),
+            retry_backoff=self.config_manager.get_value(ConfigKey.RETRY_BACKOFF),
+        )
+        self.prefetcher.set_depth(
+            self.config_manager.get_value(ConfigKey.PREFETCH_DEPTH)
+        )
+        self.prefetcher.concurrency = self.config_manager.get_value(
+            ConfigKey.MAX_CONCURRENCY
+        )
+        self.prefetcher.pool_size = self.config_manager.get_value(ConfigKey.POOL_SIZE)
+        page_index.ttl = (
+            self.config_manager.get_value(ConfigKey.PAGE_INDEX_TTL_HOURS) * 60 * 60
+        )
+        url_cache.ttl = (
+            self.config_manager.get_value(ConfigKey.IMAGE_URL_TTL_HOURS) * 60 * 60
+        )
+        blob_store.max_bytes = (
+            self.config_manager.get_value(ConfigKey.CACHE_MAX_MB) * 1024 * 1024
+        )
+        self.prefetcher.resolution = resolve_resolution(
+            self.config_manager.get_value(ConfigKey.TARGET_RESOLUTION)
+        )
+        apply_queue.set_backend(
+            create_backend(
+                self.config_manager.get_value(ConfigKey.SETTER_BACKEND),
+                self.config_manager.get_value(ConfigKey.SETTER_COMMAND),
+            )
+        )
+        self.fitter.size = (
+            parse_resolution(self.prefetcher.resolution) or get_screen_size()
+            if self.config_manager.get_value(ConfigKey.FIT_TO_SCREEN)
+            else None
+        )
+        metrics.set_trace_file(self.config_manager.get_value(ConfigKey.TRACE_FILE))
+        hot_path_profiler.set_enabled(
+            self.config_manager.get_value(ConfigKey.PROFILE_HOT_PATH)
+        )
+        phash_index.enabled = HAS_PILLOW and self.config_manager.get_value(
+            ConfigKey.SKIP_DUPLICATES
+        )
 
     def __load_categories(self):
-        self.categories = get_categories()
+        # Сохраненный список показываем сразу, свежий подтянется в фоне
+        self.categories = category_snapshot.load()
+        if self.categories:
+            category_snapshot.refresh_async(self.__on_categories_updated)
+        elif not self.history_manager.count():
+            # Первый запуск: кроме сайта показать нечего, ждем его
+            self.categories = get_categories()
+        else:
+            # Снимка нет, но есть история: недолго пробуем сайт, прежде
+            # чем уйти в офлайн (иначе не принять категорию из аргументов)
+            self.categories = get_categories(timeout=ONLINE_CHECK_TIMEOUT)
+        self.__mark_startup("Загрузка категорий")
         if not self.categories:
-            logger.error("Категории не найдены!")
-            sys.exit(1)
-        self.select_category = self.categories[0]
+            self.categories = []
+            self.offline = True
+            console.print(
+                "\n[bold yellow]⚠ Сайт недоступен: обои будут браться из кэша.[/bold yellow]",
+                end="",
+            )
+            category_snapshot.refresh_async(self.__on_categories_updated)
+            return
+        page_index.refresh_async(self.categories)
+        self.__select_category(self.categories[0])
+
+    def __on_categories_updated(self, categories: list[Category]):
+        """Свежий список категорий пришел с сайта (из фонового потока)."""
+        self.categories = categories
+        self.offline = False
+        page_index.refresh_async(categories)
+        if self.select_category is None:
+            self.__select_category(categories[0])
+        logger.info(f"Список категорий обновлен: {len(categories)}")
+
+    def __select_category(self, category: Category):
+        self.select_category = category
+        self.prefetcher.set_category(category)
 
     def __show_categories(self):
         # clear_cmd()
@@ -44,6 +194,11 @@ class WallSwapper:
 
     def __choice_category(self):
         # clear_cmd()
+        if not self.categories:
+            console.print(
+                "\n[bold red]❌ Категории недоступны без сети.[/bold red]", end=""
+            )
+            return
         self.__show_categories()
         while True:
             new_choice = Prompt.ask(
@@ -56,7 +211,7 @@ class WallSwapper:
             if new_choice.isnumeric() and int(new_choice) in range(
                 1, len(self.categories) + 1
             ):
-                self.select_category = self.categories[int(new_choice) - 1]
+                self.__select_category(self.categories[int(new_choice) - 1])
                 clear_cmd()
                 console.print(
                     f"\n[bold green]✅ Выбрана категория: [bold cyan]{self.select_category.name}[/bold cyan]",
@@ -72,52 +227,352 @@ class WallSwapper:
                 )
 
     def __next_wallpaper(self):
+        # Горячий путь: замеряем целиком, профилируем, если включено в настройках
+        # Повторы по просьбе пользователя идут в том же замере, а не вложенными
+        with hot_path_profiler, metrics.span("next_wallpaper") as span:
+            for attempt in range(1, MAX_PICK_ATTEMPTS + 1):
+                if not self.__pick_next_wallpaper(span, attempt < MAX_PICK_ATTEMPTS):
+                    return
+                span.set(attempts=attempt + 1, error=None)
+
+    def __pick_next_wallpaper(self, span: Span, can_retry: bool) -> bool:
+        """Сменить обои. True — если не вышло и пользователь просит повторить."""
         # clear_cmd()
-        if not self.select_category:
+        if not self.select_category and not self.offline:
             console.print("\n[bold red]❌ Вы не выбрали категорию![/bold red]", end="")
-            return
-        wallpaper_url = get_random_wallpaper(
-            self.select_category.url, self.select_category.name
-        )
+            span.set(error="no_category")
+            return False
+        self.__bump_generation()
+        monitors = self.__span_monitors()
+        if monitors:
+            if self.__next_span(monitors):
+                span.set(source="span", monitors=len(monitors))
+                return False
+            console.print(
+                "[bold yellow]⚠ Ставим одни обои на все мониторы.[/bold yellow]"
+            )
+        prefetched = self.prefetcher.pop()
+        if prefetched:
+            span.set(source="prefetch")
+            console.print(
+                f"\n[bold green]✅ Обои из очереди:[/bold green] [green]{prefetched.url}[/green]",
+                end="",
+            )
+            self.__apply_prefetched(prefetched)
+            return False
+        if self.offline or not self.select_category:
+            span.set(source="cache")
+            self.__next_cached()
+            return False
+        span.set(source="network")
+        with metrics.span("find_wallpaper", category=self.select_category.name):
+            wallpaper_url = get_random_wallpaper(
+                self.select_category.url,
+                self.select_category.name,
+                resolution=self.prefetcher.resolution,
+            )
         if not wallpaper_url:
-            retry = Confirm.ask("[bold yellow]Попробовать еще раз?[/bold yellow]")
-            if not retry:
-                return
-            self.__next_wallpaper()
-        timestamp = int(time.time())
-        save_path = os.path.join(cache_dir, f"wallpaper_{timestamp}.jpg")
-        if download_wallpaper(wallpaper_url, save_path):
+            span.set(error="not_found")
+            # Возможно, пропала сеть: показываем то, что уже есть на диске
+            if self.__rotate_cached():
+                span.set(source="cache")
+                console.print(
+                    "\n[bold yellow]⚠ Сайт недоступен, обои из кэша.[/bold yellow]",
+                    end="",
+                )
+                return False
+            open_for = throttle.state().open_for
+            if open_for:
+                # Повтор сейчас все равно не уйдет на сайт
+                console.print(
+                    f"\n[bold yellow]⚠ Сайт перегружен, попробуйте через {open_for:.0f} с.[/bold yellow]",
+                    end="",
+                )
+                return False
+            if not can_retry:
+                return False
+            with key_input.suspended(), dashboard.paused():
+                return Confirm.ask("[bold yellow]Попробовать еще раз?[/bold yellow]")
+        preview_path = None
+        if self.config_manager.get_value(ConfigKey.PROGRESSIVE_SET):
+            preview_path = self.__set_preview(wallpaper_url)
+        if preview_path:
+            Thread(
+                target=self.__apply_in_background,
+                args=(
+                    wallpaper_url,
+                    self.select_category.name,
+                    preview_path,
+                    self.apply_generation,
+                ),
+                daemon=True,
+            ).start()
+            return False
+        self.__set_current(
+            self.__download_and_apply(
+                wallpaper_url, self.select_category.name, self.apply_generation
+            )
+        )
+        return False
+
+    def __next_cached(self):
+        if self.__rotate_cached():
+            console.print("\n[bold yellow]⚠ Офлайн: обои из кэша.[/bold yellow]", end="")
+        else:
+            console.print(
+                "\n[bold red]❌ Нет сети и нет сохраненных обоев.[/bold red]", end=""
+            )
+
+    def __span_monitors(self) -> tuple[Monitor, ...] | None:
+        """Мониторы для режима «свои обои на каждый», если он включен и возможен."""
+        if (
+            self.offline
+            or not self.select_category
+            or not self.config_manager.get_value(ConfigKey.MULTI_MONITOR)
+        ):
+            return None
+        monitors = get_monitors()
+        if len(monitors) < 2:
+            return None
+        if not HAS_PILLOW:
+            logger.warning("Для нескольких мониторов нужен Pillow")
+            return None
+        return monitors
+
+    def __next_span(self, monitors: tuple[Monitor, ...], verbose: bool = True) -> bool:
+        """Скачать обои на все мониторы разом, собрать одно полотно и поставить."""
+        generation = self.apply_generation
+        categories = pick_categories(
+            self.categories,
+            parse_monitor_categories(
+                self.config_manager.get_value(ConfigKey.MONITOR_CATEGORIES)
+            ),
+            self.select_category,
+            len(monitors),
+        )
+        if verbose:
+            console.rule(
+                f"[bold violet]Поиск обоев для {len(monitors)} мониторов...[/bold violet]"
+            )
+        parts = fetch_parts(
+            categories,
+            monitors,
+            cache_dir,
+            self.config_manager.get_value(ConfigKey.MAX_CONCURRENCY),
+            self.config_manager.get_value(ConfigKey.POOL_SIZE),
+        )
+        if not parts:
+            if verbose:
+                console.print(
+                    "[bold red]Не удалось скачать обои для всех мониторов.[/bold red]"
+                )
+            return False
+        try:
+            with metrics.span("compose", monitors=len(monitors)):
+                composed, digest = self.fitter.compose(
+                    [part.local_path for part in parts],
+                    monitors,
+                    os.path.join(cache_dir, f"span_{time.time_ns()}.jpg"),
+                ).result()
+        except Exception as e:
+            logger.error(f"Ошибка сборки обоев для мониторов: {e}")
+            return False
+        finally:
+            # Части больше не нужны: в истории хранится готовое полотно
+            remove_parts(parts)
+        composed = blob_store.add(composed, digest)
+        if generation != self.apply_generation:
+            return True
+        # Все мониторы меняются одной установкой и одной записью в истории
+        self.__set_wallpaper(composed, span=True)
+        self.history_manager.add_entry(
+            WallpaperHistory(
+                " ".join(part.url for part in parts),
+                composed,
+                ", ".join(dict.fromkeys(c.name for c in categories)),
+                digest,
+            )
+        )
+        self.current_index = self.history_manager.count() - 1
+        if verbose:
+            console.print(
+                f"[bold green]✅ Обои установлены на {len(monitors)} мониторов![/bold green]",
+                end="",
+            )
+        return True
+
+    def __rotate_cached(self) -> bool:
+        """Перейти к следующим по кругу обоям истории, файл которых еще на диске."""
+        total = self.history_manager.count()
+        for step in range(1, total + 1):
+            index = (self.current_index + step) % total
+            entry = self.history_manager.get(index)
+            if os.path.exists(entry.local_path):
+                self.current_index = index
+                self.__bump_generation()
+                blob_store.touch(entry.sha256)
+                self.__set_wallpaper(
+                    self.fitter.fitted(entry.local_path), entry.spanned
+                )
+                return True
+        return False
+
+    def __apply_prefetched(self, prefetched: WallpaperHistory):
+        blob_store.touch(prefetched.sha256)
+        self.__set_wallpaper(self.fitter.fitted(prefetched.local_path))
+        self.history_manager.add_entry(prefetched)
+        self.current_index = self.history_manager.count() - 1
+
+    def __set_preview(self, wallpaper_url: str) -> str | None:
+        """Быстро поставить превью; полное изображение докачается в фоне.
+
+        Возвращает путь к файлу превью: им распоряжается поток, который
+        докачивает полное изображение.
+        """
+        url = preview_url(wallpaper_url)
+        if not url:
+            return None
+        preview_path = os.path.join(cache_dir, f"preview_{time.time_ns()}.jpg")
+        stats = download_preview(url, preview_path)
+        if not stats:
+            return None
+        self.__set_wallpaper(preview_path)
+        logger.info(f"Превью установлено за {stats.elapsed:.2f} с: {url}")
+        console.print(
+            "\n[bold green]✅ Установлено превью, полное изображение загружается...[/bold green]",
+            end="",
+        )
+        return preview_path
+
+    def __apply_in_background(
+        self,
+        wallpaper_url: str,
+        category_name: str,
+        preview_path: str,
+        generation: int,
+    ):
+        try:
+            index = self.__download_and_apply(
+                wallpaper_url, category_name, generation, verbose=False
+            )
+        except Exception as e:
+            logger.error(f"Ошибка загрузки полного изображения: {e}")
+            index = None
+        with self._apply_lock:
+            if index is not None:
+                self._applied_index = index
+            # Обои не сменились, а полное изображение не скачалось:
+            # превью остается на экране, и файл ему еще нужен
+            keep = index is None and generation == self.apply_generation
+            if keep:
+                self._live_preview = preview_path
+        if keep:
+            logger.warning(
+                f"Полное изображение не скачалось, остается превью: {wallpaper_url}"
+            )
+        else:
+            # Превью заменено полными обоями или уже сменено новыми
+            self.__remove_preview(preview_path)
+
+    def __download_and_apply(
+        self,
+        wallpaper_url: str,
+        category_name: str,
+        generation: int,
+        verbose: bool = True,
+    ) -> int | None:
+        """Скачать и поставить обои, если с поколения generation их не сменили.
+
+        Возвращает индекс новых обоев в истории или None.
+        """
+        save_path = os.path.join(cache_dir, f"wallpaper_{time.time_ns()}.jpg")
+        stats = download_wallpaper(wallpaper_url, save_path, verbose=verbose)
+        if not stats:
+            return None
+        save_path = blob_store.add(save_path, stats.sha256)
+        # Подогнанная копия пригодится при возврате к этим обоям из истории
+        self.fitter.submit(save_path, stats.sha256)
+        with self._apply_lock:
+            if generation != self.apply_generation:
+                # Пока качали, пользователь уже сменил обои
+                logger.info(f"Полное изображение больше не нужно: {wallpaper_url}")
+                return None
             set_wallpaper(save_path)
+            stale, self._live_preview = self._live_preview, None
             self.history_manager.add_entry(
-                WallpaperHistory(wallpaper_url, save_path, self.select_category.name)
+                WallpaperHistory(wallpaper_url, save_path, category_name, stats.sha256)
             )
-            self.current_index = len(self.history_manager.get_history()) - 1
+            index = self.history_manager.count() - 1
+        if stale:
+            self.__remove_preview(stale)
+        return index
+
+    def __set_wallpaper(self, image_path: str, span: bool = False):
+        """Поставить обои; оставшееся на экране превью больше не нужно."""
+        set_wallpaper(image_path, span)
+        with self._apply_lock:
+            stale, self._live_preview = self._live_preview, None
+        if stale and stale != image_path:
+            self.__remove_preview(stale)
+
+    def __bump_generation(self):
+        with self._apply_lock:
+            self.apply_generation += 1
+
+    def __set_current(self, index: int | None):
+        if index is not None:
+            self.current_index = index
+
+    def __take_applied_index(self):
+        """Учесть обои, которые фоновый поток поставил с прошлого нажатия."""
+        with self._apply_lock:
+            index, self._applied_index = self._applied_index, None
+        self.__set_current(index)
+
+    @staticmethod
+    def __remove_preview(preview_path: str):
+        try:
+            os.remove(preview_path)
+        except OSError as e:
+            logger.error(f"Ошибка удаления превью: {e}")
+
+    def __apply_history_entry(self, wallpaper: WallpaperHistory):
+        if not os.path.exists(wallpaper.local_path):
+            console.print(
+                "\n[bold red]❌ Файл обоев уже удален из кэша.[/bold red]", end=""
+            )
+            return
+        self.__bump_generation()
+        blob_store.touch(wallpaper.sha256)
+        self.__set_wallpaper(
+            self.fitter.fitted(wallpaper.local_path), wallpaper.spanned
+        )
 
     def __previous_history(self):
         # clear_cmd()
         if self.current_index > 0:
             self.current_index -= 1
-            previous = self.history_manager.get_history()[self.current_index]
+            previous = self.history_manager.get(self.current_index)
             show_wallpaper_info(
                 previous,
                 self.current_index,
-                len(self.history_manager.get_history()),
+                self.history_manager.count(),
             )
-            set_wallpaper(previous.local_path)
+            self.__apply_history_entry(previous)
         else:
             console.print("\n\n[bold red]❌ Нет предыдущих обоев в истории.[/bold red]")
 
     def __next_history(self):
         # clear_cmd()
-        if self.current_index < len(self.history_manager.get_history()) - 1:
+        if self.current_index < self.history_manager.count() - 1:
             self.current_index += 1
-            next = self.history_manager.get_history()[self.current_index]
+            next = self.history_manager.get(self.current_index)
             show_wallpaper_info(
                 next,
                 self.current_index,
-                len(self.history_manager.get_history()),
+                self.history_manager.count(),
             )
-            set_wallpaper(next.local_path)
+            self.__apply_history_entry(next)
         else:
             console.print("\n\n[bold red]❌ Нет следующих обоев в истории.[/bold red]")
 
@@ -125,16 +580,45 @@ class WallSwapper:
         # clear_cmd()
         if self.current_index >= 0:
             show_wallpaper_info(
-                self.history_manager.get_history()[self.current_index],
+                self.history_manager.get(self.current_index),
                 self.current_index,
-                len(self.history_manager.get_history()),
+                self.history_manager.count(),
             )
         else:
             console.print("\n\n[bold red]❌ Нет информации об обоях.[/bold red]")
+        stats = get_connection_stats()
+        console.print(
+            f"[bold gray]Соединения:[/bold gray] открыто [yellow]{stats.opened}[/yellow], "
+            f"переиспользовано [green]{stats.reused}[/green]"
+        )
+        state = throttle.state()
+        if state.open_for:
+            limit = f"[red]приостановлены на {state.open_for:.0f} с[/red]"
+        elif state.paused_for:
+            limit = f"[yellow]пауза {state.paused_for:.1f} с[/yellow]"
+        else:
+            limit = f"до [green]{state.limit}[/green] одновременно"
+        console.print(f"[bold gray]Запросы к сайту:[/bold gray] {limit}")
+        mean_input, max_input = key_input.latency()
+        console.print(
+            f"[bold gray]Ввод:[/bold gray] от нажатия до обработки в среднем "
+            f"[cyan]{mean_input * 1000:.1f} мс[/cyan], максимум [cyan]{max_input * 1000:.1f} мс[/cyan]"
+        )
+        applied = apply_queue.stats()
+        console.print(
+            f"[bold gray]Установка обоев ({apply_queue.backend.name}):[/bold gray] "
+            f"применено [green]{applied.applied}[/green], "
+            f"пропущено устаревших [yellow]{applied.coalesced}[/yellow], "
+            f"ошибок [red]{applied.failed}[/red], "
+            f"в среднем [cyan]{applied.mean_latency * 1000:.0f} мс[/cyan], "
+            f"максимум [cyan]{applied.max_latency * 1000:.0f} мс[/cyan]"
+        )
 
     def __edit_config(self):
         # clear_cmd()
-        self.config_manager.edit_config_interactive()
+        with key_input.suspended(), dashboard.paused():
+            self.config_manager.edit_config_interactive()
+        self.__apply_config()
 
     def __delete_history(self):
         # clear_cmd()
@@ -143,18 +627,17 @@ class WallSwapper:
         console.print("\n\n[bold green]✅ Обои удалены![/bold green]")
 
     def __args_handler(self):
-        arg_choice = self.sys_params[0] if self.sys_params else None
-        if arg_choice:
-            if arg_choice.isnumeric() and int(arg_choice) in range(
-                1, len(self.categories) + 1
-            ):
-                self.select_category = self.categories[int(arg_choice) - 1]
-                clear_cmd()
+        arg_choice = self.args.category
+        if arg_choice is not None:
+            if arg_choice in range(1, len(self.categories) + 1):
+                self.__select_category(self.categories[arg_choice - 1])
+                if not self.args.daemon:
+                    clear_cmd()
                 console.print(
                     f"\n[bold green]✅ Выбрана категория: [bold cyan]{self.select_category.name}[/bold cyan]",
                     end="",
                 )
-            elif arg_choice.isnumeric() and int(arg_choice) == 0:
+            elif arg_choice == 0:
                 console.print("\n[bold green]✅ Вы вышли![/bold green]\n")
                 sys.exit(0)
             else:
@@ -162,10 +645,33 @@ class WallSwapper:
                     "[bold red]Ошибка: Введите число в пределах списка.[/bold red]"
                 )
 
+    def __update_dashboard(self):
+        self.__take_applied_index()
+        current = (
+            self.history_manager.get(self.current_index)
+            if self.current_index >= 0
+            else None
+        )
+        dashboard.set_status(
+            {
+                "Категория": self.select_category.name if self.select_category else "—",
+                "Режим": "офлайн (обои из кэша)" if self.offline else "онлайн",
+                "Обои": current.url if current else "—",
+                "В очереди": str(self.prefetcher.size()),
+                "Установка": apply_queue.backend.name,
+            }
+        )
+        dashboard.set_history(self.current_index, self.history_manager.count())
+
     def __choice_handler(self):
+        dashboard.set_help(help_keys())
+        self.__update_dashboard()
+        dashboard.start()
+        if self.__mark_startup("Первая отрисовка", last=True):
+            return
         while True:
             action = wait_for_key_press()
-            clear_cmd()
+            self.__take_applied_index()
             match action:
                 case ActionKey.NEXT:
                     self.__next_wallpaper()
@@ -174,18 +680,201 @@ class WallSwapper:
                 case ActionKey.INFO:
                     self.__info_wallpaper()
                 case ActionKey.CATEGORY:
-                    self.__choice_category()
+                    with key_input.suspended(), dashboard.paused():
+                        self.__choice_category()
                 case ActionKey.CONFIG_EDIT:
                     self.__edit_config()
                 case ActionKey.NEXT_HISTORY:
                     self.__next_history()
                 case ActionKey.PREVIOUS_HISTORY:
                     self.__previous_history()
+                case ActionKey.HELP:
+                    show_help()
+                case ActionKey.STATS:
+                    hot_path_profiler.save()
+                    show_stage_stats(
+                        metrics.summary(),
+                        hot_path_profiler.report(),
+                        hot_path_profiler.top_allocations,
+                    )
                 case ActionKey.EXIT:
                     console.print("[bold green]✅ Вы вышли![/bold green]\n")
                     sys.exit(0)
+            self.__update_dashboard()
 
     def run(self):
+        blob_store.cleanup_orphans_async(
+            self.history_manager.legacy_paths, self.history_manager.has_digest
+        )
         self.__load_categories()
         self.__args_handler()
-        self.__choice_handler()
+        try:
+            self.__choice_handler()
+        finally:
+            self.__shutdown()
+
+    def run_daemon(
+        self, schedule: CronSchedule | IntervalSchedule, prefetch_lead: float
+    ):
+        """Смена обоев по расписанию без участия пользователя."""
+        blob_store.cleanup_orphans_async(
+            self.history_manager.legacy_paths, self.history_manager.has_digest
+        )
+        self.__load_categories()
+        self.__args_handler()
+        # Следующие обои всегда должны быть скачаны к моменту смены
+        self.prefetcher.set_depth(max(self.prefetcher.depth, 1))
+
+        stop = Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        category = self.select_category.name if self.select_category else "—"
+        console.print(
+            f"[bold green]✅ Смена обоев {schedule}, категория "
+            f"[bold cyan]{category}[/bold cyan][/bold green]"
+        )
+        try:
+            self.__rotate()
+            if self.__mark_startup("Первая смена обоев", last=True):
+                return
+            while not stop.is_set():
+                deadline = schedule.next_after(datetime.now())
+                logger.info(f"Следующая смена обоев: {deadline:%Y-%m-%d %H:%M:%S}")
+                if not self.__sleep_until(
+                    deadline - timedelta(seconds=prefetch_lead), stop
+                ):
+                    break
+                remaining = (deadline - datetime.now()).total_seconds()
+                if not self.offline and not self.prefetcher.wait_ready(
+                    max(remaining, 0)
+                ):
+                    logger.warning("Обои не успели скачаться заранее")
+                if not self.__sleep_until(deadline, stop):
+                    break
+                self.__rotate()
+        finally:
+            self.__shutdown()
+        console.print("[bold green]✅ Вы вышли![/bold green]\n")
+
+    def run_harvest(
+        self,
+        count: int,
+        category_numbers: list[int],
+        workers: int,
+        rate: float,
+        restart: bool = False,
+    ):
+        """Скачать count обоев из выбранных категорий в кэш и историю."""
+        self.categories = category_snapshot.load() or get_categories()
+        if not self.categories:
+            console.print("[bold red]❌ Категории недоступны без сети.[/bold red]")
+            return
+        wrong = [n for n in category_numbers if not 1 <= n <= len(self.categories)]
+        if wrong:
+            console.print(
+                f"[bold red]Ошибка: нет категорий с номерами {', '.join(map(str, wrong))}.[/bold red]"
+            )
+            return
+        categories = [self.categories[n - 1] for n in dict.fromkeys(category_numbers)]
+
+        max_items = self.config_manager.get_value(ConfigKey.MAX_ITEMS)
+        if self.history_manager.count() + count > max_items:
+            console.print(
+                f"[bold yellow]⚠ В истории хранится не больше {max_items} обоев: "
+                f"старые записи и их файлы будут удалены.[/bold yellow]"
+            )
+
+        harvester = Harvester(
+            self.history_manager,
+            categories,
+            count,
+            workers,
+            rate,
+            resolution=self.prefetcher.resolution,
+        )
+        if not restart and harvester.resume():
+            console.print(
+                f"[bold green]Продолжаем прерванный сбор: осталось {harvester.remaining}.[/bold green]"
+            )
+        names = ", ".join(category.name for category in categories)
+        console.print(
+            f"[bold green]Сбор {count} обоев: [bold cyan]{names}[/bold cyan][/bold green]"
+        )
+        try:
+            show_harvest_summary(harvester.run())
+        finally:
+            self.__shutdown()
+
+    @staticmethod
+    def __sleep_until(deadline: datetime, stop: Event) -> bool:
+        """Спать до deadline. False — если пришел сигнал остановки."""
+        while True:
+            remaining = (deadline - datetime.now()).total_seconds()
+            if remaining <= 0:
+                return True
+            if stop.wait(min(remaining, MAX_SLEEP)):
+                return False
+
+    def __rotate(self):
+        self.__bump_generation()
+        try:
+            monitors = self.__span_monitors()
+            if monitors:
+                if self.__next_span(monitors, verbose=False):
+                    return
+                logger.warning("Не все мониторы получили обои, ставим одни на все")
+            prefetched = self.prefetcher.pop()
+            if prefetched:
+                logger.info(f"Обои из очереди: {prefetched.url}")
+                self.__apply_prefetched(prefetched)
+                return
+            if self.offline or not self.select_category:
+                if not self.__rotate_cached():
+                    logger.error("Нет сети и нет сохраненных обоев")
+                return
+            # Очередь пуста — качаем прямо сейчас
+            image_url = pick_image_url(
+                self.select_category.url, self.prefetcher.resolution
+            )
+            if not image_url:
+                if self.__rotate_cached():
+                    logger.warning("Сайт недоступен, обои из кэша")
+                    return
+                logger.error("Не удалось найти обои, попробуем в следующий раз")
+                return
+            self.__set_current(
+                self.__download_and_apply(
+                    image_url,
+                    self.select_category.name,
+                    self.apply_generation,
+                    verbose=False,
+                )
+            )
+        except Exception as e:
+            logger.error(f"Ошибка смены обоев: {e}")
+
+    def __mark_startup(self, phase: str, last: bool = False) -> bool:
+        """Отметить этап запуска. True — профиль показан и пора выходить."""
+        if self.profile is None:
+            return False
+        self.profile.mark(phase)
+        if not last:
+            return False
+        if self.args.startup_profile:
+            dashboard.stop()
+            self.profile.report()
+            return True
+        self.profile = None
+        return False
+
+    def __shutdown(self):
+        dashboard.stop()
+        category_snapshot.stop()
+        self.prefetcher.stop()
+        self.fitter.shutdown()
+        # Индекс кэша пишется пачками: сохраняем последние изменения
+        blob_store.save()
+        link_pool.save()
+        url_cache.save()
+        phash_index.shutdown()
+        hot_path_profiler.save()
+        metrics.close()